@@ -1,4 +1,5 @@
 import secrets
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -14,12 +15,112 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = 'sqlite://'
+    # Réplicas de leitura das rotas GET, em JSON: '["postgresql://...", "postgresql://..."]'
+    DATABASE_READ_URLS: list[str] = []
+    # Usa AsyncEngine/AsyncSession (psycopg async ou aiosqlite) nas rotas de autenticação
+    DATABASE_ASYNC: bool = False
+    # Aplica as migrações pendentes ao iniciar, se falso apenas verifica a versão
+    MIGRATE_ON_STARTUP: bool = True
+
+    # Pool de conexões (ignorado no SQLite), tempos em segundos
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     BASE_URL: str = 'http://localhost:8000'
 
+    # Paginação das listagens
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+
+    # Serializa as listagens direto em bytes com TypeAdapter, sem o caminho padrão do FastAPI
+    # de validação, jsonable_encoder e json.dumps
+    FAST_SERIALIZATION: bool = True
+
+    # Compressão das respostas maiores que COMPRESSION_MIN_SIZE bytes, os algoritmos são
+    # tentados na ordem de COMPRESSION_ENCODINGS (br e zstd exigem os pacotes brotli e zstandard)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list[str] = ['br', 'zstd', 'gzip']
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Importação em lote (linhas por lote e máximo de erros detalhados na resposta)
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Máximo de ids por requisição nas rotas batch-get
+    BATCH_GET_MAX_IDS: int = 100
+
+    # Exportação em streaming (linhas buscadas por vez no cursor do servidor)
+    EXPORT_YIELD_PER: int = 1000
+
     # Auth
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = 'HS256'
 
+    # Executor do bcrypt ('thread' ou 'process')
+    HASH_EXECUTOR_KIND: Literal['thread', 'process'] = 'thread'
+    HASH_EXECUTOR_WORKERS: int = 2
+    HASH_EXECUTOR_MAX_QUEUE: int = 64
+
+    # Limite de tentativas de login (token bucket por IP e por email), checado antes do bcrypt.
+    # 'redis' compartilha os baldes entre processos (exige o pacote redis e REDIS_URL)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    LOGIN_THROTTLE_IP_BURST: int = 30
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = 30
+    LOGIN_THROTTLE_EMAIL_BURST: int = 5
+    LOGIN_THROTTLE_EMAIL_PER_MINUTE: float = 3
+    LOGIN_THROTTLE_MAX_KEYS: int = 100_000
+    REDIS_URL: str = 'redis://localhost:6379/0'
+
+    # Cache dos usuários autenticados (segundos / número de entradas). Cada mudança de papel ou
+    # remoção de usuário incrementa a versão dos usuários em cache_version e invalida o cache de
+    # todos os processos
+    PRINCIPAL_CACHE_TTL: float = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+
+    # Cache das respostas de /products (segundos / número de respostas). Cada alteração de
+    # produto incrementa a versão do catálogo em cache_version e invalida o cache de todos os
+    # processos
+    CATALOG_CACHE_TTL: float = 300
+    CATALOG_CACHE_MAX_SIZE: int = 1000
+
+    # Totais do X-Total-Count no modo cached, por filtro (segundos / número de filtros)
+    TOTAL_COUNT_CACHE_TTL: float = 30
+    TOTAL_COUNT_CACHE_MAX_SIZE: int = 10_000
+
+    # Workers em segundo plano (job_services): quantidade de workers asyncio, jobs pegos por vez,
+    # segundos até um job parado voltar à fila, tentativas, espera base entre tentativas
+    # (dobra a cada falha) e intervalo de consulta da fila vazia
+    JOBS_ENABLED: bool = True
+    JOB_WORKERS: int = 2
+    JOB_BATCH_SIZE: int = 20
+    JOB_VISIBILITY_TIMEOUT: float = 60
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF: float = 5
+    JOB_POLL_INTERVAL: float = 1
+
+    # Idempotency-Key dos POST /orders e /clients (segundos): por quanto tempo a resposta é
+    # repetida, validade da reserva de uma requisição em andamento, espera máxima de uma
+    # repetição pela requisição original e intervalo da limpeza das chaves expiradas
+    IDEMPOTENCY_TTL: float = 24 * 60 * 60
+    IDEMPOTENCY_LEASE: float = 60
+    IDEMPOTENCY_WAIT: float = 10
+    IDEMPOTENCY_EVICT_INTERVAL: float = 5 * 60
+
+    # Middleware e rota /metrics no formato do Prometheus
+    METRICS_ENABLED: bool = True
+
+    # Instrumentação SQL por requisição: headers X-DB-*, log de consultas lentas (ms) e de SQLs
+    # repetidos na mesma requisição (possível N+1)
+    SQL_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 200
+    N_PLUS_ONE_THRESHOLD: int = 10
+
     # Senha padrão para testes
     DEFAULT_TEST_PASSWORD: str = 'password8888'
 
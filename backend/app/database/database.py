@@ -1,23 +1,245 @@
-from typing import Annotated
+import itertools
+import logging
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated, Literal
 
-from fastapi import Depends
-from sqlalchemy import Engine
+from fastapi import Depends, Header
+from sqlalchemy import Connection, Engine, event, make_url
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import settings
+from app.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+# Drivers assíncronos usados para cada backend quando DATABASE_ASYNC está ativo
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+psycopg',
+}
+
+
+def get_pool_kwargs(url: str, *, is_async: bool = False) -> dict:
+    """Monta a configuração do pool de conexões a partir das settings DB_POOL_*.
+
+    O SQLite continua com o pool padrão do SQLAlchemy, que não usa tamanho nem overflow.
+    """
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'poolclass': InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Consultas executadas num escopo (uma requisição, um teste).
+
+    `statements` conta quantas vezes cada SQL (com placeholders) foi executado, o que permite
+    encontrar a mesma consulta repetida para cada linha de um resultado (N+1).
+    """
+
+    def __init__(self, parent: 'QueryStats | None' = None) -> None:
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        """Soma uma consulta neste escopo e nos escopos externos."""
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """Retorna os SQLs executados pelo menos `threshold` vezes (N_PLUS_ONE_THRESHOLD)."""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return {sql: count for sql, count in self.statements.items() if count >= threshold}
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Conta as consultas feitas dentro do bloco, em qualquer engine instrumentada.
+
+    O contexto é propagado para o threadpool das rotas síncronas e para o TestClient, então
+    o bloco pode envolver requisições inteiras. Escopos aninhados também somam no escopo
+    externo. Ao sair, SQLs repetidos são registrados no log como possível N+1.
+
+    O bloco recebe um QueryStats, com os contadores preenchidos enquanto ele executa.
+    """
+    stats = QueryStats(parent=_query_stats.get())
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+        for statement, count in stats.repeated().items():
+            logger.warning('possível N+1: consulta executada %d vezes: %s', count, statement)
+
+
+# O início de cada consulta fica no ExecutionContext dela: after_cursor_execute não é chamado
+# quando a consulta falha, e o contexto é descartado junto, sem deixar estado na conexão.
+def _before_cursor_execute(
+    _conn: Connection,
+    _cursor: object,
+    _statement: str,
+    _parameters: object,
+    context: ExecutionContext,
+    _executemany: bool,  # noqa: FBT001
+) -> None:
+    context._query_start = time.perf_counter()  # noqa: SLF001
+
+
+def _after_cursor_execute(
+    _conn: Connection,
+    _cursor: object,
+    statement: str,
+    parameters: object,
+    context: ExecutionContext,
+    executemany: bool,  # noqa: FBT001
+) -> None:
+    elapsed = time.perf_counter() - context._query_start  # noqa: SLF001
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        if executemany:
+            parameters = f'<{len(parameters)} linhas>'
+        logger.warning(
+            'consulta lenta (%.1f ms): %s parâmetros=%r',
+            elapsed * 1000,
+            statement,
+            parameters,
+        )
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Registra na engine os eventos que medem as consultas (tempo, contagem e lentas).
+
+    Args:
+    ----
+        engine (Engine): engine síncrona, ou `async_engine.sync_engine`.
+
+    Returns:
+    -------
+        Engine: a própria engine.
+
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    return engine
 
 
 # Cria a engine a partir da url do banco de dados
-def get_engine() -> Engine:
-    return create_engine(settings.DATABASE_URL)
+def get_engine(url: str | None = None) -> Engine:
+    url = url or settings.DATABASE_URL
+    return instrument_engine(create_engine(url, **get_pool_kwargs(url)))
+
+
+class ReadReplicas:
+    """Engines usadas pelas rotas de leitura.
+
+    Cada sessão de leitura vai para a próxima réplica, em round-robin. Sem réplicas
+    configuradas, ou quando a leitura precisa ver as escritas recentes, vai para a primária.
+    """
+
+    def __init__(self, primary: Engine, replicas: list[Engine]) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self._next = itertools.count()
+
+    def engine(self, *, primary: bool = False) -> Engine:
+        """Engine da próxima sessão de leitura."""
+        if primary or not self.replicas:
+            return self.primary
+        return self.replicas[next(self._next) % len(self.replicas)]
+
+
+def get_async_url(url: str) -> str:
+    """Converte a url do banco para o driver assíncrono equivalente.
+
+    Args:
+    ----
+        url (str): url do banco de dados (ex.: postgresql+psycopg://..., sqlite://).
+
+    Returns:
+    -------
+        str: url com o driver assíncrono (psycopg async ou aiosqlite).
+
+    """
+    db_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(db_url.get_backend_name())
+    if driver:
+        db_url = db_url.set(drivername=driver)
+    return db_url.render_as_string(hide_password=False)
+
+
+# Cria a engine assíncrona a partir da url do banco de dados
+def get_async_engine() -> AsyncEngine:
+    async_engine = create_async_engine(
+        get_async_url(settings.DATABASE_URL),
+        **get_pool_kwargs(settings.DATABASE_URL, is_async=True),
+    )
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
 
 
 engine = get_engine()
+async_engine = get_async_engine() if settings.DATABASE_ASYNC else None
+read_replicas = ReadReplicas(engine, [get_engine(url) for url in settings.DATABASE_READ_URLS])
+
+# Leituras que precisam ver uma escrita recente pedem a primária com este header
+ReadConsistencyHeader = Annotated[
+    Literal['primary', 'replica'] | None,
+    Header(alias='X-Read-Consistency', description='primary lê da primária, sem atraso'),
+]
 
 
 def get_db():
     with Session(engine) as db:
         yield db
 
+
+def get_read_db(consistency: ReadConsistencyHeader = None) -> Iterator[Session]:
+    """Sessão das rotas GET, numa réplica de leitura ou na primária."""
+    with Session(read_replicas.engine(primary=consistency == 'primary')) as db:
+        yield db
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        yield db
+
+
+def get_db_dependency() -> Callable:
+    """Retorna a dependência de sessão selecionada por DATABASE_ASYNC."""
+    return get_async_db if settings.DATABASE_ASYNC else get_db
+
+
 # Sessão do banco de dados
 SessionDep = Annotated[Session, Depends(get_db)]
+# Sessão somente leitura, numa réplica quando DATABASE_READ_URLS estiver configurada
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+# Sessão assíncrona do banco de dados
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+# Sessão síncrona ou assíncrona, conforme DATABASE_ASYNC
+AnySessionDep = Annotated[Session | AsyncSession, Depends(get_db_dependency())]
@@ -19,3 +19,12 @@ class PedidoStatus(str, Enum):
     entregue = 'pedido entregue ao cliente'
     cancelado = 'pedido cancelado pelo cliente'
     devolvido = 'pedido devolvido após a entrega'
+
+
+class JobStatus(str, Enum):
+    """Estado de um job da fila persistente (ver job_services)."""
+
+    pendente = 'pendente'
+    executando = 'executando'
+    concluido = 'concluido'
+    falhou = 'falhou'
@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import Load, joinedload, load_only, selectinload
+from sqlmodel import SQLModel
+
+
+def load_options(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    fields: frozenset[str] | None = None,
+) -> list[Load]:
+    """Monta as estratégias de carregamento das relações serializadas pelo schema.
+
+    Cada relação do model que aparece como campo do schema é carregada junto com a consulta
+    principal: relações para um (many-to-one) usam `joinedload` e coleções usam
+    `selectinload`, que busca todos os itens da página com um único `IN`. Assim a
+    serialização da resposta não dispara uma consulta por linha (N+1).
+
+    Com `fields` (os campos pedidos em ?fields=) apenas essas colunas e a chave primária são
+    lidas (`load_only`) e as relações fora de `fields` não são carregadas.
+
+    Args:
+    ----
+        model (type[SQLModel]): model consultado.
+        schema (type[BaseModel]): schema de resposta da rota.
+        fields (frozenset[str] | None): campos da resposta, None para o schema inteiro.
+
+    Returns:
+    -------
+        list: opções para `select(...).options(*opcoes)`.
+
+    """
+    mapper = inspect(model)
+    options = []
+    if fields is not None:
+        colunas = [
+            getattr(model, coluna.key)
+            for coluna in mapper.column_attrs
+            if coluna.key in fields or any(c.primary_key for c in coluna.columns)
+        ]
+        options.append(load_only(*colunas))
+    for relationship in mapper.relationships:
+        if relationship.key not in schema.model_fields:
+            continue
+        if fields is not None and relationship.key not in fields:
+            continue
+        attribute = getattr(model, relationship.key)
+        if relationship.uselist:
+            options.append(selectinload(attribute))
+        else:
+            options.append(joinedload(attribute))
+    return options
@@ -0,0 +1,385 @@
+"""Migrações versionadas do banco de dados.
+
+Cada migração tem um número de versão e uma função que recebe a conexão aberta numa
+transação. A versão aplicada fica registrada na tabela `schema_version`. As funções devem ser
+idempotentes (checkfirst), assim bancos criados antes das migrações, só com create_all,
+também podem ser atualizados. No Postgres `upgrade` segura um advisory lock até o fim da
+transação, então vários workers iniciando juntos aplicam as migrações uma única vez.
+
+Para aplicar as migrações pendentes:
+
+    python -m app.database.migrations
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+)
+
+version_metadata = MetaData()
+
+schema_version = Table(
+    'schema_version',
+    version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String, nullable=False),
+    Column('applied_at', DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+# As migrações descrevem as tabelas como eram na versão em que foram criadas, sem usar os
+# models: uma mudança futura nos models não altera o que uma migração antiga cria.
+ROLES = ('admin', 'user')
+PEDIDO_STATUS = ('pendente', 'confirmado', 'enviado', 'entregue', 'cancelado', 'devolvido')
+JOB_STATUS = ('pendente', 'executando', 'concluido', 'falhou')
+
+
+def _create_index(connection: Connection, name: str, table: str, *columns: str) -> None:
+    stub = Table(table, MetaData(), *(Column(column) for column in columns))
+    Index(name, *(stub.c[column] for column in columns)).create(connection, checkfirst=True)
+
+
+def _schema_inicial(connection: Connection) -> None:
+    metadata = MetaData()
+    Table(
+        'usuario',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('nome', String, nullable=False),
+        Column('email', String, nullable=False),
+        Column('senha', String, nullable=False),
+        Column('role', Enum(*ROLES, name='role'), nullable=False),
+    )
+    Table(
+        'cliente',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('cpf', String(11), nullable=False, unique=True),
+        Column('telefone', String),
+        Column('endereco', String),
+        Column('data_criacao', DateTime, nullable=False),
+        Column('data_nascimento', Date),
+        Column('usuario_id', Integer, ForeignKey('usuario.id'), nullable=False, index=True),
+    )
+    Table(
+        'produto',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('categoria', String, nullable=False),
+        Column('secao', String, nullable=False),
+        Column('preco', Float, nullable=False),
+        Column('disponivel', Boolean, nullable=False),
+    )
+    Table(
+        'pedido',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('cliente_id', Integer, ForeignKey('cliente.id'), nullable=False, index=True),
+        Column('status', Enum(*PEDIDO_STATUS, name='pedidostatus'), nullable=False),
+        Column('data_inicio', Date, nullable=False),
+        Column('data_fim', Date),
+    )
+    Table(
+        'pedido_produto',
+        metadata,
+        Column(
+            'produto_id',
+            Integer,
+            ForeignKey('produto.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        Column(
+            'pedido_id',
+            Integer,
+            ForeignKey('pedido.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+    )
+    metadata.create_all(connection, checkfirst=True)
+
+
+def _indices_de_filtros(connection: Connection) -> None:
+    _create_index(connection, 'ix_usuario_email', 'usuario', 'email')
+    _create_index(connection, 'ix_produto_categoria', 'produto', 'categoria')
+    _create_index(connection, 'ix_produto_secao', 'produto', 'secao')
+    _create_index(connection, 'ix_produto_disponivel', 'produto', 'disponivel')
+    _create_index(connection, 'ix_produto_preco', 'produto', 'preco')
+    _create_index(connection, 'ix_pedido_data_inicio_id', 'pedido', 'data_inicio', 'id')
+    _create_index(connection, 'ix_pedido_status_data_inicio', 'pedido', 'status', 'data_inicio')
+    _create_index(connection, 'ix_pedido_data_fim', 'pedido', 'data_fim')
+    _create_index(connection, 'ix_pedido_produto_pedido_id', 'pedido_produto', 'pedido_id')
+
+
+def _resumo_de_vendas(connection: Connection) -> None:
+    metadata = MetaData()
+    venda_diaria = Table(
+        'venda_diaria',
+        metadata,
+        Column('dia', Date, primary_key=True),
+        Column('secao', String, primary_key=True),
+        Column('categoria', String, primary_key=True),
+        Column('status', Enum(*PEDIDO_STATUS, name='pedidostatus'), primary_key=True),
+        Column('pedidos', Integer, nullable=False),
+        Column('itens', Integer, nullable=False),
+        Column('receita', Float, nullable=False),
+    )
+    venda_diaria.create(connection, checkfirst=True)
+
+    # preenche o resumo com os pedidos que já existem
+    pedido = Table('pedido', metadata, Column('id'), Column('data_inicio'), Column('status'))
+    pedido_produto = Table('pedido_produto', metadata, Column('pedido_id'), Column('produto_id'))
+    produto = Table(
+        'produto',
+        metadata,
+        Column('id'),
+        Column('secao'),
+        Column('categoria'),
+        Column('preco'),
+    )
+    connection.execute(delete(venda_diaria))
+    connection.execute(
+        insert(venda_diaria).from_select(
+            ['dia', 'secao', 'categoria', 'status', 'pedidos', 'itens', 'receita'],
+            select(
+                pedido.c.data_inicio,
+                produto.c.secao,
+                produto.c.categoria,
+                pedido.c.status,
+                func.count(func.distinct(pedido.c.id)),
+                func.count(),
+                func.sum(produto.c.preco),
+            )
+            .join(pedido_produto, pedido_produto.c.pedido_id == pedido.c.id)
+            .join(produto, pedido_produto.c.produto_id == produto.c.id)
+            .group_by(pedido.c.data_inicio, produto.c.secao, produto.c.categoria, pedido.c.status),
+        ),
+    )
+
+
+# Busca textual na versão 4: FTS5 (trigram) mantida por triggers no SQLite e índices GIN do
+# pg_trgm no Postgres
+BUSCA_SQLITE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS produto_busca '
+    "USING fts5(categoria, secao, tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS produto_busca_ad AFTER DELETE ON produto '
+    'BEGIN DELETE FROM produto_busca WHERE rowid = old.id; END',
+    'CREATE TRIGGER IF NOT EXISTS produto_busca_ai AFTER INSERT ON produto '
+    'BEGIN INSERT INTO produto_busca(rowid, categoria, secao) '
+    'VALUES (new.id, new.categoria, new.secao); END',
+    'CREATE TRIGGER IF NOT EXISTS produto_busca_au AFTER UPDATE OF categoria, secao ON produto '
+    'BEGIN UPDATE produto_busca SET categoria = new.categoria, secao = new.secao '
+    'WHERE rowid = new.id; END',
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cliente_busca USING fts5(nome, email, tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS cliente_busca_ad AFTER DELETE ON cliente '
+    'BEGIN DELETE FROM cliente_busca WHERE rowid = old.id; END',
+    'CREATE TRIGGER IF NOT EXISTS cliente_busca_ai AFTER INSERT ON cliente '
+    'BEGIN INSERT INTO cliente_busca(rowid, nome, email) '
+    'SELECT new.id, nome, email FROM usuario WHERE id = new.usuario_id; END',
+    'CREATE TRIGGER IF NOT EXISTS cliente_busca_au AFTER UPDATE OF usuario_id ON cliente '
+    'BEGIN UPDATE cliente_busca SET (nome, email) = '
+    '(SELECT nome, email FROM usuario WHERE id = new.usuario_id) WHERE rowid = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS cliente_busca_source_au AFTER UPDATE OF nome, email ON usuario '
+    'BEGIN UPDATE cliente_busca SET nome = new.nome, email = new.email '
+    'WHERE rowid IN (SELECT id FROM cliente WHERE usuario_id = new.id); END',
+    # preenche os índices com os clientes e produtos que já existem
+    'DELETE FROM produto_busca',
+    'INSERT INTO produto_busca(rowid, categoria, secao) SELECT id, categoria, secao FROM produto',
+    'DELETE FROM cliente_busca',
+    'INSERT INTO cliente_busca(rowid, nome, email) '
+    'SELECT cliente.id, usuario.nome, usuario.email '
+    'FROM cliente JOIN usuario ON cliente.usuario_id = usuario.id',
+)
+BUSCA_POSTGRES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_produto_busca_trgm ON produto '
+    "USING gin ((lower(categoria || ' ' || secao)) gin_trgm_ops)",
+    'CREATE INDEX IF NOT EXISTS ix_cliente_busca_trgm ON usuario '
+    "USING gin ((lower(nome || ' ' || email)) gin_trgm_ops)",
+)
+
+
+def _indices_de_busca(connection: Connection) -> None:
+    statements = {'sqlite': BUSCA_SQLITE, 'postgresql': BUSCA_POSTGRES}
+    dialect = connection.dialect.name
+    if dialect not in statements:
+        msg = f'busca textual não suportada no banco {dialect}'
+        raise NotImplementedError(msg)
+    for statement in statements[dialect]:
+        connection.execute(text(statement))
+
+
+def _fila_de_jobs(connection: Connection) -> None:
+    Table(
+        'job',
+        MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('kind', String, nullable=False),
+        Column('payload', JSON, nullable=False),
+        Column('status', Enum(*JOB_STATUS, name='jobstatus'), nullable=False),
+        Column('attempts', Integer, nullable=False),
+        Column('max_attempts', Integer, nullable=False),
+        Column('run_after', DateTime, nullable=False),
+        Column('locked_until', DateTime),
+        Column('claim_token', String),
+        Column('last_error', String),
+        Column('created_at', DateTime, nullable=False),
+        Column('finished_at', DateTime),
+        Index('ix_job_status_run_after', 'status', 'run_after'),
+    ).create(connection, checkfirst=True)
+
+
+def _chaves_de_idempotencia(connection: Connection) -> None:
+    Table(
+        'idempotency_key',
+        MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('usuario_id', Integer, nullable=False),
+        Column('endpoint', String, nullable=False),
+        Column('key', String, nullable=False),
+        Column('request_hash', String, nullable=False),
+        Column('status_code', Integer),
+        Column('body', LargeBinary),
+        Column('created_at', DateTime, nullable=False),
+        Column('expires_at', DateTime, nullable=False),
+        UniqueConstraint('usuario_id', 'endpoint', 'key'),
+        Index('ix_idempotency_key_expires_at', 'expires_at'),
+    ).create(connection, checkfirst=True)
+
+
+def _versoes_de_cache(connection: Connection) -> None:
+    cache_version = Table(
+        'cache_version',
+        MetaData(),
+        Column('nome', String, primary_key=True),
+        Column('versao', Integer, nullable=False),
+    )
+    cache_version.create(connection, checkfirst=True)
+    existentes = set(connection.execute(select(cache_version.c.nome)).scalars())
+    if 'catalog' not in existentes:
+        connection.execute(insert(cache_version).values(nome='catalog', versao=0))
+
+
+def _versao_dos_usuarios(connection: Connection) -> None:
+    cache_version = Table(
+        'cache_version',
+        MetaData(),
+        Column('nome', String, primary_key=True),
+        Column('versao', Integer, nullable=False),
+    )
+    existentes = set(connection.execute(select(cache_version.c.nome)).scalars())
+    if 'principal' not in existentes:
+        connection.execute(insert(cache_version).values(nome='principal', versao=0))
+
+
+def _dono_das_chaves_de_idempotencia(connection: Connection) -> None:
+    colunas = {column['name'] for column in inspect(connection).get_columns('idempotency_key')}
+    if 'claim_token' not in colunas:
+        connection.execute(text('ALTER TABLE idempotency_key ADD COLUMN claim_token VARCHAR'))
+
+
+MIGRATIONS = [
+    Migration(1, 'schema inicial', _schema_inicial),
+    Migration(2, 'índices das colunas filtradas pelas rotas', _indices_de_filtros),
+    Migration(3, 'resumo de vendas por dia, seção, categoria e status', _resumo_de_vendas),
+    Migration(4, 'busca textual de clientes e produtos', _indices_de_busca),
+    Migration(5, 'fila persistente de jobs', _fila_de_jobs),
+    Migration(6, 'respostas guardadas por Idempotency-Key', _chaves_de_idempotencia),
+    Migration(7, 'versão compartilhada do cache do catálogo', _versoes_de_cache),
+    Migration(8, 'versão compartilhada do cache dos usuários autenticados', _versao_dos_usuarios),
+    Migration(9, 'dono da reserva de cada Idempotency-Key', _dono_das_chaves_de_idempotencia),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+# Chave do pg_advisory_xact_lock que serializa as migrações entre processos
+MIGRATION_LOCK_ID = 7_202_509
+
+
+def current_version(connection: Connection) -> int:
+    """Retorna a versão aplicada no banco, 0 quando nenhuma migração foi registrada."""
+    version_metadata.create_all(connection, checkfirst=True)
+    version = connection.execute(select(func.max(schema_version.c.version))).scalar()
+    return version or 0
+
+
+def _lock(connection: Connection) -> None:
+    # Workers iniciando juntos esperam aqui até o primeiro terminar e então leem a versão já
+    # atualizada. O lock é liberado no commit ou rollback. No SQLite, usado num processo só,
+    # não há o que travar.
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': MIGRATION_LOCK_ID})
+
+
+def upgrade(connection: Connection, target: int = HEAD) -> list[int]:
+    """Aplica as migrações pendentes até a versão `target`.
+
+    Args:
+    ----
+        connection (Connection): conexão aberta numa transação (engine.begin()), que segura o
+            lock das migrações até o commit.
+        target (int): versão final desejada.
+
+    Returns:
+    -------
+        list[int]: versões aplicadas.
+
+    """
+    _lock(connection)
+    current = current_version(connection)
+    applied = []
+    for migration in MIGRATIONS:
+        if current < migration.version <= target:
+            migration.upgrade(connection)
+            connection.execute(
+                insert(schema_version).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(timezone.utc),
+                ),
+            )
+            applied.append(migration.version)
+    return applied
+
+
+def upgrade_engine(engine: Engine) -> list[int]:
+    with engine.begin() as connection:
+        return upgrade(connection)
+
+
+if __name__ == '__main__':
+    from app.database.database import engine
+
+    versions = upgrade_engine(engine)
+    print(f'migrações aplicadas: {versions or "nenhuma"} (versão atual {HEAD})')  # noqa: T201
@@ -1,9 +1,10 @@
 from datetime import date, datetime
 from typing import Optional
 
+from sqlalchemy import JSON, Column, Index, LargeBinary, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
-from app.database.enums import PedidoStatus, Role
+from app.database.enums import JobStatus, PedidoStatus, Role
 
 # ------------------------------------------------------------------------------------------------
 # Usuario
@@ -14,7 +15,7 @@ class Usuario(SQLModel, table=True):
 
     id: int | None = Field(default=None, primary_key=True)
     nome: str
-    email: str
+    email: str = Field(index=True)
     senha: str
     role: Role = Field(default=Role.user)
 
@@ -53,17 +54,23 @@ class PedidoProduto(SQLModel, table=True):
     __tablename__ = 'pedido_produto'
 
     produto_id: int = Field(foreign_key='produto.id', primary_key=True, ondelete='CASCADE')
-    pedido_id: int = Field(foreign_key='pedido.id', primary_key=True, ondelete='CASCADE')
+    # a chave primária começa por produto_id, buscas pelo pedido precisam de índice próprio
+    pedido_id: int = Field(
+        foreign_key='pedido.id',
+        primary_key=True,
+        ondelete='CASCADE',
+        index=True,
+    )
 
 
 class Produto(SQLModel, table=True):
     __tablename__ = 'produto'
 
     id: int | None = Field(default=None, primary_key=True)
-    categoria: str
-    secao: str
-    preco: float
-    disponivel: bool
+    categoria: str = Field(index=True)
+    secao: str = Field(index=True)
+    preco: float = Field(index=True)
+    disponivel: bool = Field(index=True)
 
     pedidos: list['Pedido'] = Relationship(
         back_populates='produtos',
@@ -77,14 +84,122 @@ class Produto(SQLModel, table=True):
 
 class Pedido(SQLModel, table=True):
     __tablename__ = 'pedido'
+    __table_args__ = (
+        # ordenação da paginação por cursor e filtro por data_inicio
+        Index('ix_pedido_data_inicio_id', 'data_inicio', 'id'),
+        Index('ix_pedido_status_data_inicio', 'status', 'data_inicio'),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     cliente_id: int = Field(index=True, foreign_key='cliente.id')
     status: PedidoStatus = Field(default=PedidoStatus.pendente)
     data_inicio: date = Field(default_factory=date.today)
-    data_fim:  date | None = Field()
+    data_fim: date | None = Field(index=True)
     cliente: 'Cliente' = Relationship(back_populates='pedidos')
     produtos: list['Produto'] = Relationship(
         back_populates='pedidos',
         link_model=PedidoProduto,
     )
+
+
+# ------------------------------------------------------------------------------------------------
+# Vendas
+
+
+class VendaDiaria(SQLModel, table=True):
+    """Resumo de vendas por dia, seção, categoria e status do pedido.
+
+    Mantido incrementalmente pelos services de pedido (ver vendas_services). `pedidos` conta
+    os pedidos com pelo menos um produto da seção/categoria, `itens` os produtos e `receita`
+    a soma dos preços.
+    """
+
+    __tablename__ = 'venda_diaria'
+
+    dia: date = Field(primary_key=True)
+    secao: str = Field(primary_key=True)
+    categoria: str = Field(primary_key=True)
+    status: PedidoStatus = Field(primary_key=True)
+    pedidos: int = 0
+    itens: int = 0
+    receita: float = 0.0
+
+
+# ------------------------------------------------------------------------------------------------
+# Jobs
+
+
+class Job(SQLModel, table=True):
+    """Trabalho em segundo plano, executado pelos workers de job_services.
+
+    Um job `executando` cujo `locked_until` passou (o worker caiu ou travou) volta a ser
+    elegível. `claim_token` identifica quem o pegou por último, só esse worker o conclui.
+    """
+
+    __tablename__ = 'job'
+    __table_args__ = (
+        # busca dos jobs elegíveis pelos workers
+        Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    status: JobStatus = Field(default=JobStatus.pendente)
+    attempts: int = 0
+    max_attempts: int
+    run_after: datetime
+    locked_until: datetime | None = None
+    claim_token: str | None = None
+    last_error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+# ------------------------------------------------------------------------------------------------
+# Idempotency-Key
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Resposta guardada de um POST com Idempotency-Key (ver idempotency_services).
+
+    A linha é criada antes do POST rodar, sem `status_code`, e marca a chave como em
+    andamento; repetições com a mesma chave esperam a resposta e a recebem de novo até
+    `expires_at`. `claim_token` identifica a requisição dona da reserva.
+    """
+
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        UniqueConstraint('usuario_id', 'endpoint', 'key'),
+        # remoção periódica das chaves expiradas
+        Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    usuario_id: int
+    endpoint: str
+    key: str
+    request_hash: str
+    status_code: int | None = None
+    body: bytes | None = Field(default=None, sa_column=Column(LargeBinary))
+    claim_token: str | None = None
+    created_at: datetime
+    expires_at: datetime
+
+
+# ------------------------------------------------------------------------------------------------
+# Versões de cache
+
+
+class CacheVersion(SQLModel, table=True):
+    """Versão dos dados de um cache em memória, compartilhada por todos os processos.
+
+    Quem altera os dados incrementa `versao` na mesma transação e quem lê do cache inclui a
+    versão atual na chave, assim um processo não serve respostas anteriores à alteração feita
+    por outro.
+    """
+
+    __tablename__ = 'cache_version'
+
+    nome: str = Field(primary_key=True)
+    versao: int = 0
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection, QueuePool
+
+
+class PoolMetrics:
+    """Contadores de checkout de conexões de um pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait: float, *, timeout: bool = False) -> None:
+        """Soma um checkout (ou um timeout) e o tempo que ele esperou."""
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def as_dict(self) -> dict:
+        """Contadores atuais, com a espera média por checkout."""
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': (
+                    self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+                ),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Mede quanto tempo cada checkout de conexão esperou pelo pool."""
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        """Faz o checkout de uma conexão do pool medindo a espera."""
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timeout=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool: Pool) -> dict:
+    """Retorna o estado atual do pool: conexões em uso, ociosas, overflow e esperas.
+
+    Args:
+    ----
+        pool (Pool): pool da engine (engine.pool).
+
+    Returns:
+    -------
+        dict: estado do pool e contadores de checkout quando o pool é instrumentado.
+
+    """
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,  # noqa: SLF001
+                'timeout_seconds': pool.timeout(),
+            },
+        )
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status.update(metrics.as_dict())
+    return status
@@ -1,7 +1,8 @@
 from datetime import date, datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
+from app.config import settings
 from app.database.enums import PedidoStatus, Role
 from app.database.models import Cliente, Produto, Usuario
 
@@ -48,6 +49,10 @@ class UsuarioPublic(UsuarioBase):
     model_config = ConfigDict(from_attributes = True)
 
 
+class UsuarioRoleUpdate(BaseModel):
+    role: Role
+
+
 # ------------------------------------------------------------------------------------------------
 # Cliente
 
@@ -76,6 +81,11 @@ class ClientePublic(ClienteBase):
     usuario: 'Usuario'
 
 
+class ClienteBatch(BaseModel):
+    items: list[ClientePublic]
+    missing: list[int]
+
+
 # ------------------------------------------------------------------------------------------------
 # Produto
 
@@ -98,6 +108,23 @@ class ProdutoUpdate(ProdutoBase):
 class ProdutoPublic(ProdutoBase):
     id: int
 
+
+class ProdutoBatch(BaseModel):
+    items: list[ProdutoPublic]
+    missing: list[int]
+
+
+class ImportErro(BaseModel):
+    linha: int
+    erro: str
+
+
+class ProdutoImportResult(BaseModel):
+    inseridos: int
+    rejeitados: int
+    erros: list[ImportErro]
+
+
 # ------------------------------------------------------------------------------------------------
 # Pedido
 
@@ -117,3 +144,32 @@ class PedidoPublic(PedidoBase):
     id: int
     cliente: 'Cliente'
     produtos: list['Produto']
+
+
+class PedidoBatch(BaseModel):
+    items: list[PedidoPublic]
+    missing: list[int]
+
+
+# ------------------------------------------------------------------------------------------------
+# Busca em lote
+
+
+class BatchGetRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=settings.BATCH_GET_MAX_IDS)
+
+
+# ------------------------------------------------------------------------------------------------
+# Vendas
+
+
+class VendaDiariaPublic(BaseModel):
+    dia: date
+    secao: str
+    categoria: str
+    status: PedidoStatus
+    pedidos: int
+    itens: int
+    receita: float
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,280 @@
+"""Busca textual indexada de clientes e produtos.
+
+Cada banco usa o índice que tem: no SQLite uma tabela virtual FTS5 com o tokenizer trigram,
+mantida por triggers, e no Postgres um índice GIN com pg_trgm sobre a mesma expressão usada
+na consulta. Nos dois casos o termo é comparado por trigramas, o que cobre prefixos ("mar"
+encontra "maria") e erros de digitação ("maira" encontra "maria"), e os resultados são
+ordenados por relevância. Nenhum dos backends cai num LIKE '%termo%' sem índice.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Connection,
+    TableClause,
+    case,
+    column,
+    delete,
+    event,
+    false,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    table,
+)
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.database.models import Cliente, Produto, Usuario
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Texto pesquisável de um model.
+
+    As colunas `columns` ficam na tabela de `source`, ligada ao model pela coluna `link`
+    (None quando as colunas são do próprio model).
+    """
+
+    name: str
+    model: type[SQLModel]
+    source: type[SQLModel]
+    columns: tuple[str, ...]
+    link: str | None = None
+
+    @property
+    def owner(self) -> str:
+        """Tabela do model."""
+        return self.model.__tablename__
+
+    @property
+    def source_table(self) -> str:
+        """Tabela de onde vêm as colunas pesquisadas."""
+        return self.source.__tablename__
+
+
+PRODUTO_BUSCA = SearchIndex('produto_busca', Produto, Produto, ('categoria', 'secao'))
+CLIENTE_BUSCA = SearchIndex('cliente_busca', Cliente, Usuario, ('nome', 'email'), 'usuario_id')
+SEARCH_INDEXES = (PRODUTO_BUSCA, CLIENTE_BUSCA)
+
+# fração mínima dos trigramas do termo que o texto deve conter no SQLite, próxima do
+# pg_trgm.word_similarity_threshold (0.6) usado pelo operador <% no Postgres
+SIMILARIDADE_MINIMA = 0.5
+
+
+class SearchBackend(ABC):
+    """Operações de busca que cada banco implementa com o seu tipo de índice."""
+
+    @abstractmethod
+    def create(self, connection: Connection, index: SearchIndex) -> None:
+        """Cria as estruturas do índice (idempotente)."""
+
+    @abstractmethod
+    def rebuild(self, connection: Connection, index: SearchIndex) -> None:
+        """Preenche o índice com as linhas que já existem."""
+
+    @abstractmethod
+    def search(
+        self,
+        stmt: SelectOfScalar,
+        index: SearchIndex,
+        termo: str,
+    ) -> SelectOfScalar:
+        """Filtra `stmt` pelo termo e ordena do mais para o menos relevante."""
+
+
+def _normaliza(termo: str) -> str:
+    return ' '.join(termo.lower().split())
+
+
+# DDL do SQLite, completado com os nomes do SearchIndex (ver Fts5Search._context)
+FTS5_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS %(name)s USING fts5(%(colunas)s, tokenize='trigram')"
+)
+FTS5_DELETE_TRIGGER = (
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_ad AFTER DELETE ON %(owner)s '
+    'BEGIN DELETE FROM %(name)s WHERE rowid = old.id; END'
+)
+# colunas no próprio model
+FTS5_OWN_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_ai AFTER INSERT ON %(owner)s '
+    'BEGIN INSERT INTO %(name)s(rowid, %(colunas)s) VALUES (new.id, %(novos)s); END',
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_au AFTER UPDATE OF %(colunas)s ON %(owner)s '
+    'BEGIN UPDATE %(name)s SET %(atribuicoes)s WHERE rowid = new.id; END',
+)
+# colunas em outra tabela (source), ligada ao model por link
+FTS5_LINKED_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_ai AFTER INSERT ON %(owner)s '
+    'BEGIN INSERT INTO %(name)s(rowid, %(colunas)s) '
+    'SELECT new.id, %(colunas)s FROM %(source)s WHERE id = new.%(link)s; END',
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_au AFTER UPDATE OF %(link)s ON %(owner)s '
+    'BEGIN UPDATE %(name)s SET (%(colunas)s) = '
+    '(SELECT %(colunas)s FROM %(source)s WHERE id = new.%(link)s) WHERE rowid = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS %(name)s_source_au AFTER UPDATE OF %(colunas)s ON %(source)s '
+    'BEGIN UPDATE %(name)s SET %(atribuicoes)s '
+    'WHERE rowid IN (SELECT id FROM %(owner)s WHERE %(link)s = new.id); END',
+)
+
+
+class Fts5Search(SearchBackend):
+    """SQLite: tabela virtual FTS5 (tokenizer trigram) com rowid igual ao id do model."""
+
+    @staticmethod
+    def _context(index: SearchIndex) -> dict[str, str]:
+        return {
+            'name': index.name,
+            'owner': index.owner,
+            'source': index.source_table,
+            'link': index.link or '',
+            'colunas': ', '.join(index.columns),
+            'novos': ', '.join(f'new.{coluna}' for coluna in index.columns),
+            'atribuicoes': ', '.join(f'{coluna} = new.{coluna}' for coluna in index.columns),
+        }
+
+    @staticmethod
+    def _table(index: SearchIndex) -> TableClause:
+        return table(index.name, column('rowid'), *[column(coluna) for coluna in index.columns])
+
+    def create(self, connection: Connection, index: SearchIndex) -> None:
+        """Cria a tabela FTS5 e os triggers que a mantêm em dia com o model."""
+        triggers = FTS5_OWN_TRIGGERS if index.link is None else FTS5_LINKED_TRIGGERS
+        context = self._context(index)
+        for statement in (FTS5_TABLE, FTS5_DELETE_TRIGGER, *triggers):
+            connection.execute(DDL(statement, context=context))
+
+    def rebuild(self, connection: Connection, index: SearchIndex) -> None:
+        """Recria o conteúdo da tabela FTS5 a partir do model."""
+        colunas = [getattr(index.source, coluna) for coluna in index.columns]
+        origem = select(index.model.id, *colunas)
+        if index.link is not None:
+            origem = origem.join(index.source, getattr(index.model, index.link) == index.source.id)
+        fts = self._table(index)
+        connection.execute(delete(fts))
+        connection.execute(insert(fts).from_select(['rowid', *index.columns], origem))
+
+    def search(
+        self,
+        stmt: SelectOfScalar,
+        index: SearchIndex,
+        termo: str,
+    ) -> SelectOfScalar:
+        """Filtra pela fração de trigramas do termo presentes no texto, como o pg_trgm.
+
+        O MATCH com qualquer trigrama seleciona os candidatos pelo índice. Cada trigrama
+        também vira um `rowid IN (... MATCH ...)`, resolvido uma vez pelo índice, e a soma
+        deles dá quantos trigramas do termo o texto tem. Ficam os resultados com pelo menos
+        SIMILARIDADE_MINIMA dos trigramas, ordenados pela fração e depois pelo bm25.
+        """
+        termo = _normaliza(termo)
+        # cada trigrama entre aspas, sem operadores do FTS5 vindos do usuário
+        trigramas = [
+            '"{}"'.format(trigrama.replace('"', '""'))
+            for trigrama in dict.fromkeys(termo[i : i + 3] for i in range(len(termo) - 2))
+        ]
+        fts = table(index.name, column('rowid'), column('rank'))
+        if not trigramas:
+            return stmt.where(false())
+
+        def match(query: str) -> ColumnElement:
+            return literal_column(index.name).op('MATCH')(query)
+
+        def contem(trigrama: str) -> ColumnElement:
+            subquery = select(fts.c.rowid).where(match(trigrama)).correlate(None)
+            return case((fts.c.rowid.in_(subquery), 1), else_=0)
+
+        encontrados = sum((contem(trigrama) for trigrama in trigramas[1:]), contem(trigramas[0]))
+        candidatos = (
+            select(fts.c.rowid, encontrados.label('encontrados'), fts.c.rank)
+            .where(match(' OR '.join(trigramas)))
+            .subquery()
+        )
+        return (
+            stmt.join(candidatos, candidatos.c.rowid == index.model.id)
+            .where(candidatos.c.encontrados >= math.ceil(len(trigramas) * SIMILARIDADE_MINIMA))
+            .order_by(candidatos.c.encontrados.desc(), candidatos.c.rank, index.model.id)
+        )
+
+
+class TrigramSearch(SearchBackend):
+    """Postgres: índice GIN pg_trgm sobre lower(coluna || ' ' || coluna ...)."""
+
+    @staticmethod
+    def expression(index: SearchIndex) -> ColumnElement:
+        """Texto pesquisado, a mesma expressão do índice GIN."""
+        texto = getattr(index.source, index.columns[0])
+        for coluna in index.columns[1:]:
+            texto = texto.concat(literal_column("' '")).concat(getattr(index.source, coluna))
+        return func.lower(texto)
+
+    def create(self, connection: Connection, index: SearchIndex) -> None:
+        """Cria a extensão pg_trgm e o índice GIN da expressão pesquisada."""
+        texto = " || ' ' || ".join(index.columns)
+        connection.execute(DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        connection.execute(
+            DDL(
+                'CREATE INDEX IF NOT EXISTS ix_%(name)s_trgm ON %(source)s '
+                'USING gin ((lower(%(texto)s)) gin_trgm_ops)',
+                context={'name': index.name, 'source': index.source_table, 'texto': texto},
+            ),
+        )
+
+    def rebuild(self, connection: Connection, index: SearchIndex) -> None:
+        """O índice GIN é mantido pelo próprio Postgres, não há o que preencher."""
+
+    def search(
+        self,
+        stmt: SelectOfScalar,
+        index: SearchIndex,
+        termo: str,
+    ) -> SelectOfScalar:
+        """Filtra com o operador <% (word_similarity) e ordena pela similaridade."""
+        termo = _normaliza(termo)
+        texto = self.expression(index)
+        if index.link is not None:
+            stmt = stmt.join(index.source, getattr(index.model, index.link) == index.source.id)
+        return stmt.where(literal(termo).op('<%')(texto)).order_by(
+            func.word_similarity(termo, texto).desc(),
+            index.model.id,
+        )
+
+
+BACKENDS: dict[str, SearchBackend] = {
+    'sqlite': Fts5Search(),
+    'postgresql': TrigramSearch(),
+}
+
+
+def get_backend(dialect: str) -> SearchBackend:
+    """Backend de busca do banco, NotImplementedError para bancos sem índice de busca."""
+    try:
+        return BACKENDS[dialect]
+    except KeyError:
+        msg = f'busca textual não suportada no banco {dialect}'
+        raise NotImplementedError(msg) from None
+
+
+def create_search_indexes(connection: Connection) -> None:
+    """Cria os índices de busca de todos os models pesquisáveis."""
+    backend = get_backend(connection.dialect.name)
+    for index in SEARCH_INDEXES:
+        backend.create(connection, index)
+
+
+def rebuild_search_indexes(connection: Connection) -> None:
+    """Preenche os índices de busca com os clientes e produtos já cadastrados."""
+    backend = get_backend(connection.dialect.name)
+    for index in SEARCH_INDEXES:
+        backend.rebuild(connection, index)
+
+
+@event.listens_for(SQLModel.metadata, 'after_create')
+def _create_search_indexes(_metadata: object, connection: Connection, **_kw: object) -> None:
+    # bancos criados com create_all (testes, desenvolvimento) já nascem com a busca
+    if connection.dialect.name in BACKENDS:
+        create_search_indexes(connection)
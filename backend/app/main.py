@@ -1,33 +1,105 @@
+import math
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
-from sqlmodel import SQLModel
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import Connection
 
-from app.database.database import engine
+from app.config import settings
+from app.database.database import async_engine, engine
+from app.database.migrations import HEAD, current_version, upgrade
+from app.routes.admin_router import admin_router
+from app.routes.analytics_router import analytics_router
 from app.routes.auth_router import auth_router
 from app.routes.cliente_router import cliente_router
+from app.routes.metrics_router import metrics_router
 from app.routes.pedido_router import pedido_router
 from app.routes.produto_router import produto_router
 from app.routes.usuario_router import usuario_router
+from app.services.idempotency_services import key_evictor
+from app.services.job_services import job_pool
+from app.utils.auth_utils import HashingQueueFullError, hashing_executor
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import MetricsMiddleware, QueryStatsMiddleware
+from app.utils.rate_limit import ThrottledError
+
+
+def check_migrations(connection: Connection) -> None:
+    """Aplica as migrações pendentes ou falha se o banco estiver desatualizado."""
+    if settings.MIGRATE_ON_STARTUP:
+        upgrade(connection)
+        return
+    version = current_version(connection)
+    if version < HEAD:
+        msg = f'banco na versão {version}, esperada {HEAD}: rode python -m app.database.migrations'
+        raise RuntimeError(msg)
 
 
 async def init_db() -> None:
-    SQLModel.metadata.create_all(engine)
+    if async_engine is not None:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(check_migrations)
+        return
+    with engine.begin() as conn:
+        check_migrations(conn)
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncGenerator:
     """Inicaliza o banco."""
     await init_db()
+    if settings.JOBS_ENABLED:
+        job_pool.start()
+    key_evictor.start()
     yield
+    await key_evictor.stop()
+    await job_pool.stop()
+    hashing_executor.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.exception_handler(HashingQueueFullError)
+async def hashing_queue_full_handler(
+    _request: Request,
+    _exc: HashingQueueFullError,
+) -> JSONResponse:
+    """Responde 503 quando o executor de hashing não aceita mais tarefas."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={'detail': 'Servidor ocupado, tente novamente em instantes'},
+        headers={'Retry-After': '1'},
+    )
+
+
+@app.exception_handler(ThrottledError)
+async def throttled_handler(_request: Request, exc: ThrottledError) -> JSONResponse:
+    """Responde 429 quando o limite de tentativas de login foi atingido."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={'detail': 'Muitas tentativas de login, tente novamente mais tarde'},
+        headers={'Retry-After': str(math.ceil(exc.retry_after))},
+    )
+
+
 # rotas
 app.include_router(auth_router, prefix='/auth')
 app.include_router(usuario_router, prefix='/usuarios')
 app.include_router(cliente_router, prefix='/clients')
 app.include_router(produto_router, prefix='/products')
 app.include_router(pedido_router, prefix='/orders')
+app.include_router(admin_router, prefix='/admin')
+app.include_router(analytics_router, prefix='/analytics')
+
+# compressão (middleware mais interno, as métricas incluem o tempo de compressão)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# métricas
+if settings.SQL_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
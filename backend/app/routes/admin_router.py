@@ -0,0 +1,136 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from app.database.database import ReadSessionDep, async_engine, engine, read_replicas
+from app.database.models import Usuario
+from app.database.pool import pool_status
+from app.services.auth_services import get_current_usuario_ativo, valida_admin
+from app.services.job_services import count_jobs, job_pool
+from app.utils.auth_utils import hashing_executor
+from app.utils.cache import catalog_cache, principal_cache
+from app.utils.rate_limit import login_throttle
+
+admin_router = APIRouter(tags=['Admin'])
+
+
+@admin_router.get('/metrics/hashing')
+def hashing_metrics(
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna as métricas do executor de hashing de senhas.
+
+    Args:
+    ----
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: profundidade da fila, tarefas em andamento, rejeições e tempos de espera.
+
+    """
+    valida_admin(current_usuario)
+    return hashing_executor.metrics()
+
+
+@admin_router.get('/metrics/principal-cache')
+def principal_cache_metrics(
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna as métricas do cache de usuários autenticados.
+
+    Args:
+    ----
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: tamanho do cache, hits, misses e evictions.
+
+    """
+    valida_admin(current_usuario)
+    return principal_cache.metrics()
+
+
+@admin_router.get('/metrics/catalog-cache')
+def catalog_cache_metrics(
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna as métricas do cache de respostas do catálogo de produtos.
+
+    Args:
+    ----
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: tamanho do cache, hits, misses e evictions.
+
+    """
+    valida_admin(current_usuario)
+    return catalog_cache.metrics()
+
+
+@admin_router.get('/metrics/login-throttle')
+def login_throttle_metrics(
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna os contadores do limite de tentativas de login.
+
+    Args:
+    ----
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: tentativas aceitas e rejeitadas por IP e por email.
+
+    """
+    valida_admin(current_usuario)
+    return login_throttle.metrics()
+
+
+@admin_router.get('/metrics/jobs')
+def jobs_metrics(
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna o estado da fila de jobs e a vazão dos workers deste processo.
+
+    Args:
+    ----
+        db (ReadSessionDep): Session de leitura do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: jobs por status na fila e jobs pegos, concluídos e repetidos pelos workers.
+
+    """
+    valida_admin(current_usuario)
+    return {'queue': count_jobs(db), **job_pool.metrics()}
+
+
+@admin_router.get('/metrics/pool')
+def pool_metrics(
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Retorna o estado do pool de conexões do banco.
+
+    Args:
+    ----
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        dict: conexões em uso, ociosas e em overflow, além dos tempos de espera no checkout,
+        da primária e de cada réplica de leitura.
+
+    """
+    valida_admin(current_usuario)
+    metrics = {'sync': pool_status(engine.pool)}
+    if async_engine is not None:
+        metrics['async'] = pool_status(async_engine.pool)
+    if read_replicas.replicas:
+        metrics['replicas'] = [pool_status(replica.pool) for replica in read_replicas.replicas]
+    return metrics
@@ -0,0 +1,51 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.database.database import ReadSessionDep
+from app.database.enums import PedidoStatus
+from app.database.models import Usuario
+from app.database.schemas import VendaDiariaPublic
+from app.services.auth_services import get_current_usuario_ativo, valida_admin
+from app.services.vendas_services import get_vendas
+
+analytics_router = APIRouter(tags=['Analytics'])
+
+
+@analytics_router.get('/sales')
+def vendas_list(  # noqa: PLR0913
+    *,
+    data_inicio: Annotated[date | None, Query(description='Primeiro dia do período')] = None,
+    data_fim: Annotated[date | None, Query(description='Último dia do período')] = None,
+    secao: Annotated[str | None, Query(description='Filtro por seção de produtos')] = None,
+    categoria: Annotated[str | None, Query(description='Filtro por categoria de produtos')] = None,
+    pedido_status: Annotated[
+        PedidoStatus | None,
+        Query(description='Filtro por status do pedido'),
+    ] = None,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> list[VendaDiariaPublic]:
+    """Lista as vendas por dia, seção, categoria e status do pedido.
+
+    Os valores vêm do resumo mantido a cada pedido criado, atualizado ou deletado, sem
+    percorrer pedidos e produtos.
+
+    Args:
+    ----
+        data_inicio (date): primeiro dia do período.
+        data_fim (date): último dia do período.
+        secao (str): seção dos produtos.
+        categoria (str): categoria dos produtos.
+        pedido_status (PedidoStatus): status do pedido (pendente, confirmado, cancelado etc.)
+        db (ReadSessionDep): Session de leitura do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        list[VendaDiariaPublic]: pedidos, itens e receita de cada dia, seção, categoria e status.
+
+    """
+    valida_admin(current_usuario)
+    return get_vendas(db, data_inicio, data_fim, secao, categoria, pedido_status)
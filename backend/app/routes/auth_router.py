@@ -1,10 +1,11 @@
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.database.database import SessionDep
+from app.config import settings
+from app.database.database import AnySessionDep
 from app.database.schemas import (
     Token,
     TokenRefreshRequest,
@@ -16,9 +17,10 @@ from app.services.auth_services import (
     autenticar_usuario,
     create_access_token,
     create_refresh_token,
+    registrar_usuario,
     verify_token,
 )
-from app.services.usuario_services import post_usuario
+from app.utils.rate_limit import login_throttle
 
 auth_router = APIRouter(
     tags=['Auth'],
@@ -28,21 +30,29 @@ auth_router = APIRouter(
 @auth_router.post('/login')
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: SessionDep,
+    request: Request,
+    db: AnySessionDep,
 ) -> Token:
     """Retorna o token de autenticação.
 
+    As tentativas são limitadas por IP e por email antes de qualquer consulta ou bcrypt, o
+    excesso recebe 429 com Retry-After.
+
     Args:
     ----
         form_data (OAuth2PasswordRequestForm): formulário de login com email e senha
-        db (SessionDep): Session do banco de dados.
+        request (Request): requisição, de onde vem o IP do cliente.
+        db (AnySessionDep): Session (síncrona ou assíncrona) do banco de dados.
 
     Returns:
     -------
         Token: token de autenticação
 
     """
-    usuario = autenticar_usuario(form_data.username, form_data.password, db)
+    if settings.LOGIN_THROTTLE_ENABLED:
+        ip = request.client.host if request.client else None
+        login_throttle.check(ip=ip, email=form_data.username)
+    usuario = await autenticar_usuario(form_data.username, form_data.password, db)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,20 +69,20 @@ async def login_for_access_token(
 
 
 @auth_router.post('/register')
-def usuario_post(usuario: UsuarioCreate, db: SessionDep) -> UsuarioPublic:
+async def usuario_post(usuario: UsuarioCreate, db: AnySessionDep) -> UsuarioPublic:
     """Registra um usuário no sistema.
 
     Args:
     ----
         usuario (UsuarioCreate): schema com as informações do usuário
-        db (SessionDep): Session do banco de dados
+        db (AnySessionDep): Session (síncrona ou assíncrona) do banco de dados
 
     Returns:
     -------
         UsuarioPublic: informações do usuário registrado
 
     """
-    return post_usuario(db, usuario)
+    return await registrar_usuario(db, usuario)
 
 
 @auth_router.post('/refresh-token')
@@ -1,18 +1,35 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-
-from app.database.database import SessionDep
-from app.database.models import Usuario
-from app.database.schemas import ClienteCreate, ClientePublic, ClienteUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.config import settings
+from app.database.database import ReadSessionDep, SessionDep
+from app.database.models import Cliente, Usuario
+from app.database.schemas import (
+    BatchGetRequest,
+    ClienteBatch,
+    ClienteCreate,
+    ClientePublic,
+    ClienteUpdate,
+)
 from app.services.auth_services import get_current_usuario_ativo, valida_admin
 from app.services.cliente_services import (
+    cliente_cursor,
+    count_clientes,
     get_cliente,
     get_clientes,
+    get_clientes_by_ids,
     post_cliente,
+    search_clientes,
     update_cliente,
 )
+from app.services.idempotency_services import IdempotencyKeyHeader, idempotent_response
 from app.services.usuario_services import get_usuario_by_email, post_usuario
+from app.utils.batch import batch_result
+from app.utils.fields import FieldsQuery, parse_fields, sparse_response
+from app.utils.pagination import set_next_cursor
+from app.utils.serialization import json_response
+from app.utils.total_count import CountQuery, set_total_count
 
 cliente_router = APIRouter(tags=['Clientes'])
 
@@ -20,22 +37,30 @@ cliente_router = APIRouter(tags=['Clientes'])
 @cliente_router.get('/')
 def cliente_list(
     *,
-    skip: int = 0,
-    limit: int | None = None,
+    skip: Annotated[int, Query(ge=0, deprecated=True)] = 0,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+    cursor: Annotated[str | None, Query(description='Cursor da próxima página')] = None,
     nome: Annotated[str | None, Query(description='Filtro por nome')] = None,
     email: Annotated[str | None, Query(description='Filtro por email')] = None,
-    db: SessionDep,
+    fields: FieldsQuery = None,
+    count: CountQuery = None,
+    response: Response,
+    db: ReadSessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ) -> list[ClientePublic]:
     """Lista os clientes registrados no sistema.
 
     Args:
     ----
-        skip (int): número de itens da lista a serem pulados.
+        skip (int): número de itens da lista a serem pulados (prefira o cursor).
         limit (int): número limite de itens da lista a serem retornados.
+        cursor (str): cursor opaco retornado no header X-Next-Cursor da página anterior.
         nome: (str): nome do cliente.
         email: (str): email do cliente.
-        db (SessionDep): Session do banco de dados.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
+        count (str): inclui o total dos filtros em X-Total-Count (exact, cached ou estimated).
+        response (Response): resposta da rota, recebe os headers X-Next-Cursor e X-Total-Count.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
 
     Returns:
@@ -44,7 +69,70 @@ def cliente_list(
 
 
     """
-    return get_clientes(db, skip, limit, nome, email)
+    campos = parse_fields(ClientePublic, fields)
+    items = get_clientes(db, skip, limit, nome, email, cursor, campos)
+    set_next_cursor(response, items, limit, cliente_cursor)
+    if count:
+        set_total_count(response, *count_clientes(db, count, nome, email))
+    return sparse_response(ClientePublic, campos, items, response, many=True)
+
+
+@cliente_router.get('/search')
+def cliente_search(  # noqa: PLR0913
+    *,
+    q: Annotated[
+        str,
+        Query(min_length=3, max_length=100, description='Nome ou email, inteiro ou em parte'),
+    ],
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+    response: Response,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],  # noqa: ARG001
+) -> list[ClientePublic]:
+    """Busca clientes pelo nome ou email, tolerando prefixos e erros de digitação.
+
+    Args:
+    ----
+        q (str): termo buscado, com pelo menos 3 caracteres.
+        skip (int): número de resultados a serem pulados.
+        limit (int): número limite de resultados a serem retornados.
+        response (Response): resposta da rota.
+        db (ReadSessionDep): Session de leitura do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        list[ClientePublic]: clientes encontrados, do mais para o menos relevante.
+
+    """
+    items = search_clientes(db, q, skip, limit)
+    return json_response(list[ClientePublic], items, response)
+
+
+@cliente_router.post('/batch-get')
+def cliente_batch_get(
+    batch: BatchGetRequest,
+    response: Response,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],  # noqa: ARG001
+) -> ClienteBatch:
+    """Busca os clientes dos ids informados numa única consulta.
+
+    Args:
+    ----
+        batch (BatchGetRequest): ids dos clientes, até BATCH_GET_MAX_IDS por requisição.
+        response (Response): resposta da rota.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        ClienteBatch: clientes encontrados, na ordem dos ids, e os ids não encontrados.
+
+    """
+    clientes = get_clientes_by_ids(db, batch.ids)
+    return json_response(ClienteBatch, batch_result(batch.ids, clientes), response)
 
 
 @cliente_router.post('/')
@@ -52,14 +140,19 @@ def cliente_post(
     cliente_data: ClienteCreate,
     db: SessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> ClientePublic:
     """Registra um cliente no sistema e associa um usuário ao cliente.
 
+    Com o header Idempotency-Key, repetições da requisição recebem a resposta da primeira
+    sem calcular o hash da senha e registrar o cliente de novo.
+
     Args:
     ----
         cliente_data (ClienteCreate): schema com informações do cliente.
         db (SessionDep): Session do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
+        idempotency_key (str): chave que identifica as repetições da requisição.
 
     Returns:
     -------
@@ -67,45 +160,62 @@ def cliente_post(
 
     """
     valida_admin(current_usuario)
-    usuario_existente = get_usuario_by_email(db, cliente_data.email)
-    if usuario_existente:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail='email já utilizado',
-        )
 
-    usuario = post_usuario(db, cliente_data)
+    def registrar() -> Cliente:
+        usuario_existente = get_usuario_by_email(db, cliente_data.email)
+        if usuario_existente:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='email já utilizado',
+            )
+
+        usuario = post_usuario(db, cliente_data)
 
-    return post_cliente(db, usuario.id, cliente_data)
+        return post_cliente(db, usuario.id, cliente_data)
+
+    return idempotent_response(
+        db,
+        idempotency_key,
+        current_usuario.id,
+        'POST /clients',
+        cliente_data,
+        ClientePublic,
+        registrar,
+    )
 
 
 @cliente_router.get('/{id}')
 def cliente_get(
     id: int,
-    db: SessionDep,
+    response: Response,
+    db: ReadSessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    fields: FieldsQuery = None,
 ) -> ClientePublic:
     """Pega informações de um cliente dado seu id.
 
     Args:
     ----
         id (int): id do cliente.
-        db (SessionDep): Session do banco de dados.
+        response (Response): resposta da rota.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
 
     Returns:
     -------
         ClientePublic: informações do cliente.
 
     """
-    cliente = get_cliente(db, id)
+    campos = parse_fields(ClientePublic, fields)
+    cliente = get_cliente(db, id, campos)
     if not cliente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='cliente não encontrado',
         )
 
-    return cliente
+    return sparse_response(ClientePublic, campos, cliente, response, many=False)
 
 
 @cliente_router.put('/{id}')
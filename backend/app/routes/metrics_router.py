@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database.database import ReadReplicas, async_engine, read_replicas
+from app.database.pool import pool_status
+from app.services.job_services import job_pool
+from app.utils.auth_utils import hashing_executor
+from app.utils.cache import catalog_cache, count_cache, principal_cache
+from app.utils.metrics import registry
+from app.utils.rate_limit import login_throttle
+
+metrics_router = APIRouter(tags=['Metrics'])
+
+
+def db_pools(replicas: ReadReplicas) -> dict[tuple[str], dict]:
+    """Estado do pool de conexões síncrono da primária e de cada réplica de leitura."""
+    pools = {('primary',): pool_status(replicas.primary.pool)}
+    for numero, replica in enumerate(replicas.replicas, start=1):
+        pools[(f'replica{numero}',)] = pool_status(replica.pool)
+    return pools
+
+
+registry.register_collector(
+    'hashing_executor',
+    'Estado do executor de hashing de senhas.',
+    hashing_executor.metrics,
+)
+registry.register_collector(
+    'principal_cache',
+    'Estado do cache de usuários autenticados.',
+    principal_cache.metrics,
+)
+registry.register_collector(
+    'catalog_cache',
+    'Estado do cache de respostas do catálogo.',
+    catalog_cache.metrics,
+)
+registry.register_collector(
+    'count_cache',
+    'Estado do cache de totais das listagens.',
+    count_cache.metrics,
+)
+registry.register_collector(
+    'login_throttle',
+    'Tentativas de login aceitas e rejeitadas.',
+    login_throttle.metrics,
+)
+registry.register_collector(
+    'jobs',
+    'Jobs em segundo plano processados pelos workers.',
+    job_pool.metrics,
+)
+registry.register_collector(
+    'db_pool',
+    'Estado do pool de conexões síncrono por engine.',
+    lambda: db_pools(read_replicas),
+    labelnames=('engine',),
+)
+if async_engine is not None:
+    registry.register_collector(
+        'db_async_pool',
+        'Estado do pool de conexões assíncrono.',
+        lambda: pool_status(async_engine.pool),
+    )
+
+
+@metrics_router.get('/metrics', include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Expõe as métricas da API no formato texto do Prometheus."""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
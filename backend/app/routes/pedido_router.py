@@ -1,16 +1,42 @@
+from collections.abc import Iterator
 from datetime import date
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.database.database import SessionDep
+from app.config import settings
+from app.database.database import ReadSessionDep, SessionDep
 from app.database.enums import PedidoStatus
-from app.database.models import Usuario
-from app.database.schemas import PedidoCreate, PedidoPublic, PedidoUpdate
+from app.database.models import Pedido, Usuario
+from app.database.schemas import (
+    BatchGetRequest,
+    PedidoBatch,
+    PedidoCreate,
+    PedidoPublic,
+    PedidoUpdate,
+)
 from app.services.auth_services import get_current_usuario_ativo, valida_admin
 from app.services.cliente_services import get_cliente
-from app.services.pedido_services import get_pedido, get_pedidos, post_pedido, update_pedido
-from app.services.produto_services import get_produto
+from app.services.idempotency_services import IdempotencyKeyHeader, idempotent_response
+from app.services.pedido_services import (
+    count_pedidos,
+    delete_pedido,
+    exportar_pedidos,
+    get_pedido,
+    get_pedidos,
+    get_pedidos_by_ids,
+    iter_pedidos,
+    pedido_cursor,
+    post_pedido,
+    update_pedido,
+)
+from app.services.produto_services import get_produtos_by_ids
+from app.utils.batch import batch_result
+from app.utils.fields import FieldsQuery, parse_fields, sparse_response
+from app.utils.pagination import set_next_cursor
+from app.utils.serialization import json_response
+from app.utils.total_count import CountQuery, set_total_count
 
 pedido_router = APIRouter(tags=['Pedidos'])
 
@@ -18,8 +44,9 @@ pedido_router = APIRouter(tags=['Pedidos'])
 @pedido_router.get('/')
 def pedido_list(
     *,
-    skip: int = 0,
-    limit: int | None = None,
+    skip: Annotated[int, Query(ge=0, deprecated=True)] = 0,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+    cursor: Annotated[str | None, Query(description='Cursor da próxima página')] = None,
     data_inicio: Annotated[date | None, Query(description='Filtro por data de inicio')] = None,
     data_fim: Annotated[date | None, Query(description='Filtro por data final')] = None,
     secao_produtos: Annotated[str | None, Query(description='Filtro por seção de produtos')] = None,
@@ -32,22 +59,29 @@ def pedido_list(
         int | None,
         Query(description='Filtro por id de cliente'),
     ] = None,
-    db: SessionDep,
+    fields: FieldsQuery = None,
+    count: CountQuery = None,
+    response: Response,
+    db: ReadSessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ) -> list[PedidoPublic]:
     """Lista os pedidos registrados no sistema.
 
     Args:
     ----
-        skip (int): número de itens da lista a serem pulados.
+        skip (int): número de itens da lista a serem pulados (prefira o cursor).
         limit (int): número limite de itens da lista a serem retornados.
+        cursor (str): cursor opaco retornado no header X-Next-Cursor da página anterior.
         data_inicio (date): data de início par os pedidos.
         data_fim (date): data de fim dos pedidos.
         secao_produtos (str): secao de produtos.
         id_pedido (int): id do pedido.
         pedido_status (PedidoStatus): status do pedido (pendente, confirmado, cancelado etc.)
         id_cliente (int): id do cliente que fez o pedido.
-        db (SessionDep): Session do banco de dados.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
+        count (str): inclui o total dos filtros em X-Total-Count (exact, cached ou estimated).
+        response (Response): resposta da rota, recebe os headers X-Next-Cursor e X-Total-Count.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
 
     Returns:
@@ -55,7 +89,8 @@ def pedido_list(
         list[PedidoPublic]: lista com informações dos pedidos
 
     """
-    return get_pedidos(
+    campos = parse_fields(PedidoPublic, fields)
+    pedidos = get_pedidos(
         db,
         skip,
         limit,
@@ -65,7 +100,116 @@ def pedido_list(
         id_pedido,
         pedido_status,
         id_cliente,
+        cursor,
+        campos,
     )
+    set_next_cursor(response, pedidos, limit, pedido_cursor)
+    if count:
+        total = count_pedidos(
+            db,
+            count,
+            data_inicio,
+            data_fim,
+            secao_produtos,
+            id_pedido,
+            pedido_status,
+            id_cliente,
+        )
+        set_total_count(response, *total)
+    return sparse_response(PedidoPublic, campos, pedidos, response, many=True)
+
+
+@pedido_router.get('/export')
+def pedido_export(  # noqa: PLR0913
+    *,
+    formato: Annotated[Literal['ndjson', 'csv'], Query(description='Formato de saída')] = 'ndjson',
+    data_inicio: Annotated[date | None, Query(description='Filtro por data de inicio')] = None,
+    data_fim: Annotated[date | None, Query(description='Filtro por data final')] = None,
+    secao_produtos: Annotated[str | None, Query(description='Filtro por seção de produtos')] = None,
+    id_pedido: Annotated[int | None, Query(description='Filtro por id de pedido')] = None,
+    pedido_status: Annotated[
+        PedidoStatus | None,
+        Query(description='Filtro por status do pedido'),
+    ] = None,
+    id_cliente: Annotated[
+        int | None,
+        Query(description='Filtro por id de cliente'),
+    ] = None,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> StreamingResponse:
+    """Exporta em streaming todos os pedidos que atendem aos filtros.
+
+    Aceita os mesmos filtros da listagem, sem paginação. Os pedidos são lidos do banco com
+    um cursor do lado do servidor e enviados à medida que são serializados.
+
+    Args:
+    ----
+        formato (str): ndjson (um PedidoPublic por linha) ou csv.
+        data_inicio (date): data de início par os pedidos.
+        data_fim (date): data de fim dos pedidos.
+        secao_produtos (str): secao de produtos.
+        id_pedido (int): id do pedido.
+        pedido_status (PedidoStatus): status do pedido (pendente, confirmado, cancelado etc.)
+        id_cliente (int): id do cliente que fez o pedido.
+        db (ReadSessionDep): Session de leitura do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        StreamingResponse: arquivo NDJSON ou CSV com os pedidos.
+
+    """
+    valida_admin(current_usuario)
+
+    def conteudo() -> Iterator[str]:
+        # a dependência já fechou a sessão quando o streaming começa, ela é reaberta aqui
+        # e fechada ao final para liberar a conexão
+        try:
+            pedidos = iter_pedidos(
+                db,
+                data_inicio,
+                data_fim,
+                secao_produtos,
+                id_pedido,
+                pedido_status,
+                id_cliente,
+            )
+            yield from exportar_pedidos(pedidos, formato)
+        finally:
+            db.close()
+
+    media_type = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    return StreamingResponse(
+        conteudo(),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="pedidos.{formato}"'},
+    )
+
+
+@pedido_router.post('/batch-get')
+def pedido_batch_get(
+    batch: BatchGetRequest,
+    response: Response,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],  # noqa: ARG001
+) -> PedidoBatch:
+    """Busca os pedidos dos ids informados numa única consulta.
+
+    Args:
+    ----
+        batch (BatchGetRequest): ids dos pedidos, até BATCH_GET_MAX_IDS por requisição.
+        response (Response): resposta da rota.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        PedidoBatch: pedidos encontrados, na ordem dos ids, e os ids não encontrados.
+
+    """
+    pedidos = get_pedidos_by_ids(db, batch.ids)
+    return json_response(PedidoBatch, batch_result(batch.ids, pedidos), response)
 
 
 @pedido_router.post('/')
@@ -73,14 +217,19 @@ def pedido_post(
     pedido_data: PedidoCreate,
     db: SessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> PedidoPublic:
     """Registra um pedido no sistema e associa os produtos e cliente ao pedido.
 
+    Com o header Idempotency-Key, repetições da requisição recebem a resposta da primeira
+    sem registrar outro pedido.
+
     Args:
     ----
         pedido_data (PedidoCreate): schema com informações do pedido.
         db (SessionDep): Session do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
+        idempotency_key (str): chave que identifica as repetições da requisição.
 
     Returns:
     -------
@@ -88,51 +237,71 @@ def pedido_post(
 
     """
     valida_admin(current_usuario)
-    #valida cliente
-    cliente = get_cliente(db, pedido_data.cliente_id)
-    if not cliente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f'cliente com o id {pedido_data.cliente_id} não encontrado',
-        )
 
-    #valida produtos
-    for produto_id in pedido_data.produtos_id:
-        produto = get_produto(db, produto_id)
-        if not produto:
+    def registrar() -> Pedido:
+        # valida cliente
+        cliente = get_cliente(db, pedido_data.cliente_id)
+        if not cliente:
             raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f'produto com o id {produto_id} não encontrado',
-        )
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'cliente com o id {pedido_data.cliente_id} não encontrado',
+            )
+
+        # valida produtos
+        produtos = get_produtos_by_ids(db, pedido_data.produtos_id)
+        encontrados = {produto.id for produto in produtos}
+        faltando = sorted(set(pedido_data.produtos_id) - encontrados)
+        if faltando:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'produtos com os ids {faltando} não encontrados',
+            )
 
-    return post_pedido(db, pedido_data)
+        return post_pedido(db, pedido_data)
+
+    return idempotent_response(
+        db,
+        idempotency_key,
+        current_usuario.id,
+        'POST /orders',
+        pedido_data,
+        PedidoPublic,
+        registrar,
+    )
 
 
 @pedido_router.get('/{id}')
 def pedido_get(
-    id: int, db: SessionDep, current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    id: int,
+    response: Response,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    fields: FieldsQuery = None,
 ) -> PedidoPublic:
     """Pega informações de um pedido dado seu id.
 
     Args:
     ----
         id (int): id do pedido.
-        db (SessionDep): Session do banco de dados.
+        response (Response): resposta da rota.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
 
     Returns:
     -------
         PedidoPublic: informações do pedido.
 
     """
-    pedido = get_pedido(db, id)
+    campos = parse_fields(PedidoPublic, fields)
+    pedido = get_pedido(db, id, campos)
     if not pedido:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='pedido não encontrado',
         )
 
-    return pedido
+    return sparse_response(PedidoPublic, campos, pedido, response, many=False)
 
 
 @pedido_router.put('/{id}')
@@ -169,7 +338,9 @@ def pedido_update(
 
 @pedido_router.delete('/{id}')
 def pedido_delete(
-    id: int, db: SessionDep, current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    id: int,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ):
     """Deleta um pedido do sistema dado seu id.
 
@@ -191,7 +362,6 @@ def pedido_delete(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='pedido não encontrado',
         )
-    db.delete(pedido)
-    db.commit()
+    delete_pedido(db, pedido)
 
     return {'detail': 'Pedido deletado com sucesso'}
@@ -1,12 +1,38 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from app.database.database import SessionDep
+from app.config import settings
+from app.database.database import ReadSessionDep, SessionDep
 from app.database.models import Usuario
-from app.database.schemas import ProdutoCreate, ProdutoPublic, ProdutoUpdate
+from app.database.schemas import (
+    BatchGetRequest,
+    ProdutoBatch,
+    ProdutoCreate,
+    ProdutoImportResult,
+    ProdutoPublic,
+    ProdutoUpdate,
+)
 from app.services.auth_services import get_current_usuario_ativo, valida_admin
-from app.services.produto_services import get_produto, get_produtos, post_produto, update_produto
+from app.services.produto_services import (
+    catalog_version,
+    delete_produto,
+    get_produto,
+    get_produtos,
+    get_produtos_by_ids,
+    importar_produtos,
+    post_produto,
+    produto_cursor,
+    search_produtos,
+    update_produto,
+)
+from app.utils.batch import batch_result
+from app.utils.cache import catalog_cache
+from app.utils.fields import FieldsQuery, parse_fields, response_schema
+from app.utils.http_cache import cached_response
+from app.utils.pagination import set_next_cursor
+from app.utils.serialization import json_response, to_json
+from app.utils.streaming import FORMATOS_IMPORTACAO, iter_lines, iter_records
 
 produto_router = APIRouter(tags=['Produtos'])
 
@@ -14,24 +40,36 @@ produto_router = APIRouter(tags=['Produtos'])
 @produto_router.get('/')
 def produto_list(
     *,
-    skip: int = 0,
-    limit: int | None = None,
+    skip: Annotated[int, Query(ge=0, deprecated=True)] = 0,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+    cursor: Annotated[str | None, Query(description='Cursor da próxima página')] = None,
     categoria: Annotated[str | None, Query(description='Filtro por categoria')] = None,
     preco: Annotated[float | None, Query(description='Filtro por preco')] = None,
     disponivel: Annotated[bool | None, Query(description='Filtro por disponibilidade')] = None,
-    db: SessionDep,
+    fields: FieldsQuery = None,
+    request: Request,
+    response: Response,
+    db: ReadSessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ) -> list[ProdutoPublic]:
     """Lista os produtos registrados no sistema.
 
+    As páginas ficam em cache até a próxima alteração de produto, em qualquer processo (ver
+    catalog_version), e carregam um ETag, uma requisição com If-None-Match igual recebe 304
+    sem corpo.
+
     Args:
     ----
-        skip (int): número de itens da lista a serem pulados.
+        skip (int): número de itens da lista a serem pulados (prefira o cursor).
         limit (int): número limite de itens da lista a serem retornados.
+        cursor (str): cursor opaco retornado no header X-Next-Cursor da página anterior.
         categoria (str): categoria do produto (camisa, agasalho, meia etc.)
         preco (int): preco do produto.
         disponivel (bool): disponibilidade do produto.
-        db (SessionDep): Session do banco de dados.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
+        request (Request): requisição, de onde é lido o If-None-Match.
+        response (Response): resposta da rota, recebe o header X-Next-Cursor.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
 
     Returns:
@@ -39,7 +77,74 @@ def produto_list(
         list[ProdutoPublic]: lista com informações dos produtos.
 
     """
-    return get_produtos(db, skip, limit, categoria, preco, disponivel)
+
+    campos = parse_fields(ProdutoPublic, fields)
+
+    def render() -> tuple[bytes, dict[str, str]]:
+        items = get_produtos(db, skip, limit, categoria, preco, disponivel, cursor, campos)
+        set_next_cursor(response, items, limit, produto_cursor)
+        return to_json(list[response_schema(ProdutoPublic, campos)], items), dict(response.headers)
+
+    key = ('list', catalog_version(db), skip, limit, categoria, preco, disponivel, cursor, campos)
+    return cached_response(request, catalog_cache, key, render)
+
+
+@produto_router.get('/search')
+def produto_search(  # noqa: PLR0913
+    *,
+    q: Annotated[
+        str,
+        Query(min_length=3, max_length=100, description='Categoria ou seção, inteira ou em parte'),
+    ],
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+    response: Response,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],  # noqa: ARG001
+) -> list[ProdutoPublic]:
+    """Busca produtos pela categoria ou seção, tolerando prefixos e erros de digitação.
+
+    Args:
+    ----
+        q (str): termo buscado, com pelo menos 3 caracteres.
+        skip (int): número de resultados a serem pulados.
+        limit (int): número limite de resultados a serem retornados.
+        response (Response): resposta da rota.
+        db (ReadSessionDep): Session de leitura do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        list[ProdutoPublic]: produtos encontrados, do mais para o menos relevante.
+
+    """
+    items = search_produtos(db, q, skip, limit)
+    return json_response(list[ProdutoPublic], items, response)
+
+
+@produto_router.post('/batch-get')
+def produto_batch_get(
+    batch: BatchGetRequest,
+    response: Response,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],  # noqa: ARG001
+) -> ProdutoBatch:
+    """Busca os produtos dos ids informados numa única consulta.
+
+    Args:
+    ----
+        batch (BatchGetRequest): ids dos produtos, até BATCH_GET_MAX_IDS por requisição.
+        response (Response): resposta da rota.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        ProdutoBatch: produtos encontrados, na ordem dos ids, e os ids não encontrados.
+
+    """
+    produtos = get_produtos_by_ids(db, batch.ids)
+    return json_response(ProdutoBatch, batch_result(batch.ids, produtos), response)
 
 
 @produto_router.post('/')
@@ -65,31 +170,79 @@ def produto_post(
     return post_produto(db, produto_data)
 
 
+@produto_router.post('/import')
+async def produto_import(
+    request: Request,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> ProdutoImportResult:
+    """Importa produtos em lote a partir de um corpo CSV ou NDJSON.
+
+    O corpo é lido em streaming e os produtos são validados e gravados em lotes, o formato é
+    escolhido pelo Content-Type (text/csv ou application/x-ndjson). O CSV deve ter cabeçalho
+    com as colunas categoria, secao, preco e disponivel.
+
+    Args:
+    ----
+        request (Request): requisição com o corpo a ser importado.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        ProdutoImportResult: quantidade de produtos inseridos e relatório das linhas rejeitadas.
+
+    """
+    valida_admin(current_usuario)
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    formato = FORMATOS_IMPORTACAO.get(content_type)
+    if not formato:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='use text/csv ou application/x-ndjson',
+        )
+
+    registros = iter_records(iter_lines(request.stream()), formato)
+    return await importar_produtos(db, registros)
+
+
 @produto_router.get('/{id}')
 def produto_get(
-    id: int, db: SessionDep, current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    id: int,
+    request: Request,
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    fields: FieldsQuery = None,
 ) -> ProdutoPublic:
     """Pega informações de um produto dado seu id.
 
     Args:
     ----
         id (int): id do produto.
-        db (SessionDep): Session do banco de dados.
+        request (Request): requisição, de onde é lido o If-None-Match.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
+        fields (str): campos da resposta separados por vírgula (todos quando omitido).
 
     Returns:
     -------
         ProdutoPublic: informações do produto
 
     """
-    produto = get_produto(db, id)
-    if not produto:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='produto não encontrado',
-        )
 
-    return produto
+    campos = parse_fields(ProdutoPublic, fields)
+
+    def render() -> tuple[bytes, dict[str, str]]:
+        produto = get_produto(db, id, campos)
+        if not produto:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='produto não encontrado',
+            )
+        return to_json(response_schema(ProdutoPublic, campos), produto), {}
+
+    key = ('detail', catalog_version(db), id, campos)
+    return cached_response(request, catalog_cache, key, render)
 
 
 @produto_router.put('/{id}')
@@ -149,8 +302,7 @@ def produto_delete(id: int,
             detail='produto não encontrado',
         )
 
-    db.delete(produto)
-    db.commit()
+    delete_produto(db, produto)
 
     return {'detail': 'Produto deletado com sucesso'}
 
@@ -1,25 +1,32 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
-from app.database.database import SessionDep
+from app.database.database import ReadSessionDep, SessionDep
 from app.database.models import Usuario
-from app.database.schemas import UsuarioPublic
-from app.services.auth_services import get_current_usuario_ativo
-from app.services.usuario_services import get_usuario, get_usuarios
+from app.database.schemas import UsuarioPublic, UsuarioRoleUpdate
+from app.services.auth_services import get_current_usuario_ativo, valida_admin
+from app.services.usuario_services import (
+    delete_usuario,
+    get_usuario,
+    get_usuarios,
+    update_usuario_role,
+)
 
 usuario_router = APIRouter(tags=['Usuarios'])
 
 
 @usuario_router.get('/')
 def usuarios_list(
-    db: SessionDep, current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+    db: ReadSessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ) -> list[UsuarioPublic]:
     """Lista os usuários registrados no sistema.
 
     Args:
     ----
-        db (SessionDep): Session do banco de dados.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
 
     Returns:
@@ -47,7 +54,7 @@ def usuario_atual(
 @usuario_router.get('/{usuario_id}')
 def usuario_get(
     usuario_id: int,
-    db: SessionDep,
+    db: ReadSessionDep,
     current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
 ) -> UsuarioPublic:
     """Pega informações de um usuário dado seu id.
@@ -55,7 +62,7 @@ def usuario_get(
     Args:
     ----
         id (int): id do usuário.
-        db (SessionDep): Session do banco de dados.
+        db (ReadSessionDep): Session de leitura do banco de dados.
         current_usuario (Usuario): Usuário atual logado.
 
     Returns:
@@ -67,3 +74,70 @@ def usuario_get(
     if not db_usuario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='usuario não encontrado')
     return db_usuario
+
+
+@usuario_router.put('/{usuario_id}/role')
+def usuario_update_role(
+    usuario_id: int,
+    role_data: UsuarioRoleUpdate,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> UsuarioPublic:
+    """Altera o papel de um usuário dado seu id.
+
+    A mudança vale para os tokens já emitidos assim que é commitada, em todos os processos.
+
+    Args:
+    ----
+        usuario_id (int): id do usuário.
+        role_data (UsuarioRoleUpdate): schema com o novo papel.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        UsuarioPublic: informações do usuário atualizado.
+
+    """
+    valida_admin(current_usuario)
+    db_usuario = get_usuario(db, usuario_id)
+    if not db_usuario:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='usuario não encontrado')
+    return update_usuario_role(db, db_usuario, role_data.role)
+
+
+@usuario_router.delete('/{usuario_id}')
+def usuario_delete(
+    usuario_id: int,
+    db: SessionDep,
+    current_usuario: Annotated[Usuario, Depends(get_current_usuario_ativo)],
+) -> dict:
+    """Deleta um usuário dado seu id.
+
+    Os tokens já emitidos para ele deixam de valer assim que a remoção é commitada, em todos os
+    processos.
+
+    Args:
+    ----
+        usuario_id (int): id do usuário.
+        db (SessionDep): Session do banco de dados.
+        current_usuario (Usuario): Usuário atual logado.
+
+    Returns:
+    -------
+        Mensagem de confirmação que o usuário foi deletado
+
+    """
+    valida_admin(current_usuario)
+    db_usuario = get_usuario(db, usuario_id)
+    if not db_usuario:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='usuario não encontrado')
+    try:
+        delete_usuario(db, db_usuario)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='usuario possui um cliente registrado',
+        )
+    return {'detail': 'Usuario deletado com sucesso'}
@@ -3,16 +3,26 @@ from typing import Annotated
 
 import jwt
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import settings
-from app.database.database import SessionDep
+from app.database.database import AnySessionDep
 from app.database.enums import Role
 from app.database.models import Usuario
-from app.database.schemas import TokenData
-from app.services.usuario_services import get_usuario_by_email
-from app.utils.auth_utils import verify_password
+from app.database.schemas import TokenData, UsuarioCreate
+from app.services.usuario_services import (
+    get_usuario_by_email,
+    get_usuario_by_email_async,
+    post_usuario,
+    post_usuario_async,
+    principal_version,
+    principal_version_async,
+)
+from app.utils.auth_utils import get_password_hash_async, verify_password_async
+from app.utils.cache import principal_cache
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -25,11 +35,38 @@ credentials_exception = HTTPException(
 )
 
 
-def autenticar_usuario(email: str, senha: str, db: SessionDep) -> Usuario:
-    usuario = get_usuario_by_email(db, email)
+async def buscar_usuario_by_email(db: AnySessionDep, email: str) -> Usuario:
+    """Busca o usuário pelo email sem bloquear o event loop.
+
+    Com sessão assíncrona a consulta é aguardada diretamente, com sessão síncrona ela é
+    executada no threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await get_usuario_by_email_async(db, email)
+    return await run_in_threadpool(get_usuario_by_email, db, email)
+
+
+async def buscar_principal_version(db: AnySessionDep) -> int:
+    """Lê a versão dos usuários em cache_version sem bloquear o event loop."""
+    if isinstance(db, AsyncSession):
+        return await principal_version_async(db)
+    return await run_in_threadpool(principal_version, db)
+
+
+async def registrar_usuario(db: AnySessionDep, usuario: UsuarioCreate) -> Usuario:
+    """Registra o usuário usando a versão do serviço compatível com a sessão."""
+    if isinstance(db, AsyncSession):
+        return await post_usuario_async(db, usuario)
+    # o bcrypt roda no executor de hashing, o threadpool fica apenas com o INSERT
+    senha_hash = await get_password_hash_async(usuario.senha)
+    return await run_in_threadpool(post_usuario, db, usuario, senha_hash)
+
+
+async def autenticar_usuario(email: str, senha: str, db: AnySessionDep) -> Usuario:
+    usuario = await buscar_usuario_by_email(db, email)
     if not usuario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='usuario não encontrado')
-    if not verify_password(senha, usuario.senha):
+    if not await verify_password_async(senha, usuario.senha):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='senha incorreta')
     return usuario
 
@@ -54,7 +91,7 @@ def create_refresh_token(data: dict):
 
 async def get_current_usuario(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: SessionDep,
+    db: AnySessionDep,
 ) -> Usuario:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -64,9 +101,26 @@ async def get_current_usuario(
         token_data = TokenData(email=email)
     except (jwt.InvalidTokenError, ValidationError):
         raise credentials_exception
-    usuario = get_usuario_by_email(db, email=token_data.email)
+
+    # a versão na chave faz uma alteração de papel ou remoção commitada por qualquer processo
+    # deixar de encontrar as cópias anteriores
+    key = (token_data.email, await buscar_principal_version(db))
+    usuario = principal_cache.get(key)
+    if usuario is not None:
+        return usuario
+
+    # lida antes da consulta: se o usuário for alterado enquanto isso, a cópia não é guardada
+    generation = principal_cache.generation
+    usuario = await buscar_usuario_by_email(db, token_data.email)
     if not usuario:
         raise HTTPException(status.HTTP_404_NOT_FOUND, 'Usuario não encontrado')
+
+    # cópia desanexada da sessão, válida no máximo até a expiração do token
+    usuario = Usuario(**usuario.model_dump())
+    ttl = principal_cache.ttl
+    if payload.get('exp'):
+        ttl = min(ttl, payload['exp'] - datetime.now(timezone.utc).timestamp())
+    principal_cache.set(key, usuario, ttl, generation=generation)
     return usuario
 
 
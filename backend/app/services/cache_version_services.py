@@ -0,0 +1,26 @@
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models import CacheVersion
+
+
+def get_cache_version(db: SessionDep, nome: str) -> int:
+    """Versão atual dos dados do cache `nome`, 0 quando ainda não foi incrementada."""
+    stmt = select(CacheVersion.versao).where(CacheVersion.nome == nome)
+    return db.exec(stmt).first() or 0
+
+
+def bump_cache_version(db: SessionDep, nome: str) -> None:
+    """Incrementa a versão do cache `nome` na transação da alteração, antes do commit.
+
+    Os outros processos passam a procurar as entradas pela nova versão assim que a alteração
+    é commitada, sem depender do TTL do cache.
+    """
+    result = db.exec(
+        update(CacheVersion)
+        .where(CacheVersion.nome == nome)
+        .values(versao=CacheVersion.versao + 1),
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(nome=nome, versao=1))
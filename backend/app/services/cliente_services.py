@@ -1,33 +1,119 @@
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.database.database import SessionDep
+from app.database.database import AsyncSessionDep, SessionDep
+from app.database.loaders import load_options
 from app.database.models import Cliente, Usuario
-from app.database.schemas import ClienteCreate, ClienteUpdate
+from app.database.schemas import ClienteCreate, ClientePublic, ClienteUpdate
+from app.database.search import CLIENTE_BUSCA, get_backend
+from app.utils.pagination import IdCursor, decode_cursor
+from app.utils.total_count import CountMode, count_key, total_count
 
+# usuario via JOIN, conforme ClientePublic
+CLIENTE_PUBLIC_OPTIONS = load_options(Cliente, ClientePublic)
 
-def get_clientes(
-    db: SessionDep,
+
+def _cliente_options(fields: frozenset[str] | None) -> list:
+    if fields is None:
+        return CLIENTE_PUBLIC_OPTIONS
+    return load_options(Cliente, ClientePublic, fields)
+
+
+def _clientes_stmt(  # noqa: PLR0913
     skip: int,
     limit: int,
     nome: str | None,
     email: str | None,
-) -> list[Cliente]:
-    stmt = select(Cliente)
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Cliente]:
+    stmt = select(Cliente).options(*_cliente_options(fields)).order_by(Cliente.id)
+    if cursor:
+        stmt = stmt.where(Cliente.id > decode_cursor(cursor, IdCursor).id)
     if nome:
         stmt = stmt.join(Cliente.usuario).filter(Usuario.nome == nome)
     if email:
         stmt = stmt.join(Cliente.usuario).filter(Usuario.email == email)
 
-    clientes = db.exec(stmt.offset(skip).limit(limit))
+    return stmt.offset(skip).limit(limit)
+
+
+def cliente_cursor(cliente: Cliente) -> dict:
+    """Chave de ordenação usada na paginação por cursor dos clientes."""
+    return {'id': cliente.id}
+
+
+def _cliente_stmt(
+    cliente_id: int,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Cliente]:
+    return select(Cliente).options(*_cliente_options(fields)).filter(Cliente.id == cliente_id)
+
 
-    return clientes
+def _clientes_by_ids_stmt(clientes_id: list[int]) -> SelectOfScalar[Cliente]:
+    return select(Cliente).options(*CLIENTE_PUBLIC_OPTIONS).where(Cliente.id.in_(set(clientes_id)))
 
 
-def get_cliente(db: SessionDep, cliente_id: int) -> Cliente:
-    cliente = db.exec(select(Cliente).filter(Cliente.id == cliente_id)).first()
+def _search_clientes_stmt(
+    dialect: str,
+    termo: str,
+    skip: int,
+    limit: int,
+) -> SelectOfScalar[Cliente]:
+    stmt = select(Cliente).options(*CLIENTE_PUBLIC_OPTIONS)
+    stmt = get_backend(dialect).search(stmt, CLIENTE_BUSCA, termo)
+    return stmt.offset(skip).limit(limit)
+
+
+def _apply_cliente_update(cliente_data: ClienteUpdate, cliente: Cliente) -> None:
+    for key, value in cliente_data.model_dump(exclude_unset=True).items():
+        setattr(cliente, key, value)
+
+
+def get_clientes(  # noqa: PLR0913
+    db: SessionDep,
+    skip: int,
+    limit: int,
+    nome: str | None,
+    email: str | None,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Cliente]:
+    clientes = db.exec(_clientes_stmt(skip, limit, nome, email, cursor, fields))
+
+    return clientes.all()
+
+
+def count_clientes(
+    db: SessionDep,
+    mode: CountMode,
+    nome: str | None,
+    email: str | None,
+) -> tuple[int, CountMode]:
+    """Total de clientes dos filtros da listagem, para o header X-Total-Count."""
+    stmt = _clientes_stmt(0, None, nome, email)
+    key = count_key('clientes', {'nome': nome, 'email': email})
+    return total_count(db, stmt, Cliente.id, mode, key)
+
+
+def search_clientes(db: SessionDep, termo: str, skip: int, limit: int) -> list[Cliente]:
+    """Busca clientes pelo nome e email do usuário, do mais para o menos relevante."""
+    stmt = _search_clientes_stmt(db.get_bind().dialect.name, termo, skip, limit)
+    return db.exec(stmt).all()
+
+
+def get_cliente(db: SessionDep, cliente_id: int, fields: frozenset[str] | None = None) -> Cliente:
+    cliente = db.exec(_cliente_stmt(cliente_id, fields)).first()
     return cliente
 
 
+def get_clientes_by_ids(db: SessionDep, clientes_id: list[int]) -> list[Cliente]:
+    """Busca todos os clientes dos ids informados com um único WHERE id IN (...)."""
+    if not clientes_id:
+        return []
+    return db.exec(_clientes_by_ids_stmt(clientes_id)).all()
+
+
 def post_cliente(db: SessionDep, usuario_id: int, cliente_data: ClienteCreate) -> Cliente:
     db_cliente = Cliente.model_validate(cliente_data, update={'usuario_id': usuario_id})
     db.add(db_cliente)
@@ -37,11 +123,88 @@ def post_cliente(db: SessionDep, usuario_id: int, cliente_data: ClienteCreate) -
 
 
 def update_cliente(db: SessionDep, cliente_data: ClienteUpdate, cliente: Cliente) -> Cliente:
-    for key, value in cliente_data.model_dump(exclude_unset=True).items():
-        setattr(cliente, key, value)
+    _apply_cliente_update(cliente_data, cliente)
 
     db.add(cliente)
     db.commit()
     db.refresh(cliente)
 
-    return cliente
\ No newline at end of file
+    return cliente
+
+
+# ------------------------------------------------------------------------------------------------
+# Versões assíncronas
+
+
+async def get_clientes_async(  # noqa: PLR0913
+    db: AsyncSessionDep,
+    skip: int,
+    limit: int,
+    nome: str | None,
+    email: str | None,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Cliente]:
+    return (await db.exec(_clientes_stmt(skip, limit, nome, email, cursor, fields))).all()
+
+
+async def count_clientes_async(
+    db: AsyncSessionDep,
+    mode: CountMode,
+    nome: str | None,
+    email: str | None,
+) -> tuple[int, CountMode]:
+    return await db.run_sync(count_clientes, mode, nome, email)
+
+
+async def search_clientes_async(
+    db: AsyncSessionDep,
+    termo: str,
+    skip: int,
+    limit: int,
+) -> list[Cliente]:
+    stmt = _search_clientes_stmt(db.get_bind().dialect.name, termo, skip, limit)
+    return (await db.exec(stmt)).all()
+
+
+async def get_cliente_async(
+    db: AsyncSessionDep,
+    cliente_id: int,
+    fields: frozenset[str] | None = None,
+) -> Cliente:
+    return (await db.exec(_cliente_stmt(cliente_id, fields))).first()
+
+
+async def get_clientes_by_ids_async(
+    db: AsyncSessionDep,
+    clientes_id: list[int],
+) -> list[Cliente]:
+    if not clientes_id:
+        return []
+    return (await db.exec(_clientes_by_ids_stmt(clientes_id))).all()
+
+
+async def post_cliente_async(
+    db: AsyncSessionDep,
+    usuario_id: int,
+    cliente_data: ClienteCreate,
+) -> Cliente:
+    db_cliente = Cliente.model_validate(cliente_data, update={'usuario_id': usuario_id})
+    db.add(db_cliente)
+    await db.commit()
+    await db.refresh(db_cliente)
+    return db_cliente
+
+
+async def update_cliente_async(
+    db: AsyncSessionDep,
+    cliente_data: ClienteUpdate,
+    cliente: Cliente,
+) -> Cliente:
+    _apply_cliente_update(cliente_data, cliente)
+
+    db.add(cliente)
+    await db.commit()
+    await db.refresh(cliente)
+
+    return cliente
@@ -0,0 +1,250 @@
+"""Idempotency-Key dos POST que criam recursos.
+
+Um POST com o header `Idempotency-Key` reserva a chave (por usuário e rota) numa linha de
+`idempotency_key` antes de rodar. A resposta é guardada na mesma linha e repetida, sem rodar
+o POST de novo, para as requisições com a mesma chave até IDEMPOTENCY_TTL segundos depois.
+
+- Repetições concorrentes esperam a requisição original (até IDEMPOTENCY_WAIT segundos) e
+  recebem a resposta dela, a reserva no banco vale para todos os processos da API.
+- Se a requisição original falhar a reserva é desfeita e a próxima tentativa roda o POST.
+  Uma reserva de um processo que caiu expira em IDEMPOTENCY_LEASE segundos; a resposta de
+  uma reserva expirada não sobrescreve a de quem pegou a chave depois.
+- A mesma chave com outro corpo é rejeitada com 422.
+- `KeyEvictor` remove as chaves expiradas a cada IDEMPOTENCY_EVICT_INTERVAL segundos.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import math
+import time
+import uuid
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Annotated
+
+from fastapi import Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.database.database import engine
+from app.database.models import IdempotencyKey
+from app.utils.clock import utcnow
+from app.utils.serialization import to_json
+
+logger = logging.getLogger(__name__)
+
+# header das respostas repetidas
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# header opcional das rotas de POST
+IdempotencyKeyHeader = Annotated[
+    str | None,
+    Header(
+        alias='Idempotency-Key',
+        max_length=255,
+        description='Chave única da requisição, repetições recebem a mesma resposta',
+    ),
+]
+
+# intervalo entre as consultas de uma repetição esperando a requisição original
+POLL_INTERVAL = 0.05
+
+
+def request_hash(body: BaseModel) -> str:
+    """Hash do corpo da requisição, para recusar a mesma chave com outro corpo."""
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+def _reserve(
+    db: Session,
+    scope: object,
+    linha: Callable[[], IdempotencyKey],
+) -> IdempotencyKey | None:
+    """Reserva a chave, ou retorna a linha de quem já a reservou."""
+    while True:
+        agora = utcnow()
+        existente = db.exec(
+            select(IdempotencyKey)
+            .where(scope, IdempotencyKey.expires_at > agora)
+            .execution_options(populate_existing=True),
+        ).first()
+        if existente is not None:
+            return existente
+        # uma chave expirada que a limpeza ainda não removeu é tratada como nova
+        db.exec(delete(IdempotencyKey).where(scope, IdempotencyKey.expires_at <= agora))
+        db.add(linha())
+        try:
+            db.commit()
+        except IntegrityError:
+            # outra requisição reservou a chave entre a consulta e o insert
+            db.rollback()
+        else:
+            return None
+
+
+def _replay(linha: IdempotencyKey) -> Response:
+    return Response(
+        linha.body,
+        status_code=linha.status_code,
+        media_type='application/json',
+        headers={REPLAYED_HEADER: 'true'},
+    )
+
+
+def idempotent_response(  # noqa: PLR0913
+    db: Session,
+    key: str | None,
+    usuario_id: int,
+    endpoint: str,
+    body: BaseModel,
+    schema: object,
+    create: Callable[[], object],
+) -> Response | object:
+    """Roda `create` uma vez por Idempotency-Key e repete a resposta para as repetições.
+
+    Args:
+    ----
+        db (Session): Session do banco de dados.
+        key (str | None): header Idempotency-Key, sem ele `create` roda normalmente.
+        usuario_id (int): usuário que fez a requisição, as chaves são separadas por usuário.
+        endpoint (str): rota, ex.: 'POST /orders'.
+        body (BaseModel): corpo da requisição.
+        schema (object): schema da resposta de `create`.
+        create (Callable): executa o POST e retorna o recurso criado.
+
+    Returns:
+    -------
+        Response | object: resposta JSON (guardada ou repetida), ou o retorno de `create`
+        quando não há chave.
+
+    Raises:
+    ------
+        HTTPException: 422 para a chave usada com outro corpo, 409 quando a requisição
+        original não termina em IDEMPOTENCY_WAIT segundos.
+
+    """
+    if key is None:
+        return create()
+
+    scope = (
+        (IdempotencyKey.usuario_id == usuario_id)
+        & (IdempotencyKey.endpoint == endpoint)
+        & (IdempotencyKey.key == key)
+    )
+    digest = request_hash(body)
+    # só a requisição com o token da reserva grava a resposta ou desfaz a reserva
+    token = uuid.uuid4().hex
+    owned = scope & (IdempotencyKey.claim_token == token)
+
+    def reserva() -> IdempotencyKey:
+        agora = utcnow()
+        return IdempotencyKey(
+            usuario_id=usuario_id,
+            endpoint=endpoint,
+            key=key,
+            request_hash=digest,
+            claim_token=token,
+            created_at=agora,
+            expires_at=agora + timedelta(seconds=settings.IDEMPOTENCY_LEASE),
+        )
+
+    prazo = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while (existente := _reserve(db, scope, reserva)) is not None:
+        if existente.request_hash != digest:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Idempotency-Key já usada com outra requisição',
+            )
+        if existente.status_code is not None:
+            return _replay(existente)
+        if time.monotonic() >= prazo:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='requisição com a mesma Idempotency-Key em andamento',
+                headers={'Retry-After': str(math.ceil(settings.IDEMPOTENCY_WAIT))},
+            )
+        # fecha a transação para ver a resposta quando a requisição original a gravar
+        db.rollback()
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        conteudo = to_json(schema, create())
+    except BaseException:
+        # sem resposta guardada, a próxima tentativa roda o POST de novo
+        db.rollback()
+        db.exec(delete(IdempotencyKey).where(owned))
+        db.commit()
+        raise
+
+    gravada = db.exec(
+        update(IdempotencyKey)
+        .where(owned)
+        .values(
+            status_code=status.HTTP_200_OK,
+            body=conteudo,
+            expires_at=utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+        ),
+    )
+    db.commit()
+    if gravada.rowcount == 0:
+        # a reserva expirou e outra requisição pegou a chave, a resposta dela é a que fica
+        logger.warning('reserva da Idempotency-Key %r perdida antes de gravar a resposta', key)
+    return Response(conteudo, media_type='application/json')
+
+
+def evict_expired_keys(db: Session) -> int:
+    """Remove as chaves expiradas e retorna quantas foram removidas."""
+    removidas = db.exec(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= utcnow()))
+    db.commit()
+    return removidas.rowcount
+
+
+class KeyEvictor:
+    """Tarefa asyncio que remove as chaves expiradas periodicamente."""
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self.evicted = 0
+        self._task: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def run_once(self) -> int:
+        """Remove as chaves expiradas (bloqueante, roda numa thread)."""
+        with self.session_factory() as db:
+            removidas = evict_expired_keys(db)
+        self.evicted += removidas
+        return removidas
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                removidas = await run_in_threadpool(self.run_once)
+            except Exception:
+                logger.exception('erro ao remover Idempotency-Keys expiradas')
+            else:
+                if removidas:
+                    logger.info('%s Idempotency-Keys expiradas removidas', removidas)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+
+    def start(self) -> None:
+        """Inicia a limpeza no event loop atual."""
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Interrompe a limpeza, esperando a remoção em andamento terminar."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+
+key_evictor = KeyEvictor(lambda: Session(engine), settings.IDEMPOTENCY_EVICT_INTERVAL)
@@ -0,0 +1,304 @@
+"""Fila persistente de jobs e workers asyncio que a consomem.
+
+Os jobs ficam na tabela `job`, gravados na mesma transação que os gerou, então sobrevivem a
+reinícios e não são perdidos se a requisição falhar depois do commit. `JobWorkerPool` roda
+JOB_WORKERS tarefas asyncio no processo da API; cada uma pega lotes de até JOB_BATCH_SIZE
+jobs e executa os handlers numa thread, fora do event loop.
+
+- Visibilidade: ao pegar um job o worker o trava por JOB_VISIBILITY_TIMEOUT segundos. Se o
+  worker cair, o job volta a ser elegível depois disso.
+- Tentativas: um handler que falha é repetido até JOB_MAX_ATTEMPTS vezes, com espera de
+  JOB_RETRY_BACKOFF segundos dobrando a cada falha, e depois fica como `falhou`.
+- Os efeitos do handler e a conclusão do job são gravados na mesma transação.
+
+Vários processos podem consumir a mesma fila: cada lote é marcado com um token próprio e só
+quem tem o token conclui o job.
+"""
+
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from datetime import date, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, update
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.database.database import engine
+from app.database.enums import JobStatus, PedidoStatus
+from app.database.models import Job, Pedido
+from app.utils.clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, dict], None]
+
+# handlers por tipo de job, registrados com @job_handler
+HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Registra a função que executa os jobs do tipo `kind`."""
+
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def enqueue_job(db: Session, kind: str, payload: dict, delay: float = 0) -> Job:
+    """Adiciona um job na sessão, gravado no commit da transação de quem o gerou.
+
+    Args:
+    ----
+        db (Session): sessão da transação que gera o job.
+        kind (str): tipo do job, com um handler registrado.
+        payload (dict): dados do job (JSON).
+        delay (float): segundos até o job ficar elegível.
+
+    Returns:
+    -------
+        Job: job pendente.
+
+    """
+    agora = utcnow()
+    job = Job(
+        kind=kind,
+        payload=payload,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=agora + timedelta(seconds=delay),
+        created_at=agora,
+    )
+    db.add(job)
+    return job
+
+
+def claim_jobs(db: Session, limit: int, token: str) -> list[Job]:
+    """Pega até `limit` jobs elegíveis e os trava por JOB_VISIBILITY_TIMEOUT.
+
+    Jobs travados cujo prazo passou sem tentativas restantes são marcados como `falhou`.
+    """
+    agora = utcnow()
+    expirado = (Job.status == JobStatus.executando) & (Job.locked_until <= agora)
+    db.exec(
+        update(Job)
+        .where(expirado, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.falhou, finished_at=agora, last_error='tempo esgotado'),
+    )
+    elegivel = or_(
+        (Job.status == JobStatus.pendente) & (Job.run_after <= agora),
+        expirado & (Job.attempts < Job.max_attempts),
+    )
+    ids = select(Job.id).where(elegivel).order_by(Job.run_after, Job.id).limit(limit)
+    if db.get_bind().dialect.name == 'postgresql':
+        # workers concorrentes pegam lotes diferentes em vez de esperar pelos mesmos jobs
+        ids = ids.with_for_update(skip_locked=True)
+    db.exec(
+        update(Job)
+        # a condição repetida descarta jobs que outro processo pegou entre o select e o update
+        .where(Job.id.in_(ids.scalar_subquery()), elegivel)
+        .values(
+            status=JobStatus.executando,
+            attempts=Job.attempts + 1,
+            locked_until=agora + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT),
+            claim_token=token,
+        )
+        .execution_options(synchronize_session=False),
+    )
+    db.commit()
+    jobs = db.exec(select(Job).where(Job.claim_token == token).order_by(Job.id)).all()
+    # fora da sessão os jobs não são relidos nos commits de run_job, que precisa do token e
+    # das tentativas deste lote mesmo que outro worker já tenha pego o job
+    for job in jobs:
+        db.expunge(job)
+    return jobs
+
+
+def run_job(db: Session, job: Job) -> bool:
+    """Executa o handler e conclui o job, ou agenda uma nova tentativa se ele falhar.
+
+    Returns
+    -------
+        bool: se o job foi concluído.
+
+    """
+    job_id, kind, attempts = job.id, job.kind, job.attempts
+    owned = (Job.id == job_id) & (Job.claim_token == job.claim_token)
+    try:
+        HANDLERS[kind](db, job.payload)
+        concluido = db.exec(
+            update(Job)
+            .where(owned)
+            .values(status=JobStatus.concluido, finished_at=utcnow(), claim_token=None),
+        )
+        if concluido.rowcount == 0:
+            # o prazo expirou e outro worker pegou o job, os efeitos desta execução são
+            # descartados
+            db.rollback()
+            return False
+        db.commit()
+    except Exception as exc:  # noqa: BLE001 - qualquer erro do handler vira nova tentativa
+        db.rollback()
+        agora = utcnow()
+        if attempts >= job.max_attempts:
+            values = {'status': JobStatus.falhou, 'finished_at': agora}
+        else:
+            espera = settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1)
+            values = {'status': JobStatus.pendente, 'run_after': agora + timedelta(seconds=espera)}
+        db.exec(
+            update(Job)
+            .where(owned)
+            .values(**values, last_error=repr(exc)[:1000], locked_until=None, claim_token=None),
+        )
+        db.commit()
+        logger.warning('job %s (%s) falhou na tentativa %s: %r', job_id, kind, attempts, exc)
+        return False
+    return True
+
+
+def count_jobs(db: Session) -> dict[str, int]:
+    """Quantidade de jobs por status."""
+    rows = db.exec(select(Job.status, func.count()).group_by(Job.status)).all()
+    return {status.value: 0 for status in JobStatus} | {status.value: n for status, n in rows}
+
+
+class JobWorkerPool:
+    """Workers asyncio que consomem a fila, com contadores de vazão para as métricas."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        window: float = 60,
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.window = window
+        self._tasks: list[asyncio.Task] = []
+        self._stopping: asyncio.Event | None = None
+        self._lock = threading.Lock()
+        self._finished: deque[float] = deque()
+        self.claimed = 0
+        self.completed = 0
+        self.retried = 0
+        self.seconds_total = 0.0
+
+    def run_batch(self) -> int:
+        """Pega um lote e executa os jobs (bloqueante, roda numa thread).
+
+        Returns
+        -------
+            int: jobs pegos no lote, 0 quando a fila está vazia.
+
+        """
+        token = uuid.uuid4().hex
+        with self.session_factory() as db:
+            jobs = claim_jobs(db, self.batch_size, token)
+            with self._lock:
+                self.claimed += len(jobs)
+            for job in jobs:
+                inicio = time.perf_counter()
+                ok = run_job(db, job)
+                duracao = time.perf_counter() - inicio
+                with self._lock:
+                    self.seconds_total += duracao
+                    if ok:
+                        self.completed += 1
+                        self._finished.append(time.monotonic())
+                    else:
+                        self.retried += 1
+        return len(jobs)
+
+    async def _worker(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processados = await run_in_threadpool(self.run_batch)
+            except Exception:
+                logger.exception('erro ao consumir a fila de jobs')
+                processados = 0
+            if not processados:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+
+    def start(self) -> None:
+        """Inicia os workers no event loop atual."""
+        self._stopping = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Pede para os workers pararem e espera os lotes em andamento terminarem."""
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+    def metrics(self) -> dict:
+        """Jobs pegos, concluídos e repetidos, e a vazão na janela recente."""
+        agora = time.monotonic()
+        with self._lock:
+            while self._finished and self._finished[0] < agora - self.window:
+                self._finished.popleft()
+            return {
+                'workers': len(self._tasks),
+                'claimed': self.claimed,
+                'completed': self.completed,
+                'retried': self.retried,
+                'job_seconds_avg': self.seconds_total / self.claimed if self.claimed else 0.0,
+                'throughput_per_second': len(self._finished) / self.window,
+            }
+
+
+job_pool = JobWorkerPool(
+    session_factory=lambda: Session(engine),
+    workers=settings.JOB_WORKERS,
+    batch_size=settings.JOB_BATCH_SIZE,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+)
+
+
+# ------------------------------------------------------------------------------------------------
+# Ciclo de vida dos pedidos
+
+
+def enqueue_status_change(
+    db: Session,
+    pedido: Pedido,
+    anterior: PedidoStatus,
+) -> Job | None:
+    """Agenda os efeitos de uma mudança de status do pedido, se o status mudou."""
+    if pedido.status == anterior:
+        return None
+    return enqueue_job(
+        db,
+        'pedido_status',
+        {
+            'pedido_id': pedido.id,
+            'de': anterior.value,
+            'para': pedido.status.value,
+            'em': utcnow().date().isoformat(),
+        },
+    )
+
+
+@job_handler('pedido_status')
+def pedido_status_alterado(db: Session, payload: dict) -> None:
+    """Efeitos de uma mudança de status: a entrega fecha o pedido com a data do evento."""
+    pedido = db.get(Pedido, payload['pedido_id'])
+    if pedido is None:
+        return
+    logger.info('pedido %s: %s -> %s', pedido.id, payload['de'], payload['para'])
+    if payload['para'] == PedidoStatus.entregue.value and pedido.data_fim is None:
+        pedido.data_fim = date.fromisoformat(payload['em'])
+        db.add(pedido)
@@ -1,16 +1,36 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Iterator
 from datetime import date
 
+from sqlalchemy import insert, tuple_
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.database.database import SessionDep
+from app.config import settings
+from app.database.database import AsyncSessionDep, SessionDep
 from app.database.enums import PedidoStatus
+from app.database.loaders import load_options
 from app.database.models import Pedido, PedidoProduto, Produto
-from app.database.schemas import PedidoCreate, PedidoUpdate
-from app.services.produto_services import get_produto
+from app.database.schemas import PedidoCreate, PedidoPublic, PedidoUpdate
+from app.services.job_services import enqueue_status_change
+from app.services.vendas_services import mover_venda, registrar_venda, remover_venda
+from app.utils.pagination import PedidoCursor, decode_cursor
+from app.utils.total_count import CountMode, count_key, total_count
 
+# cliente via JOIN e produtos via SELECT ... IN, conforme PedidoPublic
+PEDIDO_PUBLIC_OPTIONS = load_options(Pedido, PedidoPublic)
+# lida por pedido_cursor mesmo quando ?fields= não a inclui
+PEDIDO_CURSOR_FIELDS = frozenset({'data_inicio'})
 
-def get_pedidos(
-    db: SessionDep,
+
+def _pedido_options(fields: frozenset[str] | None) -> list:
+    if fields is None:
+        return PEDIDO_PUBLIC_OPTIONS
+    return load_options(Pedido, PedidoPublic, fields | PEDIDO_CURSOR_FIELDS)
+
+
+def _pedidos_stmt(  # noqa: PLR0913
     skip: int,
     limit: int,
     data_inicio: date,
@@ -18,9 +38,16 @@ def get_pedidos(
     secao_produtos: str,
     pedido_id: int,
     pedido_status: PedidoStatus,
-    cliente_id: PedidoStatus,
-) -> list[Pedido]:
-    stmt = select(Pedido)
+    cliente_id: int,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Pedido]:
+    stmt = select(Pedido).options(*_pedido_options(fields)).order_by(Pedido.data_inicio, Pedido.id)
+    if cursor:
+        after = decode_cursor(cursor, PedidoCursor)
+        stmt = stmt.where(
+            tuple_(Pedido.data_inicio, Pedido.id) > tuple_(after.data_inicio, after.id),
+        )
     if data_inicio:
         stmt = stmt.where(Pedido.data_inicio >= data_inicio)
     if data_fim:
@@ -39,36 +66,349 @@ def get_pedidos(
     if cliente_id:
         stmt = stmt.filter(Pedido.cliente_id == cliente_id)
 
-    pedidos = db.exec(stmt.offset(skip).limit(limit))
+    return stmt.offset(skip).limit(limit)
+
+
+def pedido_cursor(pedido: Pedido) -> dict:
+    """Chave de ordenação usada na paginação por cursor dos pedidos."""
+    return {'data_inicio': pedido.data_inicio.isoformat(), 'id': pedido.id}
+
+
+def _pedido_stmt(
+    pedido_id: int,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Pedido]:
+    return select(Pedido).options(*_pedido_options(fields)).filter(Pedido.id == pedido_id)
+
+
+def _pedidos_by_ids_stmt(pedidos_id: list[int]) -> SelectOfScalar[Pedido]:
+    return select(Pedido).options(*PEDIDO_PUBLIC_OPTIONS).where(Pedido.id.in_(set(pedidos_id)))
+
+
+def _pedido_produto_rows(pedido_id: int, produtos_id: list[int]) -> list[dict]:
+    # ids repetidos violariam a chave primária de pedido_produto
+    return [
+        {'pedido_id': pedido_id, 'produto_id': produto_id}
+        for produto_id in dict.fromkeys(produtos_id)
+    ]
+
+
+def _apply_pedido_update(pedido_data: PedidoUpdate, pedido: Pedido) -> None:
+    for key, value in pedido_data.model_dump(exclude_unset=True).items():
+        setattr(pedido, key, value)
+
+
+def get_pedidos(
+    db: SessionDep,
+    skip: int,
+    limit: int,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Pedido]:
+    stmt = _pedidos_stmt(
+        skip,
+        limit,
+        data_inicio,
+        data_fim,
+        secao_produtos,
+        pedido_id,
+        pedido_status,
+        cliente_id,
+        cursor,
+        fields,
+    )
+    pedidos = db.exec(stmt)
+
+    return pedidos.all()
+
+
+def count_pedidos(  # noqa: PLR0913
+    db: SessionDep,
+    mode: CountMode,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+) -> tuple[int, CountMode]:
+    """Total de pedidos dos filtros da listagem, para o header X-Total-Count."""
+    filters = {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        'secao_produtos': secao_produtos,
+        'pedido_id': pedido_id,
+        'pedido_status': pedido_status,
+        'cliente_id': cliente_id,
+    }
+    stmt = _pedidos_stmt(0, None, *filters.values())
+    return total_count(db, stmt, Pedido.id, mode, count_key('pedidos', filters))
+
+
+def _expunge_loaded(db: SessionDep | AsyncSessionDep) -> None:
+    # Esvazia o identity map depois de cada bloco exportado. expunge_all() não serve: ele
+    # troca o identity map da sessão e o resultado do yield_per, ainda em andamento, falha ao
+    # carregar o próximo bloco no mapa antigo (InvalidRequestError).
+    for instance in list(db.identity_map.values()):
+        db.expunge(instance)
+
+
+def iter_pedidos(  # noqa: PLR0913
+    db: SessionDep,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+) -> Iterator[list[Pedido]]:
+    """Percorre os pedidos filtrados em blocos usando um cursor do lado do servidor.
+
+    A consulta usa yield_per (stream_results), e os pedidos de cada bloco, com os clientes e
+    produtos carregados junto, são retirados da sessão depois de entregues. Por isso a memória
+    usada não cresce com o número de pedidos exportados.
+    """
+    stmt = _pedidos_stmt(
+        0,
+        None,
+        data_inicio,
+        data_fim,
+        secao_produtos,
+        pedido_id,
+        pedido_status,
+        cliente_id,
+    ).execution_options(yield_per=settings.EXPORT_YIELD_PER)
+
+    for pedidos in db.exec(stmt).partitions():
+        yield pedidos
+        _expunge_loaded(db)
+
+
+EXPORT_CSV_COLUNAS = ('id', 'cliente_id', 'status', 'data_inicio', 'data_fim', 'produtos_id')
+
+
+def exportar_pedidos(pedidos: Iterator[list[Pedido]], formato: str) -> Iterator[str]:
+    """Serializa os blocos de pedidos em NDJSON (PedidoPublic) ou CSV."""
+    if formato == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUNAS)
+        for bloco in pedidos:
+            for pedido in bloco:
+                writer.writerow(
+                    [
+                        pedido.id,
+                        pedido.cliente_id,
+                        pedido.status.value,
+                        pedido.data_inicio,
+                        pedido.data_fim or '',
+                        ' '.join(str(produto.id) for produto in pedido.produtos),
+                    ],
+                )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    for bloco in pedidos:
+        yield ''.join(
+            PedidoPublic.model_validate(pedido, from_attributes=True).model_dump_json() + '\n'
+            for pedido in bloco
+        )
+
 
-    return pedidos
+def get_pedido(db: SessionDep, pedido_id: int, fields: frozenset[str] | None = None) -> Pedido:
+    return db.exec(_pedido_stmt(pedido_id, fields)).first()
+
+def get_pedidos_by_ids(db: SessionDep, pedidos_id: list[int]) -> list[Pedido]:
+    """Busca todos os pedidos dos ids informados com um único WHERE id IN (...).
+
+    Cliente e produtos vêm pelas mesmas estratégias de get_pedidos, sem consultas por pedido.
+    """
+    if not pedidos_id:
+        return []
+    return db.exec(_pedidos_by_ids_stmt(pedidos_id)).all()
 
-def get_pedido(db: SessionDep, pedido_id: int) -> Pedido:
-    return db.exec(select(Pedido).filter(Pedido.id == pedido_id)).first()
 
 def post_pedido(db: SessionDep, pedido_data: PedidoCreate) -> Pedido:
-    produtos_id = pedido_data.produtos_id
+    """Registra o pedido e suas associações numa única transação.
+
+    Os produtos devem ter sido validados antes (ver get_produtos_by_ids), as linhas de
+    pedido_produto são inseridas de uma vez com executemany.
+    """
     db_pedido = Pedido.model_validate(pedido_data)
     db.add(db_pedido)
-    db.commit()
-    db.refresh(db_pedido)
+    db.flush()
 
     # associa os produtos com o pedido
-    for produto_id in produtos_id:
-        produto = get_produto(db, produto_id)
-        pedido_produto = PedidoProduto(pedido_id=db_pedido.id, produto_id=produto.id)
-        db.add(pedido_produto)
+    rows = _pedido_produto_rows(db_pedido.id, pedido_data.produtos_id)
+    if rows:
+        db.exec(insert(PedidoProduto), params=rows)
+    # resumo de vendas atualizado na mesma transação
+    registrar_venda(db, db_pedido)
 
     db.commit()
+    db.refresh(db_pedido)
 
     return db_pedido
 
 def update_pedido(db: SessionDep, pedido_data: PedidoUpdate, pedido: Pedido) -> Pedido:
-    for key, value in pedido_data.model_dump(exclude_unset=True).items():
-        setattr(pedido, key, value)
+    anterior = (pedido.data_inicio, pedido.status)
+    _apply_pedido_update(pedido_data, pedido)
 
     db.add(pedido)
+    mover_venda(db, pedido, *anterior)
+    # os efeitos da mudança de status rodam nos workers de jobs, fora da requisição
+    enqueue_status_change(db, pedido, anterior[1])
     db.commit()
     db.refresh(pedido)
 
     return pedido
+
+
+def delete_pedido(db: SessionDep, pedido: Pedido) -> None:
+    remover_venda(db, pedido)
+    db.delete(pedido)
+    db.commit()
+
+
+# ------------------------------------------------------------------------------------------------
+# Versões assíncronas
+
+
+async def get_pedidos_async(  # noqa: PLR0913
+    db: AsyncSessionDep,
+    skip: int,
+    limit: int,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Pedido]:
+    stmt = _pedidos_stmt(
+        skip,
+        limit,
+        data_inicio,
+        data_fim,
+        secao_produtos,
+        pedido_id,
+        pedido_status,
+        cliente_id,
+        cursor,
+        fields,
+    )
+    return (await db.exec(stmt)).all()
+
+
+async def count_pedidos_async(  # noqa: PLR0913
+    db: AsyncSessionDep,
+    mode: CountMode,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+) -> tuple[int, CountMode]:
+    return await db.run_sync(
+        count_pedidos,
+        mode,
+        data_inicio,
+        data_fim,
+        secao_produtos,
+        pedido_id,
+        pedido_status,
+        cliente_id,
+    )
+
+
+async def iter_pedidos_async(  # noqa: PLR0913
+    db: AsyncSessionDep,
+    data_inicio: date,
+    data_fim: date,
+    secao_produtos: str,
+    pedido_id: int,
+    pedido_status: PedidoStatus,
+    cliente_id: int,
+) -> AsyncIterator[list[Pedido]]:
+    stmt = _pedidos_stmt(
+        0,
+        None,
+        data_inicio,
+        data_fim,
+        secao_produtos,
+        pedido_id,
+        pedido_status,
+        cliente_id,
+    ).execution_options(yield_per=settings.EXPORT_YIELD_PER)
+
+    result = await db.stream_scalars(stmt)
+    async for pedidos in result.partitions():
+        yield pedidos
+        _expunge_loaded(db)
+
+
+async def get_pedido_async(
+    db: AsyncSessionDep,
+    pedido_id: int,
+    fields: frozenset[str] | None = None,
+) -> Pedido:
+    return (await db.exec(_pedido_stmt(pedido_id, fields))).first()
+
+
+async def get_pedidos_by_ids_async(db: AsyncSessionDep, pedidos_id: list[int]) -> list[Pedido]:
+    if not pedidos_id:
+        return []
+    return (await db.exec(_pedidos_by_ids_stmt(pedidos_id))).all()
+
+
+async def post_pedido_async(db: AsyncSessionDep, pedido_data: PedidoCreate) -> Pedido:
+    db_pedido = Pedido.model_validate(pedido_data)
+    db.add(db_pedido)
+    await db.flush()
+
+    # associa os produtos com o pedido
+    rows = _pedido_produto_rows(db_pedido.id, pedido_data.produtos_id)
+    if rows:
+        await db.exec(insert(PedidoProduto), params=rows)
+    await db.run_sync(registrar_venda, db_pedido)
+
+    await db.commit()
+    await db.refresh(db_pedido)
+
+    return db_pedido
+
+
+async def update_pedido_async(
+    db: AsyncSessionDep,
+    pedido_data: PedidoUpdate,
+    pedido: Pedido,
+) -> Pedido:
+    anterior = (pedido.data_inicio, pedido.status)
+    _apply_pedido_update(pedido_data, pedido)
+
+    db.add(pedido)
+    await db.run_sync(mover_venda, pedido, *anterior)
+    await db.run_sync(enqueue_status_change, pedido, anterior[1])
+    await db.commit()
+    await db.refresh(pedido)
+
+    return pedido
+
+
+async def delete_pedido_async(db: AsyncSessionDep, pedido: Pedido) -> None:
+    await db.run_sync(remover_venda, pedido)
+    await db.delete(pedido)
+    await db.commit()
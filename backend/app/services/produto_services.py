@@ -1,48 +1,304 @@
+from collections.abc import AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.database.database import SessionDep
+from app.config import settings
+from app.database.database import AsyncSessionDep, SessionDep
+from app.database.loaders import load_options
 from app.database.models import Produto
-from app.database.schemas import ProdutoCreate, ProdutoPublic, ProdutoUpdate
+from app.database.schemas import (
+    ImportErro,
+    ProdutoCreate,
+    ProdutoImportResult,
+    ProdutoPublic,
+    ProdutoUpdate,
+)
+from app.database.search import PRODUTO_BUSCA, get_backend
+from app.services.cache_version_services import bump_cache_version, get_cache_version
+from app.utils.cache import catalog_cache
+from app.utils.pagination import IdCursor, decode_cursor
 
+PRODUTO_COLUNAS = ('categoria', 'secao', 'preco', 'disponivel')
+# linha de cache_version do catalog_cache
+CATALOG_CACHE = 'catalog'
 
-def get_produtos(
-    db: SessionDep,
+
+def _produtos_stmt(  # noqa: PLR0913
     skip: int,
     limit: int,
     categoria: str | None,
     preco: float | None,
     disponivel: bool | None,
-) -> list[Produto]:
-    stmt = select(Produto)
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Produto]:
+    options = load_options(Produto, ProdutoPublic, fields)
+    stmt = select(Produto).options(*options).order_by(Produto.id)
+    if cursor:
+        stmt = stmt.where(Produto.id > decode_cursor(cursor, IdCursor).id)
     if categoria:
         stmt = stmt.filter(Produto.categoria == categoria)
     if preco:
         stmt = stmt.filter(Produto.preco == preco)
-    if disponivel:
-        stmt = stmt.filter(Produto.disp)
+    if disponivel is not None:
+        stmt = stmt.filter(Produto.disponivel == disponivel)
+
+    return stmt.offset(skip).limit(limit)
+
+
+def produto_cursor(produto: Produto) -> dict:
+    """Chave de ordenação usada na paginação por cursor dos produtos."""
+    return {'id': produto.id}
+
+
+def _produto_stmt(
+    produto_id: int,
+    fields: frozenset[str] | None = None,
+) -> SelectOfScalar[Produto]:
+    options = load_options(Produto, ProdutoPublic, fields)
+    return select(Produto).options(*options).filter(Produto.id == produto_id)
+
+
+def _produtos_by_ids_stmt(produtos_id: list[int]) -> SelectOfScalar[Produto]:
+    return select(Produto).where(Produto.id.in_(set(produtos_id)))
+
+
+def _search_produtos_stmt(
+    dialect: str,
+    termo: str,
+    skip: int,
+    limit: int,
+) -> SelectOfScalar[Produto]:
+    stmt = get_backend(dialect).search(select(Produto), PRODUTO_BUSCA, termo)
+    return stmt.offset(skip).limit(limit)
+
+
+def _apply_produto_update(produto_data: ProdutoUpdate, produto: Produto) -> None:
+    for key, value in produto_data.model_dump(exclude_unset=True).items():
+        setattr(produto, key, value)
+
+
+def catalog_version(db: SessionDep) -> int:
+    """Versão atual do catálogo, parte da chave das respostas em catalog_cache."""
+    return get_cache_version(db, CATALOG_CACHE)
 
-    produtos = db.exec(stmt.offset(skip).limit(limit))
 
-    return produtos
+def bump_catalog_version(db: SessionDep) -> None:
+    """Incrementa a versão do catálogo na transação da alteração, antes do commit."""
+    bump_cache_version(db, CATALOG_CACHE)
 
 
-def get_produto(db: SessionDep, produto_id: int) -> Produto:
-    return db.exec(select(Produto).filter(Produto.id == produto_id)).first()
+def get_produtos(
+    db: SessionDep,
+    skip: int,
+    limit: int,
+    categoria: str | None,
+    preco: float | None,
+    disponivel: bool | None,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Produto]:
+    stmt = _produtos_stmt(skip, limit, categoria, preco, disponivel, cursor, fields)
+    produtos = db.exec(stmt)
+
+    return produtos.all()
+
+
+def search_produtos(db: SessionDep, termo: str, skip: int, limit: int) -> list[Produto]:
+    """Busca produtos por categoria e seção, do mais para o menos relevante."""
+    stmt = _search_produtos_stmt(db.get_bind().dialect.name, termo, skip, limit)
+    return db.exec(stmt).all()
+
+
+def get_produto(db: SessionDep, produto_id: int, fields: frozenset[str] | None = None) -> Produto:
+    return db.exec(_produto_stmt(produto_id, fields)).first()
+
+
+def get_produtos_by_ids(db: SessionDep, produtos_id: list[int]) -> list[Produto]:
+    """Busca todos os produtos dos ids informados com um único WHERE id IN (...)."""
+    if not produtos_id:
+        return []
+    return db.exec(_produtos_by_ids_stmt(produtos_id)).all()
 
 
 def post_produto(db: SessionDep, produto_data: ProdutoCreate) -> Produto:
     db_produto = Produto.model_validate(produto_data)
     db.add(db_produto)
+    bump_catalog_version(db)
     db.commit()
+    catalog_cache.clear()
     db.refresh(db_produto)
     return db_produto
 
+
+def insert_produtos(db: SessionDep, rows: list[dict]) -> int:
+    """Insere um lote de produtos numa única transação.
+
+    No Postgres com psycopg o lote é enviado com COPY, nos demais bancos com um INSERT
+    executemany.
+    """
+    if not rows:
+        return 0
+    bind = db.get_bind()
+    if bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg':
+        cursor = db.connection().connection.cursor()
+        with cursor.copy(f'COPY produto ({", ".join(PRODUTO_COLUNAS)}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row([row[coluna] for coluna in PRODUTO_COLUNAS])
+    else:
+        db.exec(insert(Produto), params=rows)
+    bump_catalog_version(db)
+    db.commit()
+    catalog_cache.clear()
+    return len(rows)
+
+
+async def importar_produtos(
+    db: SessionDep,
+    registros: AsyncIterator[tuple[int, dict | None, str | None]],
+) -> ProdutoImportResult:
+    """Valida os registros com ProdutoCreate e os insere em lotes de IMPORT_CHUNK_SIZE.
+
+    Cada lote é gravado (e commitado) assim que completa, então a memória usada não depende
+    do tamanho da importação. Linhas inválidas são puladas e aparecem no relatório de erros.
+    """
+    inseridos = 0
+    rejeitados = 0
+    erros: list[ImportErro] = []
+    lote: list[dict] = []
+
+    def rejeita(linha: int, erro: str) -> None:
+        nonlocal rejeitados
+        rejeitados += 1
+        if len(erros) < settings.IMPORT_MAX_ERRORS:
+            erros.append(ImportErro(linha=linha, erro=erro))
+
+    async for linha, registro, erro in registros:
+        if erro:
+            rejeita(linha, erro)
+            continue
+        try:
+            produto = ProdutoCreate.model_validate(registro)
+        except ValidationError as exc:
+            rejeita(
+                linha,
+                '; '.join(f'{".".join(map(str, e["loc"]))}: {e["msg"]}' for e in exc.errors()),
+            )
+            continue
+        lote.append(produto.model_dump(include=set(PRODUTO_COLUNAS)))
+        if len(lote) >= settings.IMPORT_CHUNK_SIZE:
+            inseridos += await run_in_threadpool(insert_produtos, db, lote)
+            lote = []
+
+    inseridos += await run_in_threadpool(insert_produtos, db, lote)
+
+    return ProdutoImportResult(inseridos=inseridos, rejeitados=rejeitados, erros=erros)
+
+
 def update_produto(db: SessionDep, produto_data: ProdutoUpdate, produto: Produto) -> Produto:
-    for key, value in produto_data.model_dump(exclude_unset=True).items():
-        setattr(produto, key, value)
+    _apply_produto_update(produto_data, produto)
 
     db.add(produto)
+    bump_catalog_version(db)
     db.commit()
+    catalog_cache.clear()
     db.refresh(produto)
 
-    return produto
\ No newline at end of file
+    return produto
+
+
+def delete_produto(db: SessionDep, produto: Produto) -> None:
+    db.delete(produto)
+    bump_catalog_version(db)
+    db.commit()
+    catalog_cache.clear()
+
+
+# ------------------------------------------------------------------------------------------------
+# Versões assíncronas
+
+
+async def get_produtos_async(  # noqa: PLR0913
+    db: AsyncSessionDep,
+    skip: int,
+    limit: int,
+    categoria: str | None,
+    preco: float | None,
+    disponivel: bool | None,
+    cursor: str | None = None,
+    fields: frozenset[str] | None = None,
+) -> list[Produto]:
+    stmt = _produtos_stmt(skip, limit, categoria, preco, disponivel, cursor, fields)
+    return (await db.exec(stmt)).all()
+
+
+async def search_produtos_async(
+    db: AsyncSessionDep,
+    termo: str,
+    skip: int,
+    limit: int,
+) -> list[Produto]:
+    stmt = _search_produtos_stmt(db.get_bind().dialect.name, termo, skip, limit)
+    return (await db.exec(stmt)).all()
+
+
+async def get_produto_async(
+    db: AsyncSessionDep,
+    produto_id: int,
+    fields: frozenset[str] | None = None,
+) -> Produto:
+    return (await db.exec(_produto_stmt(produto_id, fields))).first()
+
+
+async def get_produtos_by_ids_async(db: AsyncSessionDep, produtos_id: list[int]) -> list[Produto]:
+    if not produtos_id:
+        return []
+    return (await db.exec(_produtos_by_ids_stmt(produtos_id))).all()
+
+
+async def post_produto_async(db: AsyncSessionDep, produto_data: ProdutoCreate) -> Produto:
+    db_produto = Produto.model_validate(produto_data)
+    db.add(db_produto)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    catalog_cache.clear()
+    await db.refresh(db_produto)
+    return db_produto
+
+
+async def insert_produtos_async(db: AsyncSessionDep, rows: list[dict]) -> int:
+    """Insere um lote de produtos numa única transação, com um INSERT executemany."""
+    if not rows:
+        return 0
+    await db.exec(insert(Produto), params=rows)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    catalog_cache.clear()
+    return len(rows)
+
+
+async def update_produto_async(
+    db: AsyncSessionDep,
+    produto_data: ProdutoUpdate,
+    produto: Produto,
+) -> Produto:
+    _apply_produto_update(produto_data, produto)
+
+    db.add(produto)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    catalog_cache.clear()
+    await db.refresh(produto)
+
+    return produto
+
+
+async def delete_produto_async(db: AsyncSessionDep, produto: Produto) -> None:
+    await db.delete(produto)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    catalog_cache.clear()
@@ -1,9 +1,46 @@
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.database.database import SessionDep
+from app.database.database import AsyncSessionDep, SessionDep
+from app.database.enums import Role
 from app.database.models import Usuario
 from app.database.schemas import UsuarioCreate
-from app.utils.auth_utils import get_password_hash
+from app.services.cache_version_services import bump_cache_version, get_cache_version
+from app.utils.auth_utils import get_password_hash, get_password_hash_async
+
+# linha de cache_version do principal_cache
+PRINCIPAL_CACHE = 'principal'
+
+
+def _usuario_stmt(usuario_id: int) -> SelectOfScalar[Usuario]:
+    return select(Usuario).filter(Usuario.id == usuario_id)
+
+
+def _usuario_by_email_stmt(email: str) -> SelectOfScalar[Usuario]:
+    return select(Usuario).filter(Usuario.email == email)
+
+
+def _build_usuario(usuario: UsuarioCreate, senha_hash: str) -> Usuario:
+    return Usuario(
+        email=str(usuario.email),
+        nome=usuario.nome,
+        role=usuario.role,
+        senha=senha_hash,
+    )
+
+
+def principal_version(db: SessionDep) -> int:
+    """Versão atual dos usuários, parte da chave dos usuários autenticados em principal_cache."""
+    return get_cache_version(db, PRINCIPAL_CACHE)
+
+
+def bump_principal_version(db: SessionDep) -> None:
+    """Incrementa a versão dos usuários na transação da alteração, antes do commit.
+
+    Uma mudança de papel ou remoção passa a valer em todos os processos assim que é commitada,
+    sem esperar o PRINCIPAL_CACHE_TTL.
+    """
+    bump_cache_version(db, PRINCIPAL_CACHE)
 
 
 def get_usuarios(db: SessionDep) -> list[Usuario]:
@@ -11,28 +48,79 @@ def get_usuarios(db: SessionDep) -> list[Usuario]:
 
 
 def get_usuario(db: SessionDep, usuario_id: int) -> Usuario:
-    return db.exec((Usuario).filter(Usuario.id == usuario_id)).first()
+    return db.exec(_usuario_stmt(usuario_id)).first()
 
 
 def get_usuario_by_email(db: SessionDep, email: str) -> Usuario:
-    return db.exec(select(Usuario).filter(Usuario.email == email)).first()
+    return db.exec(_usuario_by_email_stmt(email)).first()
 
 
-def post_usuario(db: SessionDep, usuario: UsuarioCreate) -> Usuario:
-    db_usuario = Usuario(
-        email=str(usuario.email),
-        nome=usuario.nome,
-        role=usuario.role,
-        senha=get_password_hash(usuario.senha),
-    )
+def post_usuario(
+    db: SessionDep,
+    usuario: UsuarioCreate,
+    senha_hash: str | None = None,
+) -> Usuario:
+    """Registra o usuário, senha_hash evita recalcular o bcrypt quando já foi gerado."""
+    db_usuario = _build_usuario(usuario, senha_hash or get_password_hash(usuario.senha))
     db.add(db_usuario)
     db.commit()
     db.refresh(db_usuario)
     return db_usuario
 
 
-def delete_usuario(db: SessionDep, usuario_id: int) -> None:
-    db_usuario = get_usuario(db, usuario_id)
-    if db_usuario:
-        db.delete(db_usuario)
-        db.commit()
+def update_usuario_role(db: SessionDep, usuario: Usuario, role: Role) -> Usuario:
+    usuario.role = role
+    db.add(usuario)
+    bump_principal_version(db)
+    db.commit()
+    db.refresh(usuario)
+    return usuario
+
+
+def delete_usuario(db: SessionDep, usuario: Usuario) -> None:
+    db.delete(usuario)
+    bump_principal_version(db)
+    db.commit()
+
+
+# ------------------------------------------------------------------------------------------------
+# Versões assíncronas
+
+
+async def get_usuarios_async(db: AsyncSessionDep) -> list[Usuario]:
+    return (await db.exec(select(Usuario))).all()
+
+
+async def get_usuario_async(db: AsyncSessionDep, usuario_id: int) -> Usuario:
+    return (await db.exec(_usuario_stmt(usuario_id))).first()
+
+
+async def get_usuario_by_email_async(db: AsyncSessionDep, email: str) -> Usuario:
+    return (await db.exec(_usuario_by_email_stmt(email))).first()
+
+
+async def post_usuario_async(db: AsyncSessionDep, usuario: UsuarioCreate) -> Usuario:
+    db_usuario = _build_usuario(usuario, await get_password_hash_async(usuario.senha))
+    db.add(db_usuario)
+    await db.commit()
+    await db.refresh(db_usuario)
+    return db_usuario
+
+
+async def principal_version_async(db: AsyncSessionDep) -> int:
+    return await db.run_sync(principal_version)
+
+
+async def update_usuario_role_async(db: AsyncSessionDep, usuario: Usuario, role: Role) -> Usuario:
+    usuario.role = role
+    db.add(usuario)
+    await db.run_sync(bump_principal_version)
+    await db.commit()
+    await db.refresh(usuario)
+    return usuario
+
+
+async def delete_usuario_async(db: AsyncSessionDep, usuario: Usuario) -> None:
+    await db.delete(usuario)
+    await db.run_sync(bump_principal_version)
+    await db.commit()
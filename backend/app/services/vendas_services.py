@@ -0,0 +1,177 @@
+"""Resumo de vendas (tabela venda_diaria) mantido incrementalmente.
+
+Cada pedido contribui com uma linha por (seção, categoria) dos seus produtos no dia de
+`data_inicio` e no seu status. Os services de pedido aplicam a contribuição na mesma
+transação que grava o pedido: +1 ao criar, -1/+1 quando o status ou a data mudam e -1 ao
+deletar. A receita usa o preço do produto quando o pedido é registrado, se os preços mudarem
+ou produtos forem removidos o resumo pode ser recalculado com:
+
+    python -m app.services.vendas_services
+"""
+
+from datetime import date
+
+from sqlalchemy import Connection, delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.enums import PedidoStatus
+from app.database.models import Pedido, PedidoProduto, Produto, VendaDiaria
+
+_CHAVE = ('dia', 'secao', 'categoria', 'status')
+_VALORES = ('pedidos', 'itens', 'receita')
+
+
+def _upsert_stmt(dialect: str) -> object:
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[dialect]
+    stmt = dialect_insert(VendaDiaria)
+    return stmt.on_conflict_do_update(
+        index_elements=list(_CHAVE),
+        set_={
+            coluna: getattr(VendaDiaria, coluna) + getattr(stmt.excluded, coluna)
+            for coluna in _VALORES
+        },
+    )
+
+
+def _contribuicao(db: Session, pedido_id: int) -> list[tuple[str, str, int, float]]:
+    """Itens e receita do pedido agrupados por seção e categoria dos produtos."""
+    stmt = (
+        select(Produto.secao, Produto.categoria, func.count(), func.sum(Produto.preco))
+        .join(PedidoProduto, PedidoProduto.produto_id == Produto.id)
+        .where(PedidoProduto.pedido_id == pedido_id)
+        .group_by(Produto.secao, Produto.categoria)
+    )
+    return db.execute(stmt).all()
+
+
+def aplicar_vendas(
+    db: Session,
+    contribuicao: list[tuple[str, str, int, float]],
+    dia: date,
+    status: PedidoStatus,
+    sinal: int,
+) -> None:
+    """Soma (sinal=1) ou subtrai (sinal=-1) a contribuição de um pedido no resumo.
+
+    Args:
+    ----
+        db (Session): sessão da transação que grava o pedido.
+        contribuicao (list): linhas (seção, categoria, itens, receita) de _contribuicao.
+        dia (date): data de início do pedido.
+        status (PedidoStatus): status do pedido.
+        sinal (int): 1 para somar, -1 para subtrair.
+
+    """
+    if not contribuicao:
+        return
+    rows = [
+        {
+            'dia': dia,
+            'secao': secao,
+            'categoria': categoria,
+            'status': status,
+            'pedidos': sinal,
+            'itens': sinal * itens,
+            'receita': sinal * (receita or 0.0),
+        }
+        for secao, categoria, itens, receita in contribuicao
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        db.execute(_upsert_stmt(dialect), rows)
+    else:
+        for row in rows:
+            chave = [getattr(VendaDiaria, coluna) == row[coluna] for coluna in _CHAVE]
+            venda = db.execute(select(VendaDiaria).where(*chave)).scalar_one_or_none()
+            if venda is None:
+                db.add(VendaDiaria(**row))
+            else:
+                for coluna in _VALORES:
+                    setattr(venda, coluna, getattr(venda, coluna) + row[coluna])
+    if sinal < 0:
+        db.execute(
+            delete(VendaDiaria).where(
+                VendaDiaria.dia == dia,
+                VendaDiaria.status == status,
+                VendaDiaria.pedidos <= 0,
+            ),
+        )
+
+
+def registrar_venda(db: Session, pedido: Pedido) -> None:
+    """Soma um pedido recém criado (já com os produtos inseridos) no resumo."""
+    aplicar_vendas(db, _contribuicao(db, pedido.id), pedido.data_inicio, pedido.status, 1)
+
+
+def mover_venda(
+    db: Session,
+    pedido: Pedido,
+    dia_anterior: date,
+    status_anterior: PedidoStatus,
+) -> None:
+    """Move a contribuição do pedido quando a data de início ou o status mudam."""
+    if (dia_anterior, status_anterior) == (pedido.data_inicio, pedido.status):
+        return
+    contribuicao = _contribuicao(db, pedido.id)
+    aplicar_vendas(db, contribuicao, dia_anterior, status_anterior, -1)
+    aplicar_vendas(db, contribuicao, pedido.data_inicio, pedido.status, 1)
+
+
+def remover_venda(db: Session, pedido: Pedido) -> None:
+    """Subtrai do resumo um pedido que será deletado."""
+    aplicar_vendas(db, _contribuicao(db, pedido.id), pedido.data_inicio, pedido.status, -1)
+
+
+def reconstruir_vendas(db: Session | Connection) -> None:
+    """Recalcula todo o resumo a partir de pedido, pedido_produto e produto (backfill)."""
+    db.execute(delete(VendaDiaria))
+    db.execute(
+        insert(VendaDiaria).from_select(
+            [*_CHAVE, *_VALORES],
+            select(
+                Pedido.data_inicio,
+                Produto.secao,
+                Produto.categoria,
+                Pedido.status,
+                func.count(func.distinct(Pedido.id)),
+                func.count(),
+                func.sum(Produto.preco),
+            )
+            .join(PedidoProduto, PedidoProduto.pedido_id == Pedido.id)
+            .join(Produto, PedidoProduto.produto_id == Produto.id)
+            .group_by(Pedido.data_inicio, Produto.secao, Produto.categoria, Pedido.status),
+        ),
+    )
+
+
+def get_vendas(  # noqa: PLR0913
+    db: SessionDep,
+    data_inicio: date | None,
+    data_fim: date | None,
+    secao: str | None,
+    categoria: str | None,
+    status: PedidoStatus | None,
+) -> list[VendaDiaria]:
+    stmt = select(VendaDiaria).order_by(*[getattr(VendaDiaria, coluna) for coluna in _CHAVE])
+    if data_inicio:
+        stmt = stmt.where(VendaDiaria.dia >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(VendaDiaria.dia <= data_fim)
+    if secao:
+        stmt = stmt.where(VendaDiaria.secao == secao)
+    if categoria:
+        stmt = stmt.where(VendaDiaria.categoria == categoria)
+    if status:
+        stmt = stmt.where(VendaDiaria.status == status)
+    return db.exec(stmt).all()
+
+
+if __name__ == '__main__':
+    from app.database.database import engine
+
+    with engine.begin() as connection:
+        reconstruir_vendas(connection)
+    print('resumo de vendas reconstruído')  # noqa: T201
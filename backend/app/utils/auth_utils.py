@@ -1,10 +1,173 @@
-from bcrypt import hashpw, gensalt, checkpw
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 
-def get_password_hash(password: str) -> str:
-    return hashpw(password.encode("utf-8"), gensalt()).decode("utf-8")
+from bcrypt import checkpw, gensalt, hashpw
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+from app.config import settings
+
+
+class HashingQueueFullError(RuntimeError):
+    """Lançada quando a fila do executor de hashing está cheia."""
+
+
+def _hash(password: str) -> str:
+    return hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
+
+
+def _check(plain_password: str, hashed_password: str) -> bool:
     try:
-        return checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+        return checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+
+def _timed(fn: Callable, *args: str) -> tuple[float, object]:
+    """Executa fn no worker e retorna o instante em que a execução começou."""
+    return time.time(), fn(*args)
+
+
+class HashingExecutor:
+    """Pool limitado que executa o bcrypt fora do event loop.
+
+    O número de tarefas aceitas é limitado a `max_workers + max_queue`. Ao passar desse limite
+    a submissão é rejeitada com HashingQueueFullError, assim uma rajada de logins não acumula
+    trabalho indefinidamente nem disputa o threadpool usado pelas demais rotas.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, kind: str = 'thread') -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='hashing',
+                )
+        return self._executor
+
+    def submit(self, fn: Callable, *args: str) -> Future:
+        """Agenda `fn(*args)` no executor.
+
+        Args:
+        ----
+            fn (Callable): função de hashing, executada em outra thread ou processo.
+            *args (str): argumentos de `fn`.
+
+        Returns:
+        -------
+            Future: resultado de `fn`, o tempo de espera na fila vai para as métricas.
+
+        Raises:
+        ------
+            HashingQueueFullError: quando já há `max_workers + max_queue` tarefas aceitas.
+
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            msg = 'fila de hashing cheia'
+            raise HashingQueueFullError(msg)
+
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+        enqueued_at = time.time()
+        result: Future = Future()
+
+        def done(inner: Future) -> None:
+            self._slots.release()
+            with self._lock:
+                self.pending -= 1
+                if not inner.cancelled():
+                    self.completed += 1
+            # cancelada pelo shutdown ainda na fila: inner.exception() levantaria CancelledError
+            # aqui e quem espera `result` ficaria bloqueado para sempre
+            if inner.cancelled():
+                result.cancel()
+                return
+            exc = inner.exception()
+            if exc is not None:
+                result.set_exception(exc)
+                return
+            started_at, value = inner.result()
+            wait = max(started_at - enqueued_at, 0.0)
+            with self._lock:
+                self.wait_seconds_total += wait
+                self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            result.set_result(value)
+
+        self._get_executor().submit(_timed, fn, *args).add_done_callback(done)
+        return result
+
+    def run(self, fn: Callable, *args: str) -> object:
+        """Executa `fn(*args)` no executor e espera o resultado, bloqueando a thread atual."""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args: str) -> object:
+        """Executa `fn(*args)` no executor e aguarda o resultado sem bloquear o event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def metrics(self) -> dict:
+        """Fila, tarefas em execução, rejeições e tempo de espera das submissões."""
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_depth': max(self.pending - self.max_workers, 0),
+                'in_flight': self.pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': (
+                    self.wait_seconds_total / self.completed if self.completed else 0.0
+                ),
+            }
+
+    def shutdown(self) -> None:
+        """Encerra o executor, cancelando as tarefas ainda na fila."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_executor = HashingExecutor(
+    max_workers=settings.HASH_EXECUTOR_WORKERS,
+    max_queue=settings.HASH_EXECUTOR_MAX_QUEUE,
+    kind=settings.HASH_EXECUTOR_KIND,
+)
+
+
+def get_password_hash(password: str) -> str:
+    return hashing_executor.run(_hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return hashing_executor.run(_check, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_executor.run_async(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_executor.run_async(_check, plain_password, hashed_password)
@@ -0,0 +1,29 @@
+from typing import Protocol, TypeVar
+
+
+class HasId(Protocol):
+    id: int | None
+
+
+T = TypeVar('T', bound=HasId)
+
+
+def batch_result(ids: list[int], items: list[T]) -> dict:
+    """Monta a resposta das rotas batch-get.
+
+    Args:
+    ----
+        ids (list[int]): ids pedidos, na ordem da requisição (repetições são ignoradas).
+        items (list): registros encontrados pela consulta IN, em qualquer ordem.
+
+    Returns:
+    -------
+        dict: `items` na ordem dos ids pedidos e `missing` com os ids não encontrados.
+
+    """
+    por_id = {item.id: item for item in items}
+    pedidos = list(dict.fromkeys(ids))
+    return {
+        'items': [por_id[item_id] for item_id in pedidos if item_id in por_id],
+        'missing': [item_id for item_id in pedidos if item_id not in por_id],
+    }
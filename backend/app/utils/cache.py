@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from app.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU em memória com tempo de expiração por entrada.
+
+    As entradas mais antigas são descartadas ao atingir `max_size` e as expiradas são
+    ignoradas (e removidas) na leitura. Os contadores de hits, misses e evictions ficam
+    disponíveis em `metrics()`.
+
+    `generation` muda a cada `invalidate()` e `clear()`. Quem calcula um valor a partir do
+    banco pode passar a geração lida antes da consulta para `set`, assim o resultado de uma
+    leitura concorrente com uma invalidação não volta para o cache.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        """Retorna o valor da chave, ou `default` quando ausente ou expirado."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: object,
+        ttl: float | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """Guarda o valor por `ttl` segundos (o TTL do cache por padrão).
+
+        Com `generation`, o valor é descartado se o cache foi invalidado depois que essa
+        geração foi lida.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a chave e muda a geração do cache."""
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas e muda a geração do cache."""
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def metrics(self) -> dict:
+        """Tamanho, hits, misses, evictions e taxa de acerto."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+# Usuários autenticados, indexados pelo email (sub do token)
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+# Respostas do catálogo de produtos (listagens e detalhes), limpo a cada alteração de produto
+catalog_cache = TTLCache(
+    max_size=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL,
+)
+
+# Totais das listagens (X-Total-Count no modo cached), só expiram pelo TTL
+count_cache = TTLCache(
+    max_size=settings.TOTAL_COUNT_CACHE_MAX_SIZE,
+    ttl=settings.TOTAL_COUNT_CACHE_TTL,
+)
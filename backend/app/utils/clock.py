@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """Instante atual em UTC, sem fuso (como é gravado no banco)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
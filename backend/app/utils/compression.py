@@ -0,0 +1,235 @@
+"""Compressão das respostas HTTP (gzip, e brotli ou zstd quando instalados).
+
+O algoritmo é negociado pelo header Accept-Encoding, seguindo a ordem de preferência de
+COMPRESSION_ENCODINGS. brotli e zstd são opcionais: sem os pacotes `brotli` e `zstandard`
+instalados apenas o gzip é oferecido.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+# Tipos de conteúdo comprimidos, os demais (imagens, arquivos já comprimidos) passam direto
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/ndjson',
+    'application/problem+json',
+)
+
+
+class Compressor(ABC):
+    """Interface comum dos algoritmos: cada pedaço do corpo é comprimido e liberado."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Comprime um pedaço e retorna os bytes que já podem ser enviados (com flush)."""
+
+    @abstractmethod
+    def finish(self, data: bytes) -> bytes:
+        """Comprime o último pedaço e fecha o stream."""
+
+
+class GzipCompressor(Compressor):
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Comprime com Z_SYNC_FLUSH, o cliente consegue descomprimir o que já recebeu."""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        """Comprime o último pedaço e escreve o rodapé do gzip."""
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        """Comprime e libera o bloco atual do brotli."""
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        """Comprime o último pedaço e fecha o stream brotli."""
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self) -> None:
+        compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL)
+        self._compressor = compressor.compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        """Comprime e fecha o bloco atual do frame zstd."""
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK,
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        """Comprime o último pedaço e fecha o frame zstd."""
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> dict[str, Callable[[], Compressor]]:
+    """Algoritmos disponíveis neste ambiente, pelo nome usado no Content-Encoding."""
+    encodings: dict[str, Callable[[], Compressor]] = {'gzip': GzipCompressor}
+    if brotli is not None:
+        encodings['br'] = BrotliCompressor
+    if zstandard is not None:
+        encodings['zstd'] = ZstdCompressor
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Escolhe o algoritmo a partir do Accept-Encoding do cliente.
+
+    Args:
+    ----
+        accept_encoding (str): valor do header, ex.: 'gzip, br;q=0.9, *;q=0'.
+        encodings (list[str]): algoritmos do servidor em ordem de preferência.
+
+    Returns:
+    -------
+        str | None: algoritmo escolhido ou None quando o cliente não aceita nenhum.
+
+    """
+    pesos = {}
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.strip().partition(';')
+        peso = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith('q='):
+            try:
+                peso = float(parametro[2:])
+            except ValueError:
+                peso = 0.0
+        if nome:
+            pesos[nome.strip().lower()] = peso
+
+    aceitos = [encoding for encoding in encodings if pesos.get(encoding, pesos.get('*', 0.0)) > 0]
+    if not aceitos:
+        return None
+    # entre os aceitos, o maior q do cliente vence, empates seguem a ordem do servidor
+    return max(aceitos, key=lambda encoding: pesos.get(encoding, pesos.get('*', 0.0)))
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get('content-type', '').lower()
+    return 'content-encoding' not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _CompressionResponder:
+    """Estado da compressão de uma resposta: segura o início até ver o primeiro pedaço."""
+
+    def __init__(self, send: Send, compressor: Callable[[], Compressor], encoding: str) -> None:
+        self.send = send
+        self.compressor_factory = compressor
+        self.encoding = encoding
+        self.start_message: Message | None = None
+        self.compressor: Compressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        """Recebe cada mensagem enviada pela aplicação."""
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+        elif message['type'] != 'http.response.body' or self.passthrough:
+            await self.send(message)
+        elif self.compressor is None:
+            await self.first_chunk(message)
+        else:
+            more_body = message.get('more_body', False)
+            await self.send_chunk(message.get('body', b''), more_body=more_body)
+
+    async def first_chunk(self, message: Message) -> None:
+        """Decide pelo primeiro pedaço se a resposta é comprimida e envia o início."""
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        headers = MutableHeaders(scope=self.start_message)
+        if not _compressible(headers) or (
+            not more_body and len(body) < settings.COMPRESSION_MIN_SIZE
+        ):
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        self.compressor = self.compressor_factory()
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+        if more_body:
+            del headers['Content-Length']
+            await self.send(self.start_message)
+            await self.send_chunk(body, more_body=True)
+            return
+        body = self.compressor.finish(body)
+        headers['Content-Length'] = str(len(body))
+        await self.send(self.start_message)
+        await self.send({'type': 'http.response.body', 'body': body})
+
+    async def send_chunk(self, body: bytes, *, more_body: bool) -> None:
+        """Envia um pedaço do streaming já comprimido."""
+        if not more_body:
+            await self.send({'type': 'http.response.body', 'body': self.compressor.finish(body)})
+            return
+        data = self.compressor.compress(body)
+        if data:
+            await self.send({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+    async def finish(self) -> None:
+        """Envia o início de respostas que terminaram sem nenhuma mensagem de corpo."""
+        if self.start_message is not None and self.compressor is None and not self.passthrough:
+            await self.send(self.start_message)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas maiores que COMPRESSION_MIN_SIZE.
+
+    Respostas em streaming (mais de uma mensagem de corpo) são comprimidas pedaço a pedaço,
+    sem esperar o corpo inteiro. O ETag de uma resposta comprimida passa a ser fraco, já que
+    os bytes enviados mudam com o algoritmo.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.encoders = available_encodings()
+        self.encodings = [
+            encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in self.encoders
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Negocia o algoritmo e envolve o `send` da aplicação com o compressor."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get('accept-encoding', '')
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, self.encoders[encoding], encoding)
+        await self.app(scope, receive, responder)
+        await responder.finish()
@@ -0,0 +1,99 @@
+"""Sparse fieldsets: o parâmetro ?fields= das rotas de listagem e detalhe.
+
+`?fields=id,status,cliente` limita a resposta aos campos informados (o `id` sempre vem). Os
+services usam os mesmos campos em `load_options`, que lê só essas colunas e não carrega as
+relações fora da lista.
+"""
+
+from functools import cache
+from typing import Annotated
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, create_model
+
+from app.utils.serialization import json_response, to_json
+
+FieldsQuery = Annotated[
+    str | None,
+    Query(description='Campos da resposta separados por vírgula, ex.: id,status'),
+]
+
+
+def parse_fields(schema: type[BaseModel], fields: str | None) -> frozenset[str] | None:
+    """Valida o ?fields= contra os campos do schema.
+
+    Args:
+    ----
+        schema (type[BaseModel]): schema de resposta da rota.
+        fields (str | None): valor do parâmetro, campos separados por vírgula.
+
+    Returns:
+    -------
+        frozenset[str] | None: campos pedidos mais o id, None quando o parâmetro não veio.
+
+    Raises:
+    ------
+        HTTPException: 400 com os campos que não existem no schema.
+
+    """
+    if fields is None:
+        return None
+    campos = frozenset(campo.strip() for campo in fields.split(',') if campo.strip())
+    invalidos = sorted(campos - schema.model_fields.keys())
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'campos inválidos: {", ".join(invalidos)}',
+        )
+    return campos | {'id'}
+
+
+@cache
+def sparse_schema(schema: type[BaseModel], fields: frozenset[str]) -> type[BaseModel]:
+    """Schema só com os campos pedidos, criado uma vez por combinação de campos."""
+    return create_model(
+        f'{schema.__name__}Parcial',
+        **{
+            nome: (campo.annotation, campo)
+            for nome, campo in schema.model_fields.items()
+            if nome in fields
+        },
+    )
+
+
+def response_schema(schema: type[BaseModel], fields: frozenset[str] | None) -> type[BaseModel]:
+    """Schema da resposta: o parcial com ?fields=, ou o próprio schema sem o parâmetro."""
+    return schema if fields is None else sparse_schema(schema, fields)
+
+
+def sparse_response(
+    schema: type[BaseModel],
+    fields: frozenset[str] | None,
+    content: object,
+    response: Response,
+    *,
+    many: bool,
+) -> Response | object:
+    """Serializa `content` com os campos pedidos, ou com o schema inteiro sem ?fields=.
+
+    Args:
+    ----
+        schema (type[BaseModel]): schema de resposta da rota.
+        fields (frozenset[str] | None): retorno de parse_fields.
+        content (object): model ou lista de models retornados pelos services.
+        response (Response): resposta injetada na rota, os headers são copiados.
+        many (bool): se `content` é uma lista.
+
+    Returns:
+    -------
+        Response | object: resposta JSON pronta ou o próprio conteúdo (ver json_response).
+
+    """
+    if fields is None:
+        return json_response(list[schema] if many else schema, content, response)
+    parcial = sparse_schema(schema, fields)
+    return Response(
+        to_json(list[parcial] if many else parcial, content),
+        media_type='application/json',
+        headers=dict(response.headers),
+    )
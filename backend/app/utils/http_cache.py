@@ -0,0 +1,61 @@
+import hashlib
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response, status
+
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def make_etag(body: bytes) -> str:
+    """ETag forte calculado a partir do corpo da resposta."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compara o header If-None-Match com o ETag (comparação fraca, como pede a RFC 9110)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+def cached_response(
+    request: Request,
+    cache: TTLCache,
+    key: Hashable,
+    render: Callable[[], tuple[bytes, dict[str, str]]],
+) -> Response:
+    """Responde com o corpo em cache (ou renderizado agora) e trata o If-None-Match.
+
+    Args:
+    ----
+        request (Request): requisição, de onde é lido o If-None-Match.
+        cache (TTLCache): cache das respostas.
+        key (Hashable): chave da resposta no cache (rota e parâmetros).
+        render (Callable): consulta o banco e retorna (corpo JSON, headers extras). Exceções,
+            como o HTTPException de um 404, não são guardadas.
+
+    Returns:
+    -------
+        Response: 200 com o corpo JSON ou 304 sem corpo quando o ETag confere.
+
+    """
+    generation = cache.generation
+    entry = cache.get(key)
+    if entry is None:
+        body, headers = render()
+        entry = CachedResponse(body, make_etag(body), headers)
+        cache.set(key, entry, generation=generation)
+
+    headers = {**entry.headers, 'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type='application/json', headers=headers)
@@ -0,0 +1,305 @@
+"""Métricas no formato texto do Prometheus.
+
+Implementação enxuta de Counter, Gauge e Histogram com labels, sem dependências externas. Os
+valores ficam em memória no processo, cada worker do uvicorn expõe as suas métricas.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.database import track_queries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """Métrica com nome, documentação e labels; as subclasses definem `kind` e `render`."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        """Linhas # HELP e # TYPE da métrica."""
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Linhas com os valores da métrica, uma por combinação de labels."""
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        """Soma `amount` ao valor dos labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        """Valor atual dos labels, 0 quando ainda não registrado."""
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        """Uma linha por combinação de labels."""
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        """Subtrai `amount` do valor dos labels."""
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple = (), value: float = 0) -> None:
+        """Substitui o valor dos labels."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), float('inf'))
+        # por label: contagem de cada bucket (não cumulativa), soma e total
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        """Registra uma observação no bucket correspondente."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            item = self._values.get(labels)
+            if item is None:
+                item = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            item[0][index] += 1
+            item[1] += value
+            item[2] += 1
+
+    def count(self, labels: tuple) -> int:
+        """Número de observações dos labels."""
+        item = self._values.get(labels)
+        return item[2] if item else 0
+
+    def render(self) -> list[str]:
+        """Buckets cumulativos, soma e total de cada combinação de labels."""
+        with self._lock:
+            items = [
+                (labels, list(item[0]), item[1], item[2]) for labels, item in self._values.items()
+            ]
+        lines = []
+        for labels, counts, total_sum, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}',
+                )
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total_sum)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {total}')
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas e coletores expostos em /metrics.
+
+    Coletores são funções chamadas a cada scrape que retornam {nome: valor} de gauges lidos de
+    outros componentes (pool de conexões, caches, executor de hashing). Um coletor com labels
+    retorna {labels: {nome: valor}}, uma série por instância (ex.: um pool por engine).
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+        self._collectors: list[tuple[str, str, tuple[str, ...], Callable[[], dict]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Adiciona uma métrica ao registro e a retorna."""
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(
+        self,
+        prefix: str,
+        documentation: str,
+        collect: Callable[[], dict],
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        """Adiciona um coletor, cada valor numérico vira o gauge `<prefix>_<chave>`.
+
+        Com `labelnames`, `collect` retorna {labels: {chave: valor}} e cada gauge tem uma série
+        por labels.
+        """
+        self._collectors.append((prefix, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        """Todas as métricas e coletores no formato texto do Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        for prefix, documentation, labelnames, collect in self._collectors:
+            series = collect() if labelnames else {(): collect()}
+            # as séries de um mesmo gauge ficam juntas, sob um único # HELP e # TYPE
+            gauges: dict[str, list[str]] = {}
+            for labels, values in series.items():
+                for key, value in values.items():
+                    if isinstance(value, bool) or not isinstance(value, int | float):
+                        continue
+                    name = f'{prefix}_{key}'
+                    gauges.setdefault(name, []).append(
+                        f'{name}{_labels(labelnames, labels)} {_number(value)}',
+                    )
+            for name, samples in gauges.items():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests_total = registry.register(
+    Counter(
+        'http_requests_total',
+        'Total de requisições HTTP por rota e status.',
+        ('method', 'path', 'status'),
+    ),
+)
+http_request_duration_seconds = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'Latência das requisições HTTP por rota.',
+        ('method', 'path'),
+    ),
+)
+http_requests_in_progress = registry.register(
+    Gauge(
+        'http_requests_in_progress',
+        'Requisições HTTP em andamento.',
+        ('method',),
+    ),
+)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra latência, status e requisições em andamento por rota.
+
+    A rota é identificada pelo path do template (ex.: /orders/{id}), assim o número de séries
+    não cresce com os ids requisitados. Requisições sem rota correspondente são agrupadas em
+    `<unmatched>`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Repassa a requisição ao app e registra a rota, o status e a duração."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+        start = time.perf_counter()
+        http_requests_in_progress.inc((method,))
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_progress.dec((method,))
+            route = scope.get('route')
+            path = getattr(route, 'path', '<unmatched>')
+            http_request_duration_seconds.observe((method, path), elapsed)
+            http_requests_total.inc((method, path, str(status_code)))
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI que conta as consultas SQL de cada requisição.
+
+    Adiciona os headers `X-DB-Query-Count` e `X-DB-Time-Ms` à resposta. Em respostas em
+    streaming, as consultas feitas durante o envio do corpo ficam fora dos headers, mas entram
+    no log da requisição.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Repassa a requisição ao app contando as consultas feitas até os headers."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message['type'] == 'http.response.start':
+                    headers = MutableHeaders(scope=message)
+                    headers['X-DB-Query-Count'] = str(stats.count)
+                    headers['X-DB-Time-Ms'] = f'{stats.seconds * 1000:.2f}'
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        logger.debug(
+            '%s %s: %d consultas, %.2f ms no banco',
+            scope['method'],
+            scope['path'],
+            stats.count,
+            stats.seconds * 1000,
+        )
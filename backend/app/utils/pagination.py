@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from datetime import date
+from typing import TypeVar
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict
+
+# Header com o cursor da próxima página
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(values: dict) -> str:
+    """Gera um cursor opaco a partir dos valores da chave de ordenação do último item."""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+class IdCursor(BaseModel):
+    """Cursor das listagens ordenadas pelo id (clientes e produtos)."""
+
+    model_config = ConfigDict(extra='forbid', strict=True)
+
+    id: int
+
+
+class PedidoCursor(IdCursor):
+    """Cursor da listagem de pedidos, ordenada pela data de início e pelo id."""
+
+    data_inicio: date
+
+
+C = TypeVar('C', bound=BaseModel)
+
+
+def decode_cursor(cursor: str, shape: type[C]) -> C:
+    """Decodifica e valida um cursor gerado por encode_cursor.
+
+    Args:
+    ----
+        cursor (str): cursor recebido na query.
+        shape (type[BaseModel]): modelo com as chaves e os tipos esperados no cursor.
+
+    Returns:
+    -------
+        BaseModel: valores da chave de ordenação.
+
+    Raises:
+    ------
+        HTTPException: 400 quando o cursor não é um base64/JSON válido ou não segue o modelo.
+
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return shape.model_validate_json(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='cursor inválido')
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence,
+    limit: int,
+    key: Callable[[object], dict],
+) -> Sequence:
+    """Adiciona o header X-Next-Cursor quando a página veio completa.
+
+    Args:
+    ----
+        response (Response): resposta da rota.
+        items (Sequence): itens da página atual.
+        limit (int): tamanho da página pedido.
+        key (Callable): função que extrai a chave de ordenação de um item.
+
+    Returns:
+    -------
+        Sequence: os próprios itens, para encadear no return da rota.
+
+    """
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
+    return items
@@ -0,0 +1,258 @@
+"""Limite de tentativas de login por token bucket.
+
+Cada chave (IP ou email) tem um balde com LOGIN_THROTTLE_*_BURST fichas que é reabastecido a
+LOGIN_THROTTLE_*_PER_MINUTE fichas por minuto. Cada tentativa de login gasta uma ficha de
+cada balde e, com um deles vazio, a tentativa é rejeitada antes do bcrypt sem gastar a ficha
+dos outros: tentativas contra uma conta já bloqueada não consomem o limite do IP.
+
+Os baldes ficam em memória no processo (`MemoryBucketStore`). Com vários workers ou várias
+máquinas, cada processo teria o seu balde, o `RedisBucketStore` os compartilha (exige o pacote
+opcional `redis`).
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - dependência opcional
+    redis = None
+
+
+class ThrottledError(RuntimeError):
+    """Lançada quando uma chave esgotou as tentativas, com o tempo até a próxima ficha."""
+
+    def __init__(self, scope: str, retry_after: float) -> None:
+        super().__init__(f'tentativas de login esgotadas ({scope})')
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class BucketRule:
+    """Capacidade do balde e fichas repostas por segundo."""
+
+    capacity: float
+    refill_per_second: float
+
+    @property
+    def ttl(self) -> int:
+        """Segundos até um balde parado encher de novo, depois disso ele pode ser descartado."""
+        return math.ceil(self.capacity / self.refill_per_second)
+
+
+def take_token(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    rule: BucketRule,
+) -> tuple[float, float]:
+    """Reabastece o balde até `now` e tenta gastar uma ficha.
+
+    Args:
+    ----
+        tokens (float): fichas no balde na última atualização.
+        updated_at (float): instante da última atualização (segundos).
+        now (float): instante atual (segundos).
+        rule (BucketRule): capacidade e reposição do balde.
+
+    Returns:
+    -------
+        tuple[float, float]: fichas restantes e a espera até a próxima ficha (0 se a ficha
+        foi gasta).
+
+    """
+    tokens = min(rule.capacity, tokens + max(now - updated_at, 0) * rule.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.refill_per_second
+
+
+def take_tokens(
+    buckets: list[tuple[float, float, BucketRule]],
+    now: float,
+) -> tuple[list[float], list[float]]:
+    """Reabastece os baldes até `now` e gasta uma ficha de cada, ou de nenhum.
+
+    Args:
+    ----
+        buckets (list[tuple[float, float, BucketRule]]): fichas, última atualização e regra
+            de cada balde.
+        now (float): instante atual (segundos).
+
+    Returns:
+    -------
+        tuple[list[float], list[float]]: fichas restantes e a espera de cada balde. Com algum
+        balde vazio nenhuma ficha é gasta.
+
+    """
+    resultados = [take_token(tokens, updated_at, now, rule) for tokens, updated_at, rule in buckets]
+    esperas = [espera for _, espera in resultados]
+    if any(esperas):
+        # devolve a ficha dos baldes que tinham, a tentativa não foi aceita
+        return [tokens if espera else tokens + 1 for tokens, espera in resultados], esperas
+    return [tokens for tokens, _ in resultados], esperas
+
+
+class BucketStore(ABC):
+    """Onde ficam os baldes, a leitura e a escrita dos baldes de uma tentativa são atômicas."""
+
+    @abstractmethod
+    def take(self, buckets: dict[str, BucketRule]) -> dict[str, float]:
+        """Gasta uma ficha de cada balde, ou de nenhum quando algum está vazio.
+
+        Retorna a espera de cada chave, todas 0 quando as fichas foram gastas.
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Esvazia o store (todos os baldes voltam cheios)."""
+
+
+class MemoryBucketStore(BucketStore):
+    """Baldes no próprio processo, no máximo `max_keys` (os menos usados são descartados)."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: dict[str, BucketRule]) -> dict[str, float]:
+        """Gasta as fichas dos baldes sob o lock do store."""
+        now = time.monotonic()
+        with self._lock:
+            estados = [
+                (*self._buckets.get(key, (rule.capacity, now)), rule)
+                for key, rule in buckets.items()
+            ]
+            tokens, esperas = take_tokens(estados, now)
+            for key, restantes in zip(buckets, tokens, strict=True):
+                self._buckets[key] = (restantes, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return dict(zip(buckets, esperas, strict=True))
+
+    def reset(self) -> None:
+        """Descarta todos os baldes."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBucketStore(BucketStore):
+    """Baldes compartilhados entre processos num Redis.
+
+    Cada balde é um hash (tokens, updated_at). Os baldes de uma tentativa são lidos e
+    atualizados juntos numa transação otimista (WATCH/MULTI), que é repetida se outro processo
+    alterar algum deles no meio. O hash expira quando o balde estaria cheio de novo.
+    """
+
+    def __init__(self, client: object, prefix: str = 'login-throttle:') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, buckets: dict[str, BucketRule]) -> dict[str, float]:
+        """Gasta as fichas dos baldes numa única transação do Redis."""
+        names = {key: self.prefix + key for key in buckets}
+
+        def update(pipe: object) -> dict[str, float]:
+            now = time.time()
+            estados = []
+            for key, rule in buckets.items():
+                tokens, updated_at = pipe.hmget(names[key], 'tokens', 'updated_at')
+                if tokens is None:
+                    tokens, updated_at = rule.capacity, now
+                estados.append((float(tokens), float(updated_at), rule))
+            tokens, esperas = take_tokens(estados, now)
+            pipe.multi()
+            for (key, rule), restantes in zip(buckets.items(), tokens, strict=True):
+                pipe.hset(names[key], mapping={'tokens': restantes, 'updated_at': now})
+                pipe.expire(names[key], rule.ttl)
+            return dict(zip(buckets, esperas, strict=True))
+
+        if not buckets:
+            return {}
+        return self.client.transaction(update, *names.values(), value_from_callable=True)
+
+    def reset(self) -> None:
+        """Remove os baldes com o prefixo deste store."""
+        for name in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(name)
+
+
+class LoginThrottle:
+    """Aplica os limites por IP e por email e conta as tentativas aceitas e rejeitadas."""
+
+    def __init__(self, store: BucketStore, rules: dict[str, BucketRule]) -> None:
+        self.store = store
+        self.rules = rules
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = dict.fromkeys(rules, 0)
+
+    def check(self, **keys: str | None) -> None:
+        """Gasta uma ficha do balde de cada chave informada (ip=..., email=...).
+
+        As fichas só são gastas quando todos os baldes permitem a tentativa.
+
+        Raises
+        ------
+            ThrottledError: algum dos baldes está vazio, com o primeiro deles em `scope`.
+
+        """
+        chaves = {scope: f'{scope}:{value.lower()}' for scope, value in keys.items() if value}
+        esperas = self.store.take({chave: self.rules[scope] for scope, chave in chaves.items()})
+        vazios = [scope for scope, chave in chaves.items() if esperas[chave]]
+        if vazios:
+            with self._lock:
+                self.rejected[vazios[0]] += 1
+            raise ThrottledError(vazios[0], max(esperas.values()))
+        with self._lock:
+            self.allowed += 1
+
+    def reset(self) -> None:
+        """Esvazia os baldes e zera os contadores."""
+        self.store.reset()
+        with self._lock:
+            self.allowed = 0
+            self.rejected = dict.fromkeys(self.rules, 0)
+
+    def metrics(self) -> dict:
+        """Tentativas aceitas e rejeitadas por tipo de chave."""
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                **{f'rejected_{scope}': count for scope, count in self.rejected.items()},
+            }
+
+
+def _per_minute(burst: int, per_minute: float) -> BucketRule:
+    return BucketRule(capacity=burst, refill_per_second=per_minute / 60)
+
+
+def build_store() -> BucketStore:
+    """Store configurado em LOGIN_THROTTLE_BACKEND."""
+    if settings.LOGIN_THROTTLE_BACKEND == 'redis':
+        if redis is None:
+            msg = 'LOGIN_THROTTLE_BACKEND=redis exige o pacote redis'
+            raise RuntimeError(msg)
+        return RedisBucketStore(redis.Redis.from_url(settings.REDIS_URL))
+    return MemoryBucketStore(max_keys=settings.LOGIN_THROTTLE_MAX_KEYS)
+
+
+login_throttle = LoginThrottle(
+    build_store(),
+    {
+        'ip': _per_minute(settings.LOGIN_THROTTLE_IP_BURST, settings.LOGIN_THROTTLE_IP_PER_MINUTE),
+        'email': _per_minute(
+            settings.LOGIN_THROTTLE_EMAIL_BURST,
+            settings.LOGIN_THROTTLE_EMAIL_PER_MINUTE,
+        ),
+    },
+)
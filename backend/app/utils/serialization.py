@@ -0,0 +1,60 @@
+from functools import cache
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+
+
+@cache
+def get_adapter(schema: object) -> TypeAdapter:
+    """TypeAdapter do schema, criado uma vez por tipo (a construção do validador é cara)."""
+    return TypeAdapter(schema)
+
+
+def to_json(schema: object, content: object) -> bytes:
+    """Serializa objetos do banco no JSON do schema de resposta.
+
+    Os objetos são lidos pelos atributos numa única validação e o JSON é gerado direto em
+    bytes pelo pydantic-core, sem o dict intermediário e o json.dumps do caminho padrão do
+    FastAPI.
+
+    Args:
+    ----
+        schema (object): tipo da resposta (ex.: list[PedidoPublic]).
+        content (object): models retornados pelos services.
+
+    Returns:
+    -------
+        bytes: corpo JSON da resposta.
+
+    """
+    adapter = get_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def json_response(schema: object, content: object, response: Response) -> Response | object:
+    """Monta a resposta da rota pelo caminho rápido quando FAST_SERIALIZATION está ativo.
+
+    Os headers já definidos em `response` (ex.: X-Next-Cursor) são copiados para a resposta.
+    Com a opção desligada o conteúdo é retornado como está e o FastAPI o serializa pelo
+    response_model da rota.
+
+    Args:
+    ----
+        schema (object): tipo da resposta, o mesmo do retorno da rota.
+        content (object): models retornados pelos services.
+        response (Response): resposta injetada na rota.
+
+    Returns:
+    -------
+        Response | object: resposta JSON pronta ou o próprio conteúdo.
+
+    """
+    if not settings.FAST_SERIALIZATION:
+        return content
+    return Response(
+        to_json(schema, content),
+        media_type='application/json',
+        headers=dict(response.headers),
+    )
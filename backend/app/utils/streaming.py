@@ -0,0 +1,70 @@
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+
+# Content-Types aceitos nas importações e o formato correspondente
+FORMATOS_IMPORTACAO = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Quebra um corpo recebido em pedaços em linhas, sem carregá-lo inteiro em memória."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer.rstrip('\r')
+
+
+async def iter_records(
+    lines: AsyncIterator[str],
+    formato: str,
+) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Converte as linhas de um CSV (com cabeçalho) ou NDJSON em dicionários.
+
+    Args:
+    ----
+        lines (AsyncIterator[str]): linhas do corpo da requisição.
+        formato (str): 'csv' ou 'ndjson'.
+
+    Returns:
+    -------
+        AsyncIterator: tuplas (número da linha, registro, erro), com registro None quando a
+        linha não pôde ser interpretada.
+
+    """
+    header = None
+    numero = 0
+    async for line in lines:
+        numero += 1
+        if not line.strip():
+            continue
+        if formato == 'csv':
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if len(values) != len(header):
+                yield numero, None, f'esperadas {len(header)} colunas, recebidas {len(values)}'
+                continue
+            yield numero, dict(zip(header, values, strict=True)), None
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield numero, None, f'json inválido: {exc}'
+                continue
+            if not isinstance(record, dict):
+                yield numero, None, 'cada linha deve ser um objeto json'
+                continue
+            yield numero, record, None
@@ -0,0 +1,131 @@
+"""X-Total-Count opcional das listagens paginadas.
+
+Com `?count=` a resposta traz o total de registros dos filtros (sem o cursor, o skip e o
+limit) em `X-Total-Count` e o modo usado em `X-Total-Count-Mode`:
+
+- `exact`: `SELECT count(*)` sobre a mesma consulta, lendo só a chave primária.
+- `cached`: o total exato guardado em `count_cache` por `TOTAL_COUNT_CACHE_TTL` segundos, por
+  combinação de filtros; as páginas seguintes da mesma listagem não contam de novo.
+- `estimated`: as linhas estimadas pelo planner (`EXPLAIN`) no Postgres, sem percorrer a
+  tabela. Nos outros bancos cai para `cached`.
+"""
+
+from collections.abc import Hashable
+from enum import Enum
+from typing import Annotated, Literal
+
+from fastapi import Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.utils.cache import count_cache
+
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+TOTAL_COUNT_MODE_HEADER = 'X-Total-Count-Mode'
+
+CountMode = Literal['exact', 'cached', 'estimated']
+
+CountQuery = Annotated[
+    CountMode | None,
+    Query(description='Inclui o total no header X-Total-Count: exact, cached ou estimated'),
+]
+
+
+def count_key(recurso: str, filters: dict) -> tuple[Hashable, ...]:
+    """Chave do total no cache: o recurso e os filtros informados, em ordem fixa.
+
+    Filtros vazios não restringem a consulta e ficam de fora, assim `?status=` e a listagem
+    sem o parâmetro compartilham o mesmo total.
+    """
+    normalizados = tuple(
+        sorted(
+            (nome, valor.value if isinstance(valor, Enum) else valor)
+            for nome, valor in filters.items()
+            if valor not in (None, '')
+        ),
+    )
+    return (recurso, normalizados)
+
+
+def count_statement(stmt: Select, id_column: object) -> Select:
+    """`SELECT count(*)` da listagem, sem ordenação, paginação e relações carregadas."""
+    subquery = stmt.with_only_columns(id_column).order_by(None).limit(None).offset(None).subquery()
+    return select(func.count()).select_from(subquery)
+
+
+def _exact_count(db: Session, stmt: Select, id_column: object) -> int:
+    return db.execute(count_statement(stmt, id_column)).scalar_one()
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN` de uma consulta, executado como a própria consulta.
+
+    Os parâmetros passam pelos bind processors dos tipos das colunas, ex.: um filtro de Enum
+    envia o nome gravado no banco, não o objeto Python.
+    """
+
+    inherit_cache = True
+
+    def __init__(self, stmt: Select) -> None:
+        self.stmt = stmt
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: object) -> str:
+    return f'EXPLAIN {compiler.process(element.stmt, **kw)}'
+
+
+@compiles(Explain, 'postgresql')
+def _compile_explain_postgresql(element: Explain, compiler: SQLCompiler, **kw: object) -> str:
+    return f'EXPLAIN (FORMAT JSON) {compiler.process(element.stmt, **kw)}'
+
+
+def _estimated_count(db: Session, stmt: Select, id_column: object) -> int:
+    listagem = stmt.with_only_columns(id_column).order_by(None).limit(None).offset(None)
+    plano = db.execute(Explain(listagem)).scalar_one()
+    return int(plano[0]['Plan']['Plan Rows'])
+
+
+def total_count(
+    db: Session,
+    stmt: Select,
+    id_column: object,
+    mode: CountMode,
+    key: Hashable,
+) -> tuple[int, CountMode]:
+    """Conta os registros da listagem no modo pedido.
+
+    Args:
+    ----
+        db (Session): sessão do banco.
+        stmt (Select): consulta da listagem com os filtros, sem o cursor.
+        id_column (object): chave primária do model listado.
+        mode (CountMode): modo pedido em ?count=.
+        key (Hashable): chave do total em count_cache, ver count_key.
+
+    Returns:
+    -------
+        tuple[int, CountMode]: o total e o modo usado de fato.
+
+    """
+    if mode == 'estimated':
+        if db.get_bind().dialect.name == 'postgresql':
+            return _estimated_count(db, stmt, id_column), 'estimated'
+        mode = 'cached'
+    if mode == 'cached':
+        total = count_cache.get(key)
+        if total is None:
+            total = _exact_count(db, stmt, id_column)
+            count_cache.set(key, total)
+        return total, 'cached'
+    return _exact_count(db, stmt, id_column), 'exact'
+
+
+def set_total_count(response: Response, total: int, mode: CountMode) -> None:
+    """Adiciona os headers X-Total-Count e X-Total-Count-Mode na resposta."""
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[TOTAL_COUNT_MODE_HEADER] = mode
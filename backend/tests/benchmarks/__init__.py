@@ -0,0 +1 @@
+"""Benchmarks de carga e de serialização da API."""
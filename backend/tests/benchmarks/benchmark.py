@@ -0,0 +1,419 @@
+r"""Benchmark de carga das rotas da API.
+
+Popula um banco com volumes configuráveis usando os geradores de tests/utils.py e dispara
+requisições com concorrência fixa contra a aplicação (em processo, via ASGI). Para cada
+cenário reporta latência p50/p95/p99, vazão e consultas SQL por requisição em JSON.
+
+    python -m tests.benchmarks.benchmark --clientes 10000 --produtos 100000 \
+        --pedidos 1000000 --concorrencia 16 --requisicoes 500 --saida benchmark.json
+
+O banco é um arquivo SQLite temporário por padrão. Com --database-url e --sem-seed um banco
+já populado pode ser reaproveitado entre execuções.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import Engine, create_engine, insert, make_url
+from sqlmodel import Session
+
+from app.config import settings
+from app.database.database import get_db, get_read_db, instrument_engine
+from app.database.enums import PedidoStatus, Role
+from app.database.migrations import upgrade_engine
+from app.database.models import Cliente, Pedido, PedidoProduto, Produto, Usuario
+from app.main import app
+from tests.utils import (
+    create_cliente,
+    create_produto,
+    create_usuario,
+    rand_bool,
+    rand_cpf,
+    rand_date,
+    rand_email,
+    rand_float,
+    rand_int,
+    rand_str,
+)
+
+SECOES = ['masculino', 'feminino', 'infantil', 'acessorios', 'calcados', 'esporte']
+CATEGORIAS = ['camisa', 'calca', 'vestido', 'bermuda', 'tenis', 'bolsa', 'jaqueta', 'meia']
+EMAIL_ADMIN = 'benchmark@example.com'
+# linhas inseridas por comando durante o seed
+SEED_CHUNK = 10_000
+
+
+@dataclass(frozen=True)
+class Volumes:
+    clientes: int = 10_000
+    produtos: int = 100_000
+    pedidos: int = 1_000_000
+
+
+@dataclass(frozen=True)
+class Requisicao:
+    method: str
+    url: str
+    params: dict | None = None
+    json: dict | None = None
+    data: dict | None = None
+    autenticada: bool = True
+
+
+def _chunks(rows: Iterator[dict], size: int = SEED_CHUNK) -> Iterator[list[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _usuarios(admin: Usuario, volumes: Volumes) -> Iterator[dict]:
+    yield {**admin.model_dump(exclude={'id'}), 'id': 1}
+    # o hash do bcrypt é caro, os usuários dos clientes compartilham o mesmo
+    for usuario_id in range(2, volumes.clientes + 2):
+        yield {
+            'id': usuario_id,
+            'nome': rand_str(),
+            'email': rand_email(),
+            'senha': admin.senha,
+            'role': Role.user,
+        }
+
+
+def _clientes(volumes: Volumes) -> Iterator[dict]:
+    cpfs = set()
+    for cliente_id in range(1, volumes.clientes + 1):
+        cpf = rand_cpf()
+        while cpf in cpfs:
+            cpf = rand_cpf()
+        cpfs.add(cpf)
+        cliente = create_cliente(Usuario(id=cliente_id + 1), cpf=cpf)
+        yield {
+            **cliente.model_dump(exclude={'id'}),
+            'id': cliente_id,
+            'usuario_id': cliente_id + 1,
+        }
+
+
+def _produtos(volumes: Volumes) -> Iterator[dict]:
+    for produto_id in range(1, volumes.produtos + 1):
+        produto = create_produto(
+            categoria=rand_str(word_set=CATEGORIAS),
+            preco=round(rand_float(10, 500), 2),
+            disponivel=rand_bool(),
+            secao=rand_str(word_set=SECOES),
+        )
+        yield {**produto.model_dump(exclude={'id'}), 'id': produto_id}
+
+
+def _pedidos(volumes: Volumes) -> Iterator[dict]:
+    status = list(PedidoStatus)
+    for pedido_id in range(1, volumes.pedidos + 1):
+        data_inicio = rand_date()
+        yield {
+            'id': pedido_id,
+            'cliente_id': rand_int(1, volumes.clientes),
+            'status': rand_str(word_set=status),
+            'data_inicio': data_inicio,
+            'data_fim': data_inicio + timedelta(days=rand_int(1, 60)),
+        }
+
+
+def _pedido_produtos(volumes: Volumes) -> Iterator[dict]:
+    for pedido_id in range(1, volumes.pedidos + 1):
+        quantidade = min(rand_int(1, 5), volumes.produtos)
+        for produto_id in random.sample(range(1, volumes.produtos + 1), quantidade):
+            yield {'pedido_id': pedido_id, 'produto_id': produto_id}
+
+
+def seed(engine: Engine, volumes: Volumes) -> None:
+    """Cria o schema e insere usuários, clientes, produtos e pedidos com ids sequenciais."""
+    upgrade_engine(engine)
+    tabelas = [
+        (Usuario, _usuarios(create_usuario(EMAIL_ADMIN), volumes)),
+        (Cliente, _clientes(volumes)),
+        (Produto, _produtos(volumes)),
+        (Pedido, _pedidos(volumes)),
+        (PedidoProduto, _pedido_produtos(volumes)),
+    ]
+    with Session(engine) as db:
+        for model, rows in tabelas:
+            for chunk in _chunks(rows):
+                db.execute(insert(model), chunk)
+            db.commit()
+
+
+def cenarios(volumes: Volumes) -> dict[str, Callable[[], Requisicao]]:
+    """Requisições de cada cenário, com parâmetros sorteados a cada chamada."""
+    status = [pedido_status.value for pedido_status in PedidoStatus]
+
+    def data() -> str:
+        return rand_date().isoformat()
+
+    def pedido_post() -> dict:
+        quantidade = min(rand_int(1, 5), volumes.produtos)
+        data_inicio = rand_date()
+        return {
+            'cliente_id': rand_int(1, volumes.clientes),
+            'status': rand_str(word_set=status),
+            'data_inicio': data_inicio.isoformat(),
+            'data_fim': (data_inicio + timedelta(days=30)).isoformat(),
+            'produtos_id': random.sample(range(1, volumes.produtos + 1), quantidade),
+        }
+
+    return {
+        'auth_login': lambda: Requisicao(
+            'POST',
+            '/auth/login',
+            data={'username': EMAIL_ADMIN, 'password': settings.DEFAULT_TEST_PASSWORD},
+            autenticada=False,
+        ),
+        'orders_list': lambda: Requisicao('GET', '/orders/'),
+        'orders_data_inicio': lambda: Requisicao('GET', '/orders/', {'data_inicio': data()}),
+        'orders_data_fim': lambda: Requisicao('GET', '/orders/', {'data_fim': data()}),
+        'orders_secao_produtos': lambda: Requisicao(
+            'GET',
+            '/orders/',
+            {'secao_produtos': rand_str(word_set=SECOES)},
+        ),
+        'orders_id_pedido': lambda: Requisicao(
+            'GET',
+            '/orders/',
+            {'id_pedido': rand_int(1, volumes.pedidos)},
+        ),
+        'orders_status': lambda: Requisicao(
+            'GET',
+            '/orders/',
+            {'pedido_status': rand_str(word_set=status)},
+        ),
+        'orders_id_cliente': lambda: Requisicao(
+            'GET',
+            '/orders/',
+            {'id_cliente': rand_int(1, volumes.clientes)},
+        ),
+        'clients_list': lambda: Requisicao('GET', '/clients/'),
+        'products_list': lambda: Requisicao('GET', '/products/'),
+        'products_categoria': lambda: Requisicao(
+            'GET',
+            '/products/',
+            {'categoria': rand_str(word_set=CATEGORIAS)},
+        ),
+        'orders_post': lambda: Requisicao('POST', '/orders/', json=pedido_post()),
+    }
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil pelo método nearest-rank de uma lista ordenada."""
+    if not valores:
+        return 0.0
+    indice = max(math.ceil(p / 100 * len(valores)) - 1, 0)
+    return valores[indice]
+
+
+async def executar_cenario(
+    client: httpx.AsyncClient,
+    gerar: Callable[[], Requisicao],
+    headers: dict,
+    concorrencia: int,
+    requisicoes: int,
+) -> dict:
+    """Dispara `requisicoes` com `concorrencia` workers e resume latências e vazão."""
+    latencias = []
+    consultas = []
+    erros = 0
+    restantes = requisicoes
+
+    async def worker() -> None:
+        nonlocal erros, restantes
+        while restantes > 0:
+            restantes -= 1
+            requisicao = gerar()
+            inicio = time.perf_counter()
+            response = await client.request(
+                requisicao.method,
+                requisicao.url,
+                params=requisicao.params,
+                json=requisicao.json,
+                data=requisicao.data,
+                headers=headers if requisicao.autenticada else None,
+            )
+            latencias.append(time.perf_counter() - inicio)
+            if response.status_code >= 400:
+                erros += 1
+            if 'X-DB-Query-Count' in response.headers:
+                consultas.append(int(response.headers['X-DB-Query-Count']))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'requisicoes': len(latencias),
+        'erros': erros,
+        'duracao_s': round(duracao, 3),
+        'throughput_rps': round(len(latencias) / duracao, 2) if duracao else 0.0,
+        'latencia_ms': {
+            'p50': round(percentil(latencias, 50) * 1000, 3),
+            'p95': round(percentil(latencias, 95) * 1000, 3),
+            'p99': round(percentil(latencias, 99) * 1000, 3),
+            'media': round(sum(latencias) / len(latencias) * 1000, 3) if latencias else 0.0,
+            'max': round(latencias[-1] * 1000, 3) if latencias else 0.0,
+        },
+        'consultas_por_requisicao': (
+            round(sum(consultas) / len(consultas), 2) if consultas else None
+        ),
+    }
+
+
+async def _executar(
+    volumes: Volumes,
+    concorrencia: int,
+    requisicoes: int,
+    apenas: list[str] | None,
+) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        response = await client.post(
+            '/auth/login',
+            data={
+                'username': EMAIL_ADMIN,
+                'password': settings.DEFAULT_TEST_PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+        resultados = {}
+        for nome, gerar in cenarios(volumes).items():
+            if apenas and nome not in apenas:
+                continue
+            resultados[nome] = await executar_cenario(
+                client,
+                gerar,
+                headers,
+                concorrencia,
+                requisicoes,
+            )
+    return resultados
+
+
+def run_benchmark(  # noqa: PLR0913
+    database_url: str,
+    volumes: Volumes,
+    *,
+    concorrencia: int = 8,
+    requisicoes: int = 200,
+    apenas: list[str] | None = None,
+    popular: bool = True,
+    seed_aleatoria: int = 0,
+) -> dict:
+    """Popula o banco (opcional), executa os cenários e retorna o relatório.
+
+    Args:
+    ----
+        database_url (str): url do banco usado pela aplicação durante o benchmark.
+        volumes (Volumes): quantidade de clientes, produtos e pedidos.
+        concorrencia (int): requisições simultâneas em cada cenário.
+        requisicoes (int): requisições por cenário.
+        apenas (list[str]): executa só os cenários com esses nomes.
+        popular (bool): se falso, usa o banco como está (já populado).
+        seed_aleatoria (int): seed do gerador aleatório, para execuções reproduzíveis.
+
+    Returns:
+    -------
+        dict: volumes, parâmetros e resultado de cada cenário.
+
+    """
+    random.seed(seed_aleatoria)
+    connect_args = {}
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        connect_args = {'check_same_thread': False, 'timeout': 30}
+    engine = instrument_engine(create_engine(database_url, connect_args=connect_args))
+    if popular:
+        inicio = time.perf_counter()
+        seed(engine, volumes)
+        duracao_seed = time.perf_counter() - inicio
+    else:
+        duracao_seed = 0.0
+
+    def get_db_override() -> Iterator[Session]:
+        with Session(engine) as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_db_override
+    app.dependency_overrides[get_read_db] = get_db_override
+    # o cenário auth_login mede o custo do bcrypt, repetindo o login do mesmo email e IP
+    throttle_enabled = settings.LOGIN_THROTTLE_ENABLED
+    settings.LOGIN_THROTTLE_ENABLED = False
+    try:
+        resultados = asyncio.run(_executar(volumes, concorrencia, requisicoes, apenas))
+    finally:
+        settings.LOGIN_THROTTLE_ENABLED = throttle_enabled
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        engine.dispose()
+
+    return {
+        'database': make_url(database_url).get_backend_name(),
+        'volumes': {
+            'clientes': volumes.clientes,
+            'produtos': volumes.produtos,
+            'pedidos': volumes.pedidos,
+        },
+        'concorrencia': concorrencia,
+        'requisicoes_por_cenario': requisicoes,
+        'seed_s': round(duracao_seed, 3),
+        'cenarios': resultados,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=Volumes.clientes)
+    parser.add_argument('--produtos', type=int, default=Volumes.produtos)
+    parser.add_argument('--pedidos', type=int, default=Volumes.pedidos)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--requisicoes', type=int, default=200)
+    parser.add_argument('--cenario', action='append', help='executa só este cenário')
+    parser.add_argument('--database-url', help='padrão: arquivo SQLite temporário')
+    parser.add_argument('--sem-seed', action='store_true', help='usa o banco já populado')
+    parser.add_argument('--seed', type=int, default=0, help='seed do gerador aleatório')
+    parser.add_argument('--saida', type=Path, help='arquivo JSON do relatório (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        relatorio = run_benchmark(
+            args.database_url or f'sqlite:///{Path(tmp) / "benchmark.db"}',
+            Volumes(args.clientes, args.produtos, args.pedidos),
+            concorrencia=args.concorrencia,
+            requisicoes=args.requisicoes,
+            apenas=args.cenario,
+            popular=not args.sem_seed,
+            seed_aleatoria=args.seed,
+        )
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        args.saida.write_text(texto + '\n')
+    else:
+        sys.stdout.write(texto + '\n')
+
+
+if __name__ == '__main__':
+    main()
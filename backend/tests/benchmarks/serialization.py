@@ -0,0 +1,168 @@
+"""Micro-benchmark da serialização das listagens.
+
+Compara o caminho padrão do FastAPI (response_model da rota: validação, dict JSON-compatível
+e json.dumps do JSONResponse) com o caminho rápido de app/utils/serialization.py (validação
+pelos atributos e JSON gerado direto em bytes pelo TypeAdapter), sem banco nem HTTP.
+
+    python -m tests.benchmarks.serialization --tamanhos 100 1000 10000 --repeticoes 5
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Callable
+from datetime import timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.database.models import Cliente, Pedido, Produto, Usuario
+from app.database.schemas import ClientePublic, PedidoPublic, ProdutoPublic
+from app.main import app
+from app.utils.serialization import to_json
+from tests.utils import (
+    create_cliente,
+    create_pedido,
+    create_produto,
+    rand_bool,
+    rand_cpf,
+    rand_date,
+    rand_email,
+    rand_float,
+    rand_str,
+)
+
+# rota cujo response_model é usado no caminho padrão, por schema
+ROTAS = {
+    'pedidos': ('/orders/', list[PedidoPublic]),
+    'clientes': ('/clients/', list[ClientePublic]),
+    'produtos': ('/products/', list[ProdutoPublic]),
+}
+
+
+def gerar_produtos(n: int) -> list[Produto]:
+    produtos = []
+    for produto_id in range(1, n + 1):
+        produto = create_produto(rand_str(), rand_float(), rand_bool(), rand_str())
+        produto.id = produto_id
+        produtos.append(produto)
+    return produtos
+
+
+def gerar_clientes(n: int) -> list[Cliente]:
+    clientes = []
+    for cliente_id in range(1, n + 1):
+        # a senha não é calculada com bcrypt, o hash não importa para a serialização
+        usuario = Usuario(id=cliente_id, nome=rand_str(), email=rand_email(), senha=rand_str(60))
+        cliente = create_cliente(usuario, cpf=rand_cpf())
+        cliente.id = cliente_id
+        cliente.usuario_id = cliente_id
+        clientes.append(cliente)
+    return clientes
+
+
+def gerar_pedidos(n: int) -> list[Pedido]:
+    clientes = gerar_clientes(max(n // 10, 1))
+    produtos = gerar_produtos(50)
+    pedidos = []
+    for pedido_id in range(1, n + 1):
+        cliente = clientes[pedido_id % len(clientes)]
+        pedido = create_pedido(produtos[pedido_id % 47 : pedido_id % 47 + 3], cliente)
+        pedido.id = pedido_id
+        pedido.cliente_id = cliente.id
+        pedido.data_inicio = rand_date()
+        pedido.data_fim = pedido.data_inicio + timedelta(days=10)
+        pedidos.append(pedido)
+    return pedidos
+
+
+GERADORES: dict[str, Callable[[int], list]] = {
+    'pedidos': gerar_pedidos,
+    'clientes': gerar_clientes,
+    'produtos': gerar_produtos,
+}
+
+
+def _route(path: str) -> APIRoute:
+    return next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path == path and 'GET' in route.methods
+    )
+
+
+def caminho_padrao(path: str) -> Callable[[list], bytes]:
+    """Serializa como o FastAPI faz quando a rota retorna os models."""
+    field = _route(path).secure_cloned_response_field
+
+    def serializar(items: list) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=items))
+        return JSONResponse(content).body
+
+    return serializar
+
+
+def caminho_rapido(schema: object) -> Callable[[list], bytes]:
+    return lambda items: to_json(schema, items)
+
+
+def medir(fn: Callable[[list], bytes], items: list, repeticoes: int) -> float:
+    """Melhor tempo (segundos) entre as repetições."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        fn(items)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def run(tamanhos: list[int], repeticoes: int = 5, schemas: list[str] | None = None) -> dict:
+    """Mede os dois caminhos para cada schema e tamanho de lista.
+
+    Args:
+    ----
+        tamanhos (list[int]): quantidade de linhas serializadas.
+        repeticoes (int): execuções de cada medição, vale o melhor tempo.
+        schemas (list[str]): pedidos, clientes e/ou produtos (padrão: todos).
+
+    Returns:
+    -------
+        dict: tempos em ms e o ganho do caminho rápido por schema e tamanho.
+
+    """
+    resultados = {}
+    for nome in schemas or list(ROTAS):
+        path, schema = ROTAS[nome]
+        padrao = caminho_padrao(path)
+        rapido = caminho_rapido(schema)
+        resultados[nome] = {}
+        for tamanho in tamanhos:
+            items = GERADORES[nome](tamanho)
+            if json.loads(padrao(items)) != json.loads(rapido(items)):
+                msg = f'os caminhos geraram JSONs diferentes para {nome}'
+                raise AssertionError(msg)
+            tempo_padrao = medir(padrao, items, repeticoes)
+            tempo_rapido = medir(rapido, items, repeticoes)
+            resultados[nome][str(tamanho)] = {
+                'padrao_ms': round(tempo_padrao * 1000, 3),
+                'rapido_ms': round(tempo_rapido * 1000, 3),
+                'ganho': round(tempo_padrao / tempo_rapido, 2) if tempo_rapido else None,
+            }
+    return resultados
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--schema', action='append', choices=list(ROTAS))
+    args = parser.parse_args(argv)
+
+    resultados = run(args.tamanhos, args.repeticoes, args.schema)
+    sys.stdout.write(json.dumps(resultados, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
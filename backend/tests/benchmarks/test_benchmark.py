@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+from app.utils.cache import principal_cache
+from tests.benchmarks import serialization
+from tests.benchmarks.benchmark import Volumes, main, percentil, run_benchmark
+
+
+def test_percentil():
+    valores = [float(n) for n in range(1, 101)]
+
+    assert percentil(valores, 50) == 50
+    assert percentil(valores, 95) == 95
+    assert percentil(valores, 99) == 99
+    assert percentil([], 50) == 0
+
+
+def test_benchmark_volume_reduzido(tmp_path: Path):
+    """Executa todos os cenários com volumes pequenos, garante que o benchmark não quebra."""
+    relatorio = run_benchmark(
+        f'sqlite:///{tmp_path / "benchmark.db"}',
+        Volumes(clientes=5, produtos=20, pedidos=50),
+        concorrencia=2,
+        requisicoes=4,
+    )
+    principal_cache.clear()
+
+    assert relatorio['volumes'] == {'clientes': 5, 'produtos': 20, 'pedidos': 50}
+    assert 'orders_post' in relatorio['cenarios']
+    for nome, cenario in relatorio['cenarios'].items():
+        assert cenario['requisicoes'] == 4, nome
+        assert cenario['erros'] == 0, nome
+        assert cenario['latencia_ms']['p50'] <= cenario['latencia_ms']['p99']
+        assert cenario['throughput_rps'] > 0
+
+
+def test_benchmark_saida_json(tmp_path: Path):
+    saida = tmp_path / 'benchmark.json'
+
+    main(
+        [
+            '--clientes',
+            '2',
+            '--produtos',
+            '5',
+            '--pedidos',
+            '5',
+            '--requisicoes',
+            '2',
+            '--concorrencia',
+            '1',
+            '--cenario',
+            'products_list',
+            '--saida',
+            str(saida),
+        ],
+    )
+    principal_cache.clear()
+
+    relatorio = json.loads(saida.read_text())
+    assert list(relatorio['cenarios']) == ['products_list']
+
+
+def test_benchmark_serializacao():
+    """O benchmark de serialização também confere que os dois caminhos geram o mesmo JSON."""
+    resultados = serialization.run([10], repeticoes=1)
+
+    assert set(resultados) == {'pedidos', 'clientes', 'produtos'}
+    for tempos in resultados.values():
+        assert tempos['10']['padrao_ms'] > 0
+        assert tempos['10']['rapido_ms'] > 0
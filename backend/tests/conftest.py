@@ -1,11 +1,20 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterator
+from contextlib import contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, StaticPool, create_engine
 
-from app.database.database import get_db
+from app.database.database import (
+    QueryStats,
+    get_db,
+    get_read_db,
+    instrument_engine,
+    track_queries,
+)
 from app.main import app
+from app.utils.cache import catalog_cache, count_cache, principal_cache
+from app.utils.rate_limit import login_throttle
 
 
 @pytest.fixture(name='session')
@@ -16,6 +25,7 @@ def session_fixture() -> Generator:
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
+    instrument_engine(engine)
     SQLModel.metadata.create_all(engine)
 
     with Session(engine) as session:
@@ -29,7 +39,38 @@ def client_fixture(session: Session) -> Generator:
         return session
 
     app.dependency_overrides[get_db] = get_db_override
+    app.dependency_overrides[get_read_db] = get_db_override
 
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
+    principal_cache.clear()
+    catalog_cache.clear()
+    count_cache.clear()
+    login_throttle.reset()
+
+
+@pytest.fixture(name='count_queries')
+def count_queries_fixture() -> Callable:
+    """Executa uma função e retorna as consultas SQL feitas por ela."""
+
+    def count_queries(fn: Callable) -> QueryStats:
+        with track_queries() as stats:
+            fn()
+        return stats
+
+    return count_queries
+
+
+@pytest.fixture(name='query_budget')
+def query_budget_fixture() -> Callable:
+    """Falha o teste se o bloco fizer mais consultas SQL que o orçamento."""
+
+    @contextmanager
+    def query_budget(maximo: int) -> Iterator[QueryStats]:
+        with track_queries() as stats:
+            yield stats
+        consultas = '\n'.join(f'{n}x {sql}' for sql, n in stats.statements.items())
+        assert stats.count <= maximo, f'{stats.count} consultas, orçamento {maximo}:\n{consultas}'
+
+    return query_budget
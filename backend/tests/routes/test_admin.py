@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.enums import Role
+from tests.utils import create_usuario, get_header_with_token
+
+
+def test_hashing_metrics(client: TestClient, session: Session):
+    usuario = create_usuario('admin@email.com')
+    session.add(usuario)
+    session.commit()
+
+    response = client.get(
+        '/admin/metrics/hashing',
+        headers=get_header_with_token(usuario, client),
+    )
+
+    assert response.status_code == 200
+
+    data = response.json()
+
+    assert data['submitted'] >= 1
+    assert data['queue_depth'] >= 0
+    assert 'wait_seconds_avg' in data
+
+
+def test_hashing_metrics_nao_admin(client: TestClient, session: Session):
+    usuario = create_usuario('user@email.com', role=Role.user)
+    session.add(usuario)
+    session.commit()
+
+    response = client.get(
+        '/admin/metrics/hashing',
+        headers=get_header_with_token(usuario, client),
+    )
+
+    assert response.status_code == 401
+
+
+def test_pool_metrics(client: TestClient, session: Session):
+    usuario = create_usuario('pool@email.com')
+    session.add(usuario)
+    session.commit()
+
+    response = client.get(
+        '/admin/metrics/pool',
+        headers=get_header_with_token(usuario, client),
+    )
+
+    assert response.status_code == 200
+    assert 'pool' in response.json()['sync']
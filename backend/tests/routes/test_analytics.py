@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.enums import PedidoStatus, Role
+from app.services.vendas_services import reconstruir_vendas
+from tests.utils import (
+    create_cliente,
+    create_produto,
+    create_usuario,
+    get_header_with_token,
+)
+
+
+def _vendas(client: TestClient, headers: dict, **params: str) -> list[dict]:
+    response = client.get('/analytics/sales', headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_vendas_incrementais(client: TestClient, session: Session):
+    usuario = create_usuario('vendas@email.com')
+    cliente = create_cliente(usuario)
+    produtos = [
+        create_produto('meia', 10.0, disponivel=True, secao='feminina'),
+        create_produto('meia', 5.0, disponivel=True, secao='feminina'),
+        create_produto('camisa', 50.0, disponivel=True, secao='masculina'),
+    ]
+    session.add(cliente)
+    session.add_all(produtos)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    pedidos = []
+    for produtos_id, dia in (([1, 2, 3], '2025-01-10'), ([1], '2025-01-10'), ([3], '2025-01-11')):
+        response = client.post(
+            '/orders/',
+            headers=headers,
+            json={
+                'cliente_id': cliente.id,
+                'status': PedidoStatus.pendente,
+                'data_inicio': dia,
+                'produtos_id': produtos_id,
+            },
+        )
+        assert response.status_code == 200
+        pedidos.append(response.json()['id'])
+
+    vendas = _vendas(client, headers, data_fim='2025-01-10')
+    linhas = [(v['secao'], v['categoria'], v['pedidos'], v['itens'], v['receita']) for v in vendas]
+    assert linhas == [
+        ('feminina', 'meia', 2, 3, 25.0),
+        ('masculina', 'camisa', 1, 1, 50.0),
+    ]
+
+    # mudança de status move a contribuição, deleção remove
+    response = client.put(
+        f'/orders/{pedidos[0]}',
+        headers=headers,
+        json={
+            'cliente_id': cliente.id,
+            'status': PedidoStatus.confirmado,
+        },
+    )
+    assert response.status_code == 200
+    assert client.delete(f'/orders/{pedidos[2]}', headers=headers).status_code == 200
+
+    confirmados = _vendas(client, headers, pedido_status=PedidoStatus.confirmado.value)
+    assert {(v['secao'], v['pedidos'], v['receita']) for v in confirmados} == {
+        ('feminina', 1, 15.0),
+        ('masculina', 1, 50.0),
+    }
+    assert _vendas(client, headers, data_inicio='2025-01-11') == []
+
+    # o resumo incremental é igual ao recalculado do zero
+    incremental = _vendas(client, headers)
+    reconstruir_vendas(session)
+    session.commit()
+    assert _vendas(client, headers) == incremental
+
+
+def test_vendas_nao_admin(client: TestClient, session: Session):
+    usuario = create_usuario('leitor@email.com', role=Role.user)
+    session.add(usuario)
+    session.commit()
+
+    response = client.get('/analytics/sales', headers=get_header_with_token(usuario, client))
+
+    assert response.status_code == 401
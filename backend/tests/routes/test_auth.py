@@ -1,8 +1,12 @@
 from fastapi.testclient import TestClient
 
+from app.config import settings
+from app.utils.auth_utils import hashing_executor
+from app.utils.rate_limit import login_throttle
+
 
 def test_usuario_post(client: TestClient):
-    body = {'nome': 'pedro', 'email': 'pedro@email.com', 'role': 'user', 'senha': 'senha123',}
+    body = {'nome': 'pedro', 'email': 'pedro@email.com', 'role': 'user', 'senha': 'senha123'}
     response = client.post('/auth/register', json=body)
     assert response.status_code == 200
 
@@ -20,3 +24,24 @@ def test_login_for_access_token(client: TestClient):
     assert response.status_code == 200
     assert 'access_token' in response.json()
     assert response.json()['token_type'] == 'bearer'
+
+
+def test_login_limitado_por_email_antes_do_bcrypt(client: TestClient):
+    body_login = {'username': 'alvo@email.com', 'password': 'errada'}
+    burst = settings.LOGIN_THROTTLE_EMAIL_BURST
+
+    for _ in range(burst):
+        assert client.post('/auth/login', data=body_login).status_code == 404
+
+    submitted = hashing_executor.submitted
+    response = client.post('/auth/login', data={**body_login, 'username': 'ALVO@email.com'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    # a tentativa rejeitada não chega ao bcrypt
+    assert hashing_executor.submitted == submitted
+    assert login_throttle.metrics()['rejected_email'] == 1
+
+    # outro email do mesmo IP continua liberado
+    outro = client.post('/auth/login', data={**body_login, 'username': 'outro@email.com'})
+    assert outro.status_code == 404
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
+from app.database.models import Cliente
 from tests.utils import create_cliente, create_usuario, get_header_with_token
 
 
@@ -142,6 +143,37 @@ def test_client_post(client: TestClient, session: Session):
     assert data['data_criacao'] is not None
 
 
+def test_client_post_idempotency_key(client: TestClient, session: Session):
+    usuario = create_usuario('alex@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = {**get_header_with_token(usuario, client), 'Idempotency-Key': 'cadastro-1'}
+    body = {
+        'nome': 'arnaldo',
+        'email': 'arnaldo@example.com',
+        'senha': '10921090',
+        'role': 'user',
+        'cpf': '66666666666',
+        'telefone': '11111111111',
+        'endereco': 'rua 8',
+        'data_nascimento': '2025-05-23',
+        'data_criacao': '2025-05-23T21:06:53.513Z',
+    }
+
+    primeira = client.post('/clients/', headers=headers, json=body)
+    repetida = client.post('/clients/', headers=headers, json=body)
+
+    assert primeira.status_code == 200
+    assert repetida.status_code == 200
+    assert repetida.headers['Idempotent-Replayed'] == 'true'
+    assert repetida.json() == primeira.json()
+    # a repetição não tenta cadastrar o mesmo email e cpf de novo
+    assert len(session.exec(select(Cliente)).all()) == 1
+
+    outra = client.post('/clients/', headers=headers, json={**body, 'cpf': '77777777777'})
+    assert outra.status_code == 422
+
+
 def test_cliente_get(client: TestClient, session: Session):
     usuario1 = create_usuario('leila@email.com')
     usuario2 = create_usuario('sonia@email.com')
@@ -239,3 +271,85 @@ def test_cliente_delete(client: TestClient, session: Session):
     data = response.json()
 
     assert data['detail'] == 'Cliente deletado com sucesso'
+
+
+def test_cliente_search(client: TestClient, session: Session):
+    usuario = create_usuario('admin.busca@email.com')
+    session.add(usuario)
+    nomes = (('mariana', '11111111111'), ('mario', '22222222222'), ('joana', '33333333333'))
+    for nome, cpf in nomes:
+        cliente_usuario = create_usuario(f'{nome}@email.com')
+        cliente_usuario.nome = nome
+        session.add(create_cliente(cliente_usuario, cpf))
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    def buscar(termo: str) -> list[str]:
+        response = client.get('/clients/search', headers=headers, params={'q': termo})
+        assert response.status_code == 200
+        return [cliente['usuario']['nome'] for cliente in response.json()]
+
+    assert set(buscar('mari')) == {'mariana', 'mario'}
+    assert buscar('mariama')[0] == 'mariana'
+    assert buscar('joana@email')[0] == 'joana'
+    assert buscar('pedro') == []
+
+    # renomear o usuário atualiza o índice do cliente
+    joana = session.get(Cliente, 3)
+    joana.usuario.nome = 'joaquina'
+    session.commit()
+    assert buscar('joaquina')[0] == 'joaquina'
+
+
+def test_cliente_batch_get(client: TestClient, session: Session):
+    usuario1 = create_usuario('ronaldo@email.com')
+    usuario2 = create_usuario('jessica@email.com')
+    session.add(create_cliente(usuario1, '11111111111'))
+    session.add(create_cliente(usuario2, '22222222222'))
+    session.commit()
+
+    response = client.post(
+        '/clients/batch-get',
+        headers=get_header_with_token(usuario1, client),
+        json={'ids': [2, 5]},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [cliente['usuario']['email'] for cliente in data['items']] == ['jessica@email.com']
+    assert data['missing'] == [5]
+
+
+def test_cliente_fields(client: TestClient, session: Session):
+    usuario = create_usuario('ronaldo@email.com')
+    session.add(create_cliente(usuario, '11111111111'))
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    lista = client.get('/clients/?fields=cpf', headers=headers)
+    detalhe = client.get('/clients/1?fields=cpf,usuario', headers=headers)
+
+    assert lista.json() == [{'id': 1, 'cpf': '11111111111'}]
+    assert set(detalhe.json()) == {'id', 'cpf', 'usuario'}
+    assert detalhe.json()['usuario']['email'] == 'ronaldo@email.com'
+
+
+def test_cliente_list_total_count(client: TestClient, session: Session):
+    usuario1 = create_usuario('ronaldo@email.com')
+    usuario2 = create_usuario('jessica@email.com')
+    session.add(create_cliente(usuario1, '11111111111'))
+    session.add(create_cliente(usuario2, '22222222222'))
+    session.commit()
+    headers = get_header_with_token(usuario1, client)
+
+    todos = client.get('/clients/', headers=headers, params={'limit': 1, 'count': 'exact'})
+    filtrado = client.get(
+        '/clients/',
+        headers=headers,
+        params={'email': 'jessica@email.com', 'count': 'cached'},
+    )
+
+    assert len(todos.json()) == 1
+    assert todos.headers['X-Total-Count'] == '2'
+    assert filtrado.headers['X-Total-Count'] == '1'
+    assert filtrado.headers['X-Total-Count-Mode'] == 'cached'
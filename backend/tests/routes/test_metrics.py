@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.utils.metrics import (
+    Histogram,
+    Metric,
+    http_request_duration_seconds,
+    http_requests_total,
+)
+from tests.utils import create_produto, create_usuario, get_header_with_token
+
+
+def test_histogram_render():
+    histogram = Histogram('latencia', 'teste', ('rota',), buckets=(0.1, 1.0))
+    histogram.observe(('/a',), 0.05)
+    histogram.observe(('/a',), 0.5)
+    histogram.observe(('/a',), 5)
+
+    linhas = histogram.render()
+
+    assert 'latencia_bucket{rota="/a",le="0.1"} 1' in linhas
+    assert 'latencia_bucket{rota="/a",le="1.0"} 2' in linhas
+    assert 'latencia_bucket{rota="/a",le="+Inf"} 3' in linhas
+    assert 'latencia_count{rota="/a"} 3' in linhas
+
+
+def test_metric_exige_render():
+    class SemRender(Metric):
+        kind = 'gauge'
+
+    with pytest.raises(TypeError):
+        SemRender('sem_render', 'teste')
+
+
+def test_metrics_por_rota(client: TestClient, session: Session):
+    usuario = create_usuario('metricas@email.com')
+    session.add(usuario)
+    session.add(create_produto())
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    rota = ('GET', '/products/{id}')
+    antes = http_request_duration_seconds.count(rota)
+    client.get('/products/1', headers=headers)
+    client.get('/products/99', headers=headers)
+
+    assert http_request_duration_seconds.count(rota) == antes + 2
+    assert http_requests_total.value(('GET', '/products/{id}', '404')) >= 1
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    serie = 'http_request_duration_seconds_bucket{method="GET",path="/products/{id}"'
+    assert serie in response.text
+    assert 'http_requests_in_progress{method="GET"} 1' in response.text
+    assert 'principal_cache_hits' in response.text
@@ -1,7 +1,17 @@
+import csv
+import io
+import json
+from collections.abc import Callable
+from datetime import date
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.config import settings
 from app.database.enums import PedidoStatus
+from app.services.pedido_services import iter_pedidos
+from app.utils.pagination import encode_cursor
 from tests.utils import (
     create_cliente,
     create_pedido,
@@ -265,3 +275,371 @@ def test_pedido_delete(client: TestClient, session: Session):
     data = response.json()
 
     assert data['detail'] == 'Pedido deletado com sucesso'
+
+
+def test_pedido_list_cursor(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(3)]
+    session.add_all(produtos)
+    session.add(cliente)
+    session.commit()
+
+    pedidos = [create_pedido(produtos, cliente) for _ in range(3)]
+    pedidos[0].data_inicio = date(2025, 3, 1)
+    pedidos[1].data_inicio = date(2025, 1, 1)
+    pedidos[2].data_inicio = date(2025, 2, 1)
+    session.add_all(pedidos)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    response = client.get('/orders/', headers=headers, params={'limit': 2})
+
+    assert response.status_code == 200
+    assert [pedido['id'] for pedido in response.json()] == [2, 3]
+
+    params = {'limit': 2, 'cursor': response.headers['X-Next-Cursor']}
+    response = client.get('/orders/', headers=headers, params=params)
+
+    assert [pedido['id'] for pedido in response.json()] == [1]
+    assert 'X-Next-Cursor' not in response.headers
+
+    for valores in (
+        {'data_inicio': 5, 'id': 1},
+        {'data_inicio': '2025-01-01', 'id': 'abc'},
+        {'data_inicio': 'ontem', 'id': 1},
+    ):
+        params = {'cursor': encode_cursor(valores)}
+        response = client.get('/orders/', headers=headers, params=params)
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'cursor inválido'
+
+
+def test_pedido_list_numero_de_consultas_constante(
+    client: TestClient,
+    session: Session,
+    count_queries: Callable,
+    query_budget: Callable,
+):
+    """A listagem não pode fazer uma consulta por pedido ao serializar cliente e produtos."""
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(3)]
+    session.add_all(produtos)
+    session.add(cliente)
+    session.commit()
+
+    session.add_all([create_pedido(produtos, cliente) for _ in range(500)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    client.get('/usuarios/me', headers=headers)
+
+    def listar(limit: int) -> None:
+        session.expire_all()
+        response = client.get('/orders/', headers=headers, params={'limit': limit})
+        assert len(response.json()) == limit
+
+    consultas_pagina_pequena = count_queries(lambda: listar(5)).count
+    with query_budget(3) as consultas_pagina_grande:
+        listar(500)
+
+    assert consultas_pagina_grande.count == consultas_pagina_pequena
+    assert not consultas_pagina_grande.repeated()
+
+
+def test_pedido_post_produtos_inexistentes(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(2)]
+    session.add(cliente)
+    session.add_all(produtos)
+    session.commit()
+
+    body = {
+        'cliente_id': cliente.id,
+        'produtos_id': [produtos[0].id, 40, produtos[1].id, 30],
+    }
+
+    response = client.post(
+        '/orders/',
+        headers=get_header_with_token(usuario, client),
+        json=body,
+    )
+
+    assert response.status_code == 404
+    assert response.json()['detail'] == 'produtos com os ids [30, 40] não encontrados'
+
+
+def test_pedido_post_idempotency_key(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(2)]
+    session.add(cliente)
+    session.add_all(produtos)
+    session.commit()
+    headers = {**get_header_with_token(usuario, client), 'Idempotency-Key': 'pedido-1'}
+    body = {
+        'cliente_id': cliente.id,
+        'status': PedidoStatus.pendente,
+        'data_inicio': '2025-01-10',
+        'produtos_id': [produto.id for produto in produtos],
+    }
+
+    # a primeira tentativa falha e libera a chave
+    falha = client.post('/orders/', headers=headers, json={**body, 'cliente_id': 99})
+    assert falha.status_code == 404
+    assert falha.json()['detail'] == 'cliente com o id 99 não encontrado'
+
+    primeira = client.post('/orders/', headers=headers, json=body)
+    repetida = client.post('/orders/', headers=headers, json=body)
+    sem_chave = client.post('/orders/', headers=get_header_with_token(usuario, client), json=body)
+
+    assert primeira.status_code == 200
+    assert 'Idempotent-Replayed' not in primeira.headers
+    assert repetida.headers['Idempotent-Replayed'] == 'true'
+    assert repetida.json() == primeira.json() == {**primeira.json(), 'id': 1}
+    assert sem_chave.json()['id'] == 2
+
+
+def test_pedido_post_numero_de_consultas_constante(
+    client: TestClient,
+    session: Session,
+    count_queries: Callable,
+):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(50)]
+    session.add(cliente)
+    session.add_all(produtos)
+    session.commit()
+    cliente_id = cliente.id
+    produtos_id = [produto.id for produto in produtos]
+    headers = get_header_with_token(usuario, client)
+    client.get('/usuarios/me', headers=headers)
+
+    def criar(quantidade: int) -> None:
+        body = {
+            'cliente_id': cliente_id,
+            'status': PedidoStatus.pendente,
+            'data_inicio': '2025-01-10',
+            'data_fim': '2025-05-25',
+            'produtos_id': produtos_id[:quantidade],
+        }
+        response = client.post('/orders/', headers=headers, json=body)
+        assert response.status_code == 200
+        assert len(response.json()['produtos']) == quantidade
+
+    assert count_queries(lambda: criar(50)).count == count_queries(lambda: criar(1)).count
+
+
+def test_pedido_export(client: TestClient, session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, 'EXPORT_YIELD_PER', 2)
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos_femininos = [create_produto(secao='feminina') for _ in range(2)]
+    produtos_masculinos = [create_produto(secao='masculina') for _ in range(2)]
+    session.add_all(produtos_femininos)
+    session.add_all(produtos_masculinos)
+    session.add(cliente)
+    session.commit()
+
+    session.add_all([create_pedido(produtos_femininos, cliente) for _ in range(5)])
+    session.add(create_pedido(produtos_masculinos, cliente))
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    response = client.get(
+        '/orders/export',
+        headers=headers,
+        params={'secao_produtos': 'feminina'},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert [pedido['id'] for pedido in linhas] == [1, 2, 3, 4, 5]
+    assert len(linhas[0]['produtos']) == 2
+    assert linhas[0]['cliente']['cpf'] is not None
+
+    response = client.get('/orders/export', headers=headers, params={'formato': 'csv'})
+
+    linhas = list(csv.reader(io.StringIO(response.text)))
+    assert linhas[0] == ['id', 'cliente_id', 'status', 'data_inicio', 'data_fim', 'produtos_id']
+    assert len(linhas) == 7
+    assert linhas[6][5] == '3 4'
+
+
+def test_iter_pedidos_libera_a_sessao_a_cada_bloco(
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'EXPORT_YIELD_PER', 2)
+    cliente = create_cliente(create_usuario())
+    produtos = [create_produto() for _ in range(2)]
+    session.add_all([create_pedido(produtos, cliente) for _ in range(5)])
+    session.commit()
+    session.expunge_all()
+
+    blocos = []
+    tamanhos = []
+    for pedidos in iter_pedidos(session, None, None, None, None, None, None):
+        # só o bloco atual (pedidos, cliente e produtos) está na sessão
+        assert not any(pedido in session for bloco in blocos for pedido in bloco)
+        tamanhos.append(len(session.identity_map))
+        blocos.append(pedidos)
+
+    assert [[pedido.id for pedido in bloco] for bloco in blocos] == [[1, 2], [3, 4], [5]]
+    assert max(tamanhos) <= 2 + 1 + len(produtos)
+    assert len(session.identity_map) == 0
+
+
+def test_pedido_list_serializacao_rapida(
+    client: TestClient,
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """O caminho rápido de serialização gera a mesma resposta do response_model do FastAPI."""
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(3)]
+    session.add(cliente)
+    session.add_all([create_pedido(produtos, cliente) for _ in range(4)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    params = {'limit': 3}
+
+    rapida = client.get('/orders/', headers=headers, params=params)
+    monkeypatch.setattr(settings, 'FAST_SERIALIZATION', False)
+    padrao = client.get('/orders/', headers=headers, params=params)
+
+    assert rapida.headers['content-type'] == 'application/json'
+    assert rapida.json() == padrao.json()
+    assert rapida.headers['X-Next-Cursor'] == padrao.headers['X-Next-Cursor']
+
+
+def test_pedido_batch_get(client: TestClient, session: Session, count_queries: Callable):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    produtos = [create_produto() for _ in range(3)]
+    session.add(cliente)
+    session.add_all([create_pedido(produtos[: i + 1], cliente) for i in range(3)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    client.get('/usuarios/me', headers=headers)
+
+    def buscar(ids: list[int]) -> dict:
+        response = client.post('/orders/batch-get', headers=headers, json={'ids': ids})
+        assert response.status_code == 200
+        return response.json()
+
+    data = buscar([3, 9, 1, 3])
+
+    assert [pedido['id'] for pedido in data['items']] == [3, 1]
+    assert [len(pedido['produtos']) for pedido in data['items']] == [3, 1]
+    assert data['missing'] == [9]
+    # pedidos, clientes e produtos com a mesma quantidade de consultas para 1 ou 3 pedidos
+    consultas = count_queries(lambda: buscar([1, 2, 3])).count
+    assert consultas == count_queries(lambda: buscar([1])).count
+
+
+def test_pedido_batch_get_limite_de_ids(client: TestClient, session: Session):
+    usuario = create_usuario()
+    session.add(usuario)
+    session.commit()
+
+    response = client.post(
+        '/orders/batch-get',
+        headers=get_header_with_token(usuario, client),
+        json={'ids': list(range(settings.BATCH_GET_MAX_IDS + 1))},
+    )
+
+    assert response.status_code == 422
+
+
+def test_pedido_fields(client: TestClient, session: Session, count_queries: Callable):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    session.add_all([create_pedido([create_produto()], cliente) for _ in range(3)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    client.get('/usuarios/me', headers=headers)
+    respostas = []
+
+    def listar() -> None:
+        respostas.append(client.get('/orders/?fields=status', headers=headers))
+
+    stats = count_queries(listar)
+
+    assert respostas[0].status_code == 200
+    assert [set(pedido) for pedido in respostas[0].json()] == [{'id', 'status'}] * 3
+    # uma consulta só, sem as colunas e as relações que não foram pedidas
+    [sql] = [sql for sql in stats.statements if 'pedido' in sql]
+    assert 'produto' not in sql
+    assert 'cliente' not in sql
+    assert 'data_fim' not in sql
+
+    detalhe = client.get('/orders/1?fields=cliente', headers=headers)
+    assert set(detalhe.json()) == {'id', 'cliente'}
+    assert detalhe.json()['cliente']['id'] == cliente.id
+
+    invalido = client.get('/orders/?fields=status,senha', headers=headers)
+    assert invalido.status_code == 400
+    assert invalido.json()['detail'] == 'campos inválidos: senha'
+
+
+def test_pedido_list_total_count(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    pedidos = [create_pedido([create_produto()], cliente) for _ in range(3)]
+    pedidos[0].status = PedidoStatus.entregue
+    session.add_all(pedidos)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    sem_total = client.get('/orders/', headers=headers, params={'limit': 1})
+    exato = client.get('/orders/', headers=headers, params={'limit': 1, 'count': 'exact'})
+    filtrado = client.get(
+        '/orders/',
+        headers=headers,
+        params={'count': 'exact', 'pedido_status': PedidoStatus.entregue.value},
+    )
+
+    assert 'X-Total-Count' not in sem_total.headers
+    assert exato.headers['X-Total-Count'] == '3'
+    assert exato.headers['X-Total-Count-Mode'] == 'exact'
+    assert len(exato.json()) == 1
+    assert filtrado.headers['X-Total-Count'] == '1'
+
+    # o cursor não muda o total
+    params = {'limit': 1, 'count': 'exact', 'cursor': exato.headers['X-Next-Cursor']}
+    assert client.get('/orders/', headers=headers, params=params).headers['X-Total-Count'] == '3'
+
+    invalido = client.get('/orders/', headers=headers, params={'count': 'aproximado'})
+    assert invalido.status_code == 422
+
+
+def test_pedido_list_total_count_cached(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    session.add_all([create_pedido([create_produto()], cliente) for _ in range(2)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    primeira = client.get('/orders/', headers=headers, params={'count': 'cached'})
+    session.add(create_pedido([create_produto()], cliente))
+    session.commit()
+    segunda = client.get('/orders/', headers=headers, params={'count': 'cached'})
+    exato = client.get('/orders/', headers=headers, params={'count': 'exact'})
+    # sem planner no SQLite, estimated usa o total em cache
+    estimado = client.get('/orders/', headers=headers, params={'count': 'estimated'})
+
+    assert primeira.headers['X-Total-Count'] == '2'
+    assert segunda.headers['X-Total-Count'] == '2'
+    assert segunda.headers['X-Total-Count-Mode'] == 'cached'
+    assert exato.headers['X-Total-Count'] == '3'
+    assert estimado.headers['X-Total-Count'] == '2'
+    assert estimado.headers['X-Total-Count-Mode'] == 'cached'
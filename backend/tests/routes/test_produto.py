@@ -1,6 +1,13 @@
+import json
+from collections.abc import Iterator
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.config import settings
+from app.services.produto_services import bump_catalog_version
+from app.utils.pagination import encode_cursor
 from tests.utils import create_produto, create_usuario, get_header_with_token
 
 
@@ -217,3 +224,293 @@ def test_produto_delete(client: TestClient, session: Session):
     data = response.json()
 
     assert data['detail'] == 'Produto deletado com sucesso'
+
+
+def test_produto_list_cursor(client: TestClient, session: Session):
+    """Testa a paginacao por cursor da rota produto_list."""
+    usuario = create_usuario('cursor@email.com')
+    session.add(usuario)
+    session.add_all([create_produto() for _ in range(5)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    response = client.get('/products/', headers=headers, params={'limit': 2})
+
+    assert response.status_code == 200
+    assert [produto['id'] for produto in response.json()] == [1, 2]
+
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get('/products/', headers=headers, params={'limit': 2, 'cursor': cursor})
+    assert [produto['id'] for produto in response.json()] == [3, 4]
+
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get('/products/', headers=headers, params={'limit': 2, 'cursor': cursor})
+    assert [produto['id'] for produto in response.json()] == [5]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_produto_list_cursor_invalido(client: TestClient, session: Session):
+    usuario = create_usuario('invalido@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    response = client.get('/products/', headers=headers, params={'cursor': 'xyz'})
+    assert response.status_code == 400
+
+    for valores in ({'id': 'abc'}, {'id': [1]}, {'id': 1, 'extra': 2}):
+        params = {'cursor': encode_cursor(valores)}
+        response = client.get('/products/', headers=headers, params=params)
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'cursor inválido'
+
+    response = client.get('/products/', headers=headers, params={'limit': 100_000})
+    assert response.status_code == 422
+
+
+def test_produto_import_csv(client: TestClient, session: Session):
+    usuario = create_usuario('importador@email.com')
+    session.add(usuario)
+    session.commit()
+
+    corpo = (
+        'categoria,secao,preco,disponivel\n'
+        'camisa,masculina,59.9,true\n'
+        'saia,feminina,abc,true\n'
+        'meia,feminina\n'
+        'jaqueta,masculina,199.9,false'
+    )
+
+    response = client.post(
+        '/products/import',
+        headers={**get_header_with_token(usuario, client), 'Content-Type': 'text/csv'},
+        content=corpo,
+    )
+
+    assert response.status_code == 200
+
+    data = response.json()
+
+    assert data['inseridos'] == 2
+    assert data['rejeitados'] == 2
+    assert [erro['linha'] for erro in data['erros']] == [3, 4]
+
+    response = client.get('/products/', headers=get_header_with_token(usuario, client))
+    assert [produto['categoria'] for produto in response.json()] == ['camisa', 'jaqueta']
+
+
+def test_produto_import_ndjson_em_lotes(
+    client: TestClient,
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'IMPORT_CHUNK_SIZE', 3)
+    usuario = create_usuario('ndjson@email.com')
+    session.add(usuario)
+    session.commit()
+
+    linhas = [
+        json.dumps({'categoria': f'cat{i}', 'secao': 'feminina', 'preco': i, 'disponivel': True})
+        for i in range(10)
+    ]
+
+    def corpo() -> Iterator[bytes]:
+        for linha in [*linhas, '[1, 2]']:
+            yield (linha + '\n').encode()
+
+    response = client.post(
+        '/products/import',
+        headers={
+            **get_header_with_token(usuario, client),
+            'Content-Type': 'application/x-ndjson',
+        },
+        content=corpo(),
+    )
+
+    assert response.status_code == 200
+    assert response.json()['inseridos'] == 10
+    assert response.json()['erros'] == [{'linha': 11, 'erro': 'cada linha deve ser um objeto json'}]
+
+
+def test_produto_import_formato_invalido(client: TestClient, session: Session):
+    usuario = create_usuario('xml@email.com')
+    session.add(usuario)
+    session.commit()
+
+    response = client.post(
+        '/products/import',
+        headers={**get_header_with_token(usuario, client), 'Content-Type': 'application/xml'},
+        content='<produtos/>',
+    )
+
+    assert response.status_code == 415
+
+
+def test_produto_etag_304(client: TestClient, session: Session):
+    usuario = create_usuario('etag@email.com')
+    session.add(usuario)
+    session.add_all([create_produto() for _ in range(3)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    for url in ('/products/', '/products/1'):
+        response = client.get(url, headers=headers)
+        etag = response.headers['ETag']
+
+        assert response.status_code == 200
+        assert etag.startswith('"')
+
+        response = client.get(url, headers={**headers, 'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['ETag'] == etag
+
+        response = client.get(url, headers={**headers, 'If-None-Match': '"outro"'})
+
+        assert response.status_code == 200
+
+
+def test_produto_cache_sem_consultas(client: TestClient, session: Session):
+    usuario = create_usuario('cache@email.com')
+    session.add(usuario)
+    session.add_all([create_produto() for _ in range(2)])
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    params = {'limit': 1}
+
+    primeira = client.get('/products/', headers=headers, params=params)
+    segunda = client.get('/products/', headers=headers, params=params)
+
+    assert segunda.json() == primeira.json()
+    assert segunda.headers['X-Next-Cursor'] == primeira.headers['X-Next-Cursor']
+    # usuário e página vêm dos caches, só as versões dos usuários e do catálogo são lidas do banco
+    assert segunda.headers['X-DB-Query-Count'] == '2'
+
+
+def test_produto_cache_invalidado_nas_alteracoes(client: TestClient, session: Session):
+    usuario = create_usuario('invalida@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    body = {'categoria': 'camisa', 'secao': 'masculina', 'preco': 10.0, 'disponivel': True}
+
+    def listar() -> list[str]:
+        response = client.get('/products/', headers=headers)
+        return [produto['categoria'] for produto in response.json()]
+
+    assert listar() == []
+
+    client.post('/products/', headers=headers, json=body)
+    assert listar() == ['camisa']
+    etag = client.get('/products/1', headers=headers).headers['ETag']
+
+    client.put('/products/1', headers=headers, json={**body, 'categoria': 'calca'})
+    assert listar() == ['calca']
+    response = client.get('/products/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json()['categoria'] == 'calca'
+
+    client.post(
+        '/products/import',
+        headers={**headers, 'Content-Type': 'application/x-ndjson'},
+        content=json.dumps({**body, 'categoria': 'meia'}),
+    )
+    assert listar() == ['calca', 'meia']
+
+    client.delete('/products/1', headers=headers)
+    assert listar() == ['meia']
+    assert client.get('/products/1', headers=headers).status_code == 404
+
+
+def test_produto_cache_invalidado_por_outro_processo(client: TestClient, session: Session):
+    """Uma alteração feita por outro processo não limpa o cache local, só muda a versão."""
+    usuario = create_usuario('processos@email.com')
+    session.add(usuario)
+    session.add(create_produto('camisa', 10.0, disponivel=True, secao='masculina'))
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    assert [p['categoria'] for p in client.get('/products/', headers=headers).json()] == ['camisa']
+
+    session.add(create_produto('calca', 20.0, disponivel=True, secao='masculina'))
+    bump_catalog_version(session)
+    session.commit()
+
+    response = client.get('/products/', headers=headers)
+    assert [p['categoria'] for p in response.json()] == ['camisa', 'calca']
+
+
+def test_produto_search(client: TestClient, session: Session):
+    usuario = create_usuario('busca@email.com')
+    session.add(usuario)
+    session.add_all(
+        [
+            create_produto('camiseta', 10.0, disponivel=True, secao='masculina'),
+            create_produto('calça', 10.0, disponivel=True, secao='feminina'),
+            create_produto('casaco', 10.0, disponivel=True, secao='infantil'),
+        ],
+    )
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    def buscar(termo: str) -> list[str]:
+        response = client.get('/products/search', headers=headers, params={'q': termo})
+        assert response.status_code == 200
+        return [produto['categoria'] for produto in response.json()]
+
+    assert buscar('cami')[0] == 'camiseta'
+    assert buscar('camizeta')[0] == 'camiseta'
+    assert buscar('FEMIN') == ['calça']
+    assert buscar('xyz') == []
+
+    # o índice acompanha as alterações dos produtos
+    client.put(
+        '/products/3',
+        headers=headers,
+        json={
+            'categoria': 'jaqueta',
+            'secao': 'infantil',
+            'preco': 10.0,
+            'disponivel': True,
+        },
+    )
+    assert buscar('casaco') == []
+    assert buscar('jaquet') == ['jaqueta']
+
+    assert client.get('/products/search', headers=headers, params={'q': 'ca'}).status_code == 422
+
+
+def test_produto_batch_get(client: TestClient, session: Session):
+    usuario = create_usuario('olivia@email.com')
+    session.add(usuario)
+    session.add_all([create_produto(f'produto {i}') for i in range(3)])
+    session.commit()
+
+    response = client.post(
+        '/products/batch-get',
+        headers=get_header_with_token(usuario, client),
+        json={'ids': [2, 40, 1]},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [produto['categoria'] for produto in data['items']] == ['produto 1', 'produto 0']
+    assert data['missing'] == [40]
+
+
+def test_produto_fields(client: TestClient, session: Session):
+    usuario = create_usuario('olivia@email.com')
+    session.add(usuario)
+    session.add(create_produto('camisa', 10.0, disponivel=True, secao='masculina'))
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    completo = client.get('/products/1', headers=headers)
+    parcial = client.get('/products/1?fields=preco', headers=headers)
+    lista = client.get('/products/?fields=categoria,secao', headers=headers)
+
+    assert set(completo.json()) == {'id', 'categoria', 'secao', 'preco', 'disponivel'}
+    # o cache guarda uma resposta por combinação de campos
+    assert parcial.json() == {'id': 1, 'preco': 10.0}
+    assert lista.json() == [{'id': 1, 'categoria': 'camisa', 'secao': 'masculina'}]
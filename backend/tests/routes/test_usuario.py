@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.enums import Role
+from tests.utils import create_usuario, get_header_with_token
+
+
+def test_usuario_update_role_e_delete_exigem_admin(client: TestClient, session: Session):
+    usuario = create_usuario('comum@email.com', role=Role.user)
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    response = client.put(f'/usuarios/{usuario.id}/role', headers=headers, json={'role': 'admin'})
+    assert response.status_code == 401
+    assert client.delete(f'/usuarios/{usuario.id}', headers=headers).status_code == 401
+
+
+def test_usuario_update_role_e_delete_nao_encontrado(client: TestClient, session: Session):
+    admin = create_usuario('chefe@email.com')
+    session.add(admin)
+    session.commit()
+    headers = get_header_with_token(admin, client)
+
+    response = client.put('/usuarios/999/role', headers=headers, json={'role': 'user'})
+    assert response.status_code == 404
+    assert client.delete('/usuarios/999', headers=headers).status_code == 404
@@ -0,0 +1 @@
+"""Testes dos services e utilitários fora das rotas."""
@@ -0,0 +1,145 @@
+import asyncio
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils.compression import CompressionMiddleware, negotiate_encoding
+
+CORPO = 'pedido;' * 1000
+
+
+def criar_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get('/grande')
+    def grande() -> PlainTextResponse:
+        return PlainTextResponse(CORPO, headers={'ETag': '"abc"'})
+
+    @app.get('/pequeno')
+    def pequeno() -> PlainTextResponse:
+        return PlainTextResponse('ok')
+
+    @app.get('/stream')
+    def stream() -> StreamingResponse:
+        return StreamingResponse(
+            (f'{{"linha": {n}}}\n' for n in range(500)),
+            media_type='application/x-ndjson',
+        )
+
+    @app.get('/binario')
+    def binario() -> StreamingResponse:
+        return StreamingResponse(iter([b'\x00' * 5000]), media_type='image/png')
+
+    return app
+
+
+@pytest.mark.parametrize(
+    ('accept', 'esperado'),
+    [
+        ('gzip', 'gzip'),
+        ('gzip, br', 'br'),
+        ('gzip, br;q=0.5', 'gzip'),
+        ('br;q=0, gzip', 'gzip'),
+        ('*', 'br'),
+        ('identity', None),
+        ('gzip;q=0', None),
+        ('', None),
+    ],
+)
+def test_negotiate_encoding(accept: str, esperado: str | None):
+    assert negotiate_encoding(accept, ['br', 'zstd', 'gzip']) == esperado
+
+
+def test_compressao_gzip():
+    client = TestClient(criar_app())
+
+    response = client.get('/grande', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == 'W/"abc"'
+    assert int(response.headers['Content-Length']) < len(CORPO)
+    assert response.text == CORPO
+
+
+def test_sem_compressao_abaixo_do_minimo_e_tipos_binarios():
+    client = TestClient(criar_app())
+
+    for url in ('/pequeno', '/binario'):
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+    response = client.get('/grande', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_streaming_comprimido_aos_poucos():
+    """Cada pedaço do streaming é enviado comprimido assim que a aplicação o produz."""
+    mensagens = []
+    fim = asyncio.Event()
+
+    async def receive() -> dict:
+        # o cliente só desconecta depois de receber o stream inteiro
+        await fim.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: dict) -> None:
+        mensagens.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body', False):
+            fim.set()
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/stream',
+        'raw_path': b'/stream',
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'accept-encoding', b'gzip')],
+        'asgi': {'version': '3.0', 'spec_version': '2.4'},
+    }
+    asyncio.run(criar_app()(scope, receive, send))
+
+    inicio, *corpos = mensagens
+    headers = dict(inicio['headers'])
+    assert headers[b'content-encoding'] == b'gzip'
+    assert b'content-length' not in headers
+
+    decompressor = zlib.decompressobj(31)
+    partes = [decompressor.decompress(corpo['body']) for corpo in corpos]
+
+    # várias mensagens, cada uma já descomprimível sem esperar o fim do stream
+    assert len([parte for parte in partes if parte]) > 1
+    assert b''.join(partes).decode() == ''.join(f'{{"linha": {n}}}\n' for n in range(500))
+
+
+@pytest.mark.parametrize(('encoding', 'modulo'), [('br', 'brotli'), ('zstd', 'zstandard')])
+def test_compressao_opcional(encoding: str, modulo: str):
+    biblioteca = pytest.importorskip(modulo)
+    client = TestClient(criar_app())
+
+    with client.stream('GET', '/grande', headers={'Accept-Encoding': encoding}) as response:
+        corpo = b''.join(response.iter_raw())
+
+    assert response.headers['Content-Encoding'] == encoding
+    if encoding == 'br':
+        assert biblioteca.decompress(corpo).decode() == CORPO
+    else:
+        assert biblioteca.ZstdDecompressor().decompressobj().decompress(corpo).decode() == CORPO
+
+
+def test_nivel_configuravel(monkeypatch: pytest.MonkeyPatch):
+    client = TestClient(criar_app())
+    tamanhos = {}
+    for nivel in (1, 9):
+        monkeypatch.setattr(settings, 'COMPRESSION_GZIP_LEVEL', nivel)
+        response = client.get('/grande', headers={'Accept-Encoding': 'gzip'})
+        tamanhos[nivel] = int(response.headers['Content-Length'])
+        assert response.text == CORPO
+
+    assert tamanhos[9] <= tamanhos[1]
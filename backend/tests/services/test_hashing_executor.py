@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.auth_utils import (
+    HashingExecutor,
+    HashingQueueFullError,
+    _check,
+    _hash,
+    verify_password_async,
+)
+
+
+def test_hashing_executor_hash_e_verifica():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    senha_hash = executor.run(_hash, 'senha123')
+
+    assert executor.run(_check, 'senha123', senha_hash) is True
+    assert executor.run(_check, 'outra', senha_hash) is False
+
+    metrics = executor.metrics()
+    assert metrics['submitted'] == 3
+    assert metrics['completed'] == 3
+    assert metrics['in_flight'] == 0
+    executor.shutdown()
+
+
+def test_hashing_executor_rejeita_quando_fila_cheia():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    liberar = threading.Event()
+
+    executor.submit(liberar.wait)
+    executor.submit(liberar.wait)
+    with pytest.raises(HashingQueueFullError):
+        executor.submit(liberar.wait)
+
+    metrics = executor.metrics()
+    assert metrics['queue_depth'] == 1
+    assert metrics['rejected'] == 1
+
+    liberar.set()
+    executor.shutdown()
+
+
+def test_verify_password_async():
+    senha_hash = _hash('senha123')
+    assert asyncio.run(verify_password_async('senha123', senha_hash)) is True
+
+
+def test_hashing_executor_shutdown_cancela_as_tarefas_na_fila():
+    executor = HashingExecutor(max_workers=1, max_queue=2)
+    liberar = threading.Event()
+    executor.submit(liberar.wait)
+    na_fila = executor.submit(_hash, 'senha123')
+
+    async def aguardar_hash_na_fila() -> None:
+        tarefa = asyncio.ensure_future(executor.run_async(_hash, 'senha123'))
+        await asyncio.sleep(0)
+        executor.shutdown()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(tarefa, timeout=5)
+
+    try:
+        asyncio.run(aguardar_hash_na_fila())
+        metrics = executor.metrics()
+    finally:
+        liberar.set()
+
+    assert na_fila.cancelled()
+    # só a tarefa que já executava continua contando, as canceladas liberaram as vagas
+    assert metrics['in_flight'] == 1
+    assert metrics['completed'] == 0
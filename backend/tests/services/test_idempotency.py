@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.config import settings
+from app.database.models import IdempotencyKey
+from app.services.idempotency_services import KeyEvictor, idempotent_response, request_hash
+from app.utils.clock import utcnow
+
+
+class Corpo(BaseModel):
+    valor: int
+
+
+def test_repeticoes_concorrentes_esperam_a_requisicao_original(tmp_path: Path):
+    engine = create_engine(f'sqlite:///{tmp_path / "idempotencia.db"}')
+    SQLModel.metadata.create_all(engine)
+    execucoes = []
+    respostas = []
+
+    def criar() -> Corpo:
+        execucoes.append(1)
+        time.sleep(0.3)
+        return Corpo(valor=len(execucoes))
+
+    def requisicao() -> None:
+        with Session(engine) as db:
+            respostas.append(
+                idempotent_response(db, 'k', 1, 'POST /x', Corpo(valor=1), Corpo, criar),
+            )
+
+    threads = [threading.Thread(target=requisicao) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(execucoes) == 1
+    assert {resposta.body for resposta in respostas} == {b'{"valor":1}'}
+    assert sorted(resposta.headers.get('Idempotent-Replayed', '') for resposta in respostas) == [
+        '',
+        'true',
+        'true',
+        'true',
+    ]
+
+
+def test_repeticao_desiste_se_a_original_nao_termina(
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'IDEMPOTENCY_WAIT', 0.1)
+    agora = utcnow()
+    session.add(
+        IdempotencyKey(
+            usuario_id=1,
+            endpoint='POST /x',
+            key='k',
+            request_hash=request_hash(Corpo(valor=1)),
+            created_at=agora,
+            expires_at=agora + timedelta(seconds=60),
+        ),
+    )
+    session.commit()
+
+    def criar() -> Corpo:
+        pytest.fail('a requisição em andamento não deve ser repetida')
+
+    with pytest.raises(HTTPException) as exc:
+        idempotent_response(session, 'k', 1, 'POST /x', Corpo(valor=1), Corpo, criar)
+
+    assert exc.value.status_code == 409
+    assert exc.value.headers == {'Retry-After': '1'}
+
+
+def test_reserva_perdida_nao_sobrescreve_a_resposta_de_quem_pegou_a_chave(tmp_path: Path):
+    engine = create_engine(f'sqlite:///{tmp_path / "idempotencia.db"}')
+    SQLModel.metadata.create_all(engine)
+
+    def criar() -> Corpo:
+        # a reserva expira durante o POST e outra requisição pega a chave e grava a resposta
+        with Session(engine) as outra:
+            linha = outra.exec(select(IdempotencyKey)).one()
+            linha.claim_token = 'outra'
+            linha.status_code = 200
+            linha.body = b'{"valor":2}'
+            outra.add(linha)
+            outra.commit()
+        return Corpo(valor=1)
+
+    with Session(engine) as db:
+        resposta = idempotent_response(db, 'k', 1, 'POST /x', Corpo(valor=1), Corpo, criar)
+
+    assert resposta.body == b'{"valor":1}'
+    with Session(engine) as db:
+        linha = db.exec(select(IdempotencyKey)).one()
+        assert (linha.claim_token, linha.body) == ('outra', b'{"valor":2}')
+
+
+def test_chaves_expiradas_sao_removidas_pela_limpeza(tmp_path: Path):
+    engine = create_engine(f'sqlite:///{tmp_path / "idempotencia.db"}')
+    SQLModel.metadata.create_all(engine)
+    agora = utcnow()
+    with Session(engine) as db:
+        expiracoes = {'velha': agora - timedelta(seconds=1), 'nova': agora + timedelta(hours=1)}
+        for key, expira in expiracoes.items():
+            db.add(
+                IdempotencyKey(
+                    usuario_id=1,
+                    endpoint='POST /x',
+                    key=key,
+                    request_hash='',
+                    created_at=agora,
+                    expires_at=expira,
+                ),
+            )
+        db.commit()
+
+    evictor = KeyEvictor(lambda: Session(engine), interval=60)
+
+    async def roda() -> None:
+        evictor.start()
+        await asyncio.sleep(0.2)
+        await evictor.stop()
+
+    asyncio.run(roda())
+
+    assert evictor.evicted == 1
+    with Session(engine) as db:
+        assert db.exec(select(IdempotencyKey.key)).all() == ['nova']
@@ -0,0 +1,184 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.config import settings
+from app.database.enums import JobStatus, PedidoStatus
+from app.database.models import Job, Pedido
+from app.services.job_services import (
+    HANDLERS,
+    JobWorkerPool,
+    claim_jobs,
+    count_jobs,
+    enqueue_job,
+    run_job,
+)
+from app.utils.clock import utcnow
+from tests.utils import (
+    create_cliente,
+    create_pedido,
+    create_produto,
+    create_usuario,
+    get_header_with_token,
+)
+
+
+def _pool(session: Session) -> JobWorkerPool:
+    return JobWorkerPool(lambda: session, workers=1, batch_size=10, poll_interval=0.01)
+
+
+def _falha(_db: Session, _payload: dict) -> None:
+    msg = 'serviço externo fora do ar'
+    raise RuntimeError(msg)
+
+
+def test_update_pedido_agenda_job_e_worker_fecha_o_pedido(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    session.add(create_pedido([create_produto()], cliente, PedidoStatus.enviado))
+    session.commit()
+
+    response = client.put(
+        '/orders/1',
+        headers=get_header_with_token(usuario, client),
+        json={'cliente_id': cliente.id, 'status': PedidoStatus.entregue},
+    )
+
+    assert response.status_code == 200
+    # a requisição só agenda o job, o pedido é fechado pelo worker
+    assert response.json()['data_fim'] is None
+    job = session.exec(select(Job)).one()
+    assert job.kind == 'pedido_status'
+    assert job.payload['para'] == PedidoStatus.entregue.value
+    job_id = job.id
+
+    pool = _pool(session)
+    assert pool.run_batch() == 1
+
+    session.expire_all()
+    assert session.get(Pedido, 1).data_fim == utcnow().date()
+    assert session.get(Job, job_id).status == JobStatus.concluido
+    assert pool.metrics()['completed'] == 1
+    assert count_jobs(session)[JobStatus.concluido.value] == 1
+
+
+def test_update_sem_mudar_status_nao_agenda_job(client: TestClient, session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    session.add(create_pedido([create_produto()], cliente, PedidoStatus.enviado))
+    session.commit()
+
+    response = client.put(
+        '/orders/1',
+        headers=get_header_with_token(usuario, client),
+        json={'cliente_id': cliente.id, 'status': PedidoStatus.enviado},
+    )
+
+    assert response.status_code == 200
+    assert session.exec(select(Job)).all() == []
+
+
+def test_job_com_erro_e_repetido_com_espera_e_depois_falha(
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setitem(HANDLERS, 'falha', _falha)
+    monkeypatch.setattr(settings, 'JOB_MAX_ATTEMPTS', 2)
+    enqueue_job(session, 'falha', {})
+    session.commit()
+    job_id = session.exec(select(Job.id)).one()
+
+    assert not run_job(session, claim_jobs(session, 10, 'a')[0])
+    job = session.get(Job, job_id)
+    assert job.status == JobStatus.pendente
+    assert job.run_after >= utcnow() + timedelta(seconds=settings.JOB_RETRY_BACKOFF - 1)
+    assert 'serviço externo fora do ar' in job.last_error
+    # ainda esperando o backoff
+    assert claim_jobs(session, 10, 'b') == []
+
+    job = session.get(Job, job_id)
+    job.run_after = utcnow()
+    session.commit()
+    assert not run_job(session, claim_jobs(session, 10, 'c')[0])
+    job = session.get(Job, job_id)
+    assert job.status == JobStatus.falhou
+    assert job.attempts == 2
+    assert claim_jobs(session, 10, 'd') == []
+
+
+def test_job_travado_volta_para_a_fila_depois_do_prazo(session: Session):
+    enqueue_job(session, 'pedido_status', {})
+    session.commit()
+    job_id = session.exec(select(Job.id)).one()
+
+    assert [job.id for job in claim_jobs(session, 10, 'worker-que-caiu')] == [job_id]
+    # travado enquanto o prazo não expira
+    assert claim_jobs(session, 10, 'outro') == []
+
+    session.get(Job, job_id).locked_until = utcnow() - timedelta(seconds=1)
+    session.commit()
+
+    retomado = claim_jobs(session, 10, 'outro')
+    assert [job.id for job in retomado] == [job_id]
+    assert retomado[0].attempts == 2
+
+
+def test_conclusao_de_worker_com_prazo_expirado_e_descartada(session: Session):
+    usuario = create_usuario()
+    cliente = create_cliente(usuario)
+    session.add(cliente)
+    pedido = create_pedido([create_produto()], cliente, PedidoStatus.entregue)
+    session.add(pedido)
+    session.commit()
+    enqueue_job(
+        session,
+        'pedido_status',
+        {
+            'pedido_id': pedido.id,
+            'de': PedidoStatus.enviado.value,
+            'para': PedidoStatus.entregue.value,
+            'em': '2024-01-02',
+        },
+    )
+    session.commit()
+
+    atrasado = claim_jobs(session, 10, 'atrasado')[0]
+    # outro worker pegou o job depois do prazo do primeiro
+    session.exec(select(Job)).one().claim_token = uuid.uuid4().hex
+    session.commit()
+
+    assert not run_job(session, atrasado)
+    session.expire_all()
+    assert session.get(Pedido, pedido.id).data_fim is None
+
+
+def test_workers_processam_a_fila_em_segundo_plano(tmp_path: Path):
+    engine = create_engine(f'sqlite:///{tmp_path / "jobs.db"}')
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        for _ in range(3):
+            enqueue_job(db, 'pedido_status', {'pedido_id': 0})
+        db.commit()
+
+    pool = JobWorkerPool(lambda: Session(engine), workers=2, batch_size=2, poll_interval=0.01)
+
+    async def roda() -> None:
+        pool.start()
+        for _ in range(200):
+            if pool.metrics()['completed'] == 3:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(roda())
+
+    with Session(engine) as db:
+        assert count_jobs(db)[JobStatus.concluido.value] == 3
+    assert pool.metrics()['throughput_per_second'] == 3 / 60
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.database.pool import InstrumentedQueuePool, pool_status
+
+
+def test_pool_status_instrumentado(tmp_path: Path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+
+    conexao = engine.connect()
+    status = pool_status(engine.pool)
+
+    assert status['pool'] == 'InstrumentedQueuePool'
+    assert status['checked_out'] == 1
+    assert status['idle'] == 0
+    assert status['checkouts'] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    conexao.close()
+    status = pool_status(engine.pool)
+
+    assert status['checked_out'] == 0
+    assert status['idle'] == 1
+    assert status['timeouts'] == 1
+    assert status['wait_seconds_max'] >= 0.01
+    engine.dispose()
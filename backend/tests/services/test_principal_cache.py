@@ -0,0 +1,138 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.enums import Role
+from app.database.models import Usuario
+from app.services import auth_services
+from app.services.usuario_services import bump_principal_version, principal_version
+from app.utils.cache import TTLCache, principal_cache
+from tests.utils import create_usuario, get_header_with_token
+
+
+def test_ttl_cache_lru_e_expiracao():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    # 'b' era a entrada menos usada
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    cache.set('d', 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('d') is None
+
+    metrics = cache.metrics()
+    assert metrics['hits'] == 2
+    assert metrics['misses'] == 2
+    assert metrics['evictions'] == 2
+
+
+def test_principal_cache_hit(client: TestClient, session: Session):
+    usuario = create_usuario('cache@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    client.get('/usuarios/me', headers=headers)
+    hits = principal_cache.hits
+    response = client.get('/usuarios/me', headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()['email'] == 'cache@email.com'
+    assert principal_cache.hits == hits + 1
+
+
+def test_principal_cache_invalidacao(client: TestClient, session: Session):
+    admin = create_usuario('chefe@email.com')
+    usuario = create_usuario('alvo@email.com')
+    session.add(admin)
+    session.add(usuario)
+    session.commit()
+    headers_admin = get_header_with_token(admin, client)
+    headers = get_header_with_token(usuario, client)
+
+    assert client.get('/admin/metrics/hashing', headers=headers).status_code == 200
+
+    response = client.put(
+        f'/usuarios/{usuario.id}/role',
+        headers=headers_admin,
+        json={'role': 'user'},
+    )
+    assert response.status_code == 200
+    assert response.json()['role'] == 'user'
+    assert client.get('/admin/metrics/hashing', headers=headers).status_code == 401
+
+    response = client.delete(f'/usuarios/{usuario.id}', headers=headers_admin)
+    assert response.status_code == 200
+    assert client.get('/usuarios/me', headers=headers).status_code == 404
+
+
+def test_principal_cache_invalidado_por_outro_processo(client: TestClient, session: Session):
+    usuario = create_usuario('rebaixado@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    assert client.get('/admin/metrics/hashing', headers=headers).status_code == 200
+
+    # outro worker rebaixa o usuário: o principal_cache deste processo não é tocado
+    usuario.role = Role.user
+    session.add(usuario)
+    bump_principal_version(session)
+    session.commit()
+
+    assert client.get('/admin/metrics/hashing', headers=headers).status_code == 401
+
+
+def test_ttl_cache_descarta_valor_de_geracao_anterior():
+    cache = TTLCache(max_size=10, ttl=60)
+    generation = cache.generation
+
+    # uma invalidação acontece enquanto o valor era calculado
+    cache.clear()
+    cache.set('a', 1, generation=generation)
+
+    assert cache.get('a') is None
+
+    generation = cache.generation
+    cache.invalidate('a')
+    cache.set('a', 1, generation=generation)
+
+    assert cache.get('a') is None
+
+    cache.set('a', 2, generation=cache.generation)
+
+    assert cache.get('a') == 2
+
+
+def test_principal_cache_descarta_usuario_alterado_durante_a_consulta(
+    client: TestClient,
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    usuario = create_usuario('corrida@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    buscar = auth_services.buscar_usuario_by_email
+
+    async def buscar_e_alterar(db: Session, email: str) -> Usuario:
+        encontrado = await buscar(db, email)
+        # o papel muda depois da leitura e antes do set no cache
+        principal_cache.invalidate(email)
+        return encontrado
+
+    monkeypatch.setattr(auth_services, 'buscar_usuario_by_email', buscar_e_alterar)
+
+    assert client.get('/usuarios/me', headers=headers).status_code == 200
+    assert principal_cache.get(('corrida@email.com', principal_version(session))) is None
+
+    monkeypatch.setattr(auth_services, 'buscar_usuario_by_email', buscar)
+    client.get('/usuarios/me', headers=headers)
+    assert principal_cache.get(('corrida@email.com', principal_version(session))) is not None
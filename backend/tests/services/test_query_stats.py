@@ -0,0 +1,90 @@
+import logging
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.database.database import track_queries
+from app.database.models import Produto
+from tests.utils import create_produto, create_usuario, get_header_with_token
+
+
+def test_track_queries_aninhado(session: Session):
+    with track_queries() as externo:
+        session.exec(select(Produto)).all()
+        with track_queries() as interno:
+            session.exec(select(Produto)).all()
+
+    assert interno.count == 1
+    assert externo.count == 2
+    assert externo.seconds >= interno.seconds
+
+
+def test_headers_de_consultas(client: TestClient, session: Session):
+    usuario = create_usuario()
+    session.add(usuario)
+    session.add_all([create_produto() for _ in range(3)])
+    session.commit()
+
+    response = client.get('/products/', headers=get_header_with_token(usuario, client))
+
+    assert response.status_code == 200
+    assert int(response.headers['X-DB-Query-Count']) >= 1
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+
+
+def test_log_de_n_mais_1(
+    session: Session,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'N_PLUS_ONE_THRESHOLD', 3)
+    session.add_all([create_produto() for _ in range(3)])
+    session.commit()
+
+    with caplog.at_level(logging.WARNING), track_queries() as stats:
+        for produto_id in (1, 2, 3):
+            session.get(Produto, produto_id, populate_existing=True)
+
+    assert len(stats.repeated()) == 1
+    assert 'possível N+1: consulta executada 3 vezes' in caplog.text
+
+
+def test_log_de_consulta_lenta(
+    session: Session,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'SLOW_QUERY_MS', 0)
+
+    with caplog.at_level(logging.WARNING):
+        session.exec(select(Produto).where(Produto.categoria == 'camisa')).all()
+
+    assert 'consulta lenta' in caplog.text
+    assert "('camisa'," in caplog.text
+
+
+def test_consulta_com_erro_nao_afeta_as_seguintes(
+    session: Session,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(settings, 'SLOW_QUERY_MS', 50)
+    connection = session.connection()
+
+    with caplog.at_level(logging.WARNING), track_queries() as stats:
+        with pytest.raises(OperationalError):
+            session.execute(text('SELECT * FROM tabela_inexistente'))
+        # o início da consulta que falhou não pode ser usado pelas seguintes
+        time.sleep(0.06)
+        for _ in range(2):
+            session.exec(select(Produto)).all()
+
+    assert connection.info.get('query_start') is None
+    assert stats.count == 2
+    assert stats.seconds < 0.05
+    assert 'consulta lenta' not in caplog.text
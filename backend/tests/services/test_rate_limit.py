@@ -0,0 +1,162 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+import pytest
+
+from app.utils.rate_limit import (
+    BucketRule,
+    LoginThrottle,
+    MemoryBucketStore,
+    RedisBucketStore,
+    ThrottledError,
+    take_token,
+    take_tokens,
+)
+
+REGRA = BucketRule(capacity=3, refill_per_second=1)
+
+
+class RedisLocal:
+    """Substituto local do cliente redis com o necessário para o RedisBucketStore."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, dict[str, bytes]] = {}
+        self.ttls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def transaction(self, fn: Callable, *_keys: str, value_from_callable: bool) -> object:
+        """Executa fn com o próprio cliente, serializado pelo lock."""
+        with self._lock:
+            resultado = fn(self)
+        return resultado if value_from_callable else None
+
+    def hmget(self, name: str, *campos: str) -> list[bytes | None]:
+        """Campos do hash."""
+        valores = self.data.get(name, {})
+        return [valores.get(campo) for campo in campos]
+
+    def multi(self) -> None:
+        """Início da transação (nada a fazer aqui)."""
+
+    def hset(self, name: str, mapping: dict) -> None:
+        """Grava o hash."""
+        self.data[name] = {campo: str(valor).encode() for campo, valor in mapping.items()}
+
+    def expire(self, name: str, seconds: int) -> None:
+        """Registra o TTL."""
+        self.ttls[name] = seconds
+
+    def scan_iter(self, match: str) -> Iterator[str]:
+        """Chaves com o prefixo de match."""
+        return iter([name for name in list(self.data) if name.startswith(match.rstrip('*'))])
+
+    def delete(self, name: str) -> None:
+        """Remove a chave."""
+        self.data.pop(name, None)
+
+
+def test_take_token_reabastece_com_o_tempo():
+    tokens, espera = take_token(0.0, 0.0, 0.5, REGRA)
+    assert (tokens, espera) == (0.5, 0.5)
+
+    tokens, espera = take_token(0.0, 0.0, 10.0, REGRA)
+    # o balde não passa da capacidade
+    assert (tokens, espera) == (2.0, 0.0)
+
+
+def test_take_tokens_gasta_todos_ou_nenhum():
+    tokens, esperas = take_tokens([(3.0, 0.0, REGRA), (1.0, 0.0, REGRA)], 0.0)
+    assert (tokens, esperas) == ([2.0, 0.0], [0.0, 0.0])
+
+    tokens, esperas = take_tokens([(3.0, 0.0, REGRA), (0.0, 0.0, REGRA)], 0.0)
+    # o segundo balde está vazio, o primeiro mantém a sua ficha
+    assert (tokens, esperas) == ([3.0, 0.0], [0.0, 1.0])
+
+
+@pytest.mark.parametrize('store', [MemoryBucketStore(max_keys=100), RedisBucketStore(RedisLocal())])
+def test_store_gasta_as_fichas_de_todos_os_baldes_ou_de_nenhum(
+    store: MemoryBucketStore | RedisBucketStore,
+):
+    for _ in range(3):
+        store.take({'email:ana': REGRA})
+
+    esperas = store.take({'ip:1': REGRA, 'email:ana': REGRA})
+
+    assert esperas['ip:1'] == 0.0
+    assert esperas['email:ana'] > 0
+    # o balde do IP continua cheio
+    assert [store.take({'ip:1': REGRA})['ip:1'] for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize('store', [MemoryBucketStore(max_keys=100), RedisBucketStore(RedisLocal())])
+def test_store_esgota_e_rejeita(store: MemoryBucketStore | RedisBucketStore):
+    assert [store.take({'ip:1': REGRA})['ip:1'] for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take({'ip:1': REGRA})['ip:1'] > 0
+    # cada chave tem o seu balde
+    assert store.take({'ip:2': REGRA})['ip:2'] == 0.0
+
+    store.reset()
+    assert store.take({'ip:1': REGRA})['ip:1'] == 0.0
+
+
+def test_store_compartilhado_entre_instancias():
+    cliente = RedisLocal()
+    workers = [RedisBucketStore(cliente), RedisBucketStore(cliente)]
+
+    resultados = [workers[n % 2].take({'email:ana': REGRA})['email:ana'] for n in range(4)]
+
+    assert resultados[:3] == [0.0, 0.0, 0.0]
+    assert resultados[3] > 0
+    assert cliente.ttls['login-throttle:email:ana'] == REGRA.ttl
+
+
+def test_memory_store_descarta_chaves_antigas():
+    store = MemoryBucketStore(max_keys=2)
+    for chave in ('a', 'b', 'c'):
+        store.take({chave: REGRA})
+
+    assert list(store._buckets) == ['b', 'c']  # noqa: SLF001
+
+
+def test_login_throttle_contadores():
+    throttle = LoginThrottle(MemoryBucketStore(max_keys=100), {'ip': REGRA, 'email': REGRA})
+
+    for n in range(3):
+        throttle.check(ip='10.0.0.1', email=f'user{n}@email.com')
+    with pytest.raises(ThrottledError) as exc_info:
+        throttle.check(ip='10.0.0.1', email='novo@email.com')
+
+    assert exc_info.value.scope == 'ip'
+    assert 0 < exc_info.value.retry_after <= 1
+    assert throttle.metrics() == {'allowed': 3, 'rejected_ip': 1, 'rejected_email': 0}
+
+
+def test_login_throttle_conta_bloqueada_nao_gasta_o_limite_do_ip():
+    throttle = LoginThrottle(MemoryBucketStore(max_keys=100), {'ip': REGRA, 'email': REGRA})
+    for _ in range(3):
+        throttle.check(ip='10.0.0.1', email='alvo@email.com')
+
+    # alguém atrás do mesmo NAT insiste na conta bloqueada
+    for _ in range(5):
+        with pytest.raises(ThrottledError) as exc_info:
+            throttle.check(ip='10.0.0.2', email='alvo@email.com')
+        assert exc_info.value.scope == 'email'
+
+    # os outros usuários do IP continuam entrando
+    for n in range(3):
+        throttle.check(ip='10.0.0.2', email=f'user{n}@email.com')
+    assert throttle.metrics() == {'allowed': 6, 'rejected_ip': 0, 'rejected_email': 5}
+
+
+def test_memory_store_reabastece(monkeypatch: pytest.MonkeyPatch):
+    agora = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    store = MemoryBucketStore(max_keys=10)
+
+    for _ in range(3):
+        store.take({'k': REGRA})
+    assert store.take({'k': REGRA})['k'] == 1.0
+
+    agora[0] += 1
+    assert store.take({'k': REGRA})['k'] == 0.0
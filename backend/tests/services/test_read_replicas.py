@@ -0,0 +1,112 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.database import database
+from app.database.database import ReadReplicas, get_read_db
+from app.main import app
+from app.routes.metrics_router import db_pools
+from app.utils.metrics import Registry
+from tests.utils import create_usuario, get_header_with_token
+
+
+def _replica(path: Path, usuarios: int) -> Engine:
+    engine = create_engine(f'sqlite:///{path}')
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all([create_usuario(f'replica{i}@email.com') for i in range(usuarios)])
+        db.commit()
+    return engine
+
+
+@pytest.fixture(name='replicas')
+def replicas_fixture(
+    session: Session,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[ReadReplicas]:
+    """Duas réplicas em arquivos SQLite, com 1 e 2 usuários, e a sessão de teste como primária."""
+    replicas = ReadReplicas(
+        session.get_bind(),
+        [_replica(tmp_path / 'replica1.db', 1), _replica(tmp_path / 'replica2.db', 2)],
+    )
+    monkeypatch.setattr(database, 'read_replicas', replicas)
+    yield replicas
+    for replica in replicas.replicas:
+        replica.dispose()
+
+
+def test_round_robin_entre_replicas():
+    primary = create_engine('sqlite://')
+    replicas = [create_engine('sqlite://'), create_engine('sqlite://')]
+
+    router = ReadReplicas(primary, replicas)
+    escolhidas = [router.engine() for _ in range(4)]
+
+    assert escolhidas == [replicas[0], replicas[1], replicas[0], replicas[1]]
+    assert router.engine(primary=True) is primary
+    assert ReadReplicas(primary, []).engine() is primary
+
+
+@pytest.mark.usefixtures('replicas')
+def test_rotas_get_leem_das_replicas(client: TestClient, session: Session):
+    app.dependency_overrides.pop(get_read_db)
+    usuario = create_usuario('admin@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+
+    totais = [len(client.get('/usuarios/', headers=headers).json()) for _ in range(3)]
+    primaria = client.get('/usuarios/', headers={**headers, 'X-Read-Consistency': 'primary'})
+
+    assert totais == [1, 2, 1]
+    assert [u['email'] for u in primaria.json()] == ['admin@email.com']
+
+
+@pytest.mark.usefixtures('replicas')
+def test_escritas_vao_para_a_primaria(client: TestClient, session: Session):
+    app.dependency_overrides.pop(get_read_db)
+    usuario = create_usuario('admin@email.com')
+    session.add(usuario)
+    session.commit()
+    headers = get_header_with_token(usuario, client)
+    body = {
+        'nome': 'arnaldo',
+        'email': 'arnaldo@example.com',
+        'senha': '10921090',
+        'role': 'user',
+        'cpf': '66666666666',
+        'telefone': '11111111111',
+        'endereco': 'rua 8',
+        'data_nascimento': '2025-05-23',
+        'data_criacao': '2025-05-23T21:06:53.513Z',
+    }
+
+    criado = client.post('/clients/', headers=headers, json=body)
+    replica = client.get('/clients/', headers=headers)
+    primaria = client.get('/clients/', headers={**headers, 'X-Read-Consistency': 'primary'})
+
+    assert criado.status_code == 200
+    assert replica.json() == []
+    assert [c['cpf'] for c in primaria.json()] == ['66666666666']
+
+
+def test_metricas_do_pool_de_cada_replica(replicas: ReadReplicas):
+    registry = Registry()
+    registry.register_collector(
+        'db_pool',
+        'teste',
+        lambda: db_pools(replicas),
+        labelnames=('engine',),
+    )
+
+    linhas = registry.render().splitlines()
+
+    assert linhas.count('# TYPE db_pool_size gauge') == 1
+    assert 'db_pool_size{engine="replica1"} 5' in linhas
+    assert 'db_pool_size{engine="replica2"} 5' in linhas
+    assert set(db_pools(replicas)) == {('primary',), ('replica1',), ('replica2',)}
@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+
+from app.database.migrations import upgrade
+from app.database.models import Produto
+from app.database.search import PRODUTO_BUSCA, Fts5Search, TrigramSearch, rebuild_search_indexes
+from app.services.cliente_services import _search_clientes_stmt
+from app.services.produto_services import search_produtos
+from tests.utils import create_produto
+
+
+def test_busca_usa_indice_fts5(session: Session):
+    stmt = Fts5Search().search(select(Produto), PRODUTO_BUSCA, 'camiseta')
+    compiled = stmt.compile(session.get_bind())
+
+    plano = (
+        session.connection()
+        .exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {compiled}',
+            tuple(compiled.params[nome] for nome in compiled.positiontup),
+        )
+        .all()
+    )
+    detalhes = ' '.join(linha[-1] for linha in plano)
+
+    assert 'VIRTUAL TABLE INDEX' in detalhes
+    assert 'LIKE' not in str(compiled).upper()
+
+
+def test_busca_postgres_usa_trigramas():
+    sql = str(
+        _search_clientes_stmt('postgresql', 'Maria', 0, 10).compile(dialect=postgresql.dialect()),
+    )
+
+    assert '<%' in sql
+    assert "lower(usuario.nome || ' ' || usuario.email)" in sql
+    assert 'word_similarity' in sql
+    assert 'LIKE' not in sql.upper()
+    # mesma expressão do índice GIN criado pela migração
+    ddl = TrigramSearch().expression(PRODUTO_BUSCA).compile(dialect=postgresql.dialect())
+    assert str(ddl) == "lower(produto.categoria || ' ' || produto.secao)"
+
+
+def test_migracao_preenche_indice_de_produtos_existentes():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        upgrade(connection, target=3)
+        connection.execute(
+            text(
+                'INSERT INTO produto (categoria, secao, preco, disponivel) '
+                "VALUES ('bermuda', 'masculina', 10.0, 1)",
+            ),
+        )
+        # na versão 3 ainda não há índice de busca, a migração 4 indexa o produto existente
+        assert 'produto_busca' not in inspect(connection).get_table_names()
+        upgrade(connection)
+
+    with Session(engine) as db:
+        assert [produto.categoria for produto in search_produtos(db, 'bermud', 0, 10)] == [
+            'bermuda',
+        ]
+        db.add(create_produto('bermudão', 20.0, disponivel=True, secao='infantil'))
+        db.commit()
+        rebuild_search_indexes(db.connection())
+        assert len(search_produtos(db, 'bermud', 0, 10)) == 2
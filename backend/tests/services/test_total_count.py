@@ -0,0 +1,54 @@
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+
+from app.database.enums import PedidoStatus
+from app.database.models import Pedido
+from app.services.pedido_services import _pedidos_stmt
+from app.utils.total_count import Explain, count_key, count_statement
+
+
+def test_count_statement_sem_relacoes_e_paginacao():
+    stmt = _pedidos_stmt(20, 10, None, None, 'Moda', None, None, None)
+
+    sql = str(count_statement(stmt, Pedido.id).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith('SELECT count(*)')
+    assert 'ORDER BY' not in sql
+    assert 'LIMIT' not in sql
+    assert 'OFFSET' not in sql
+    # só o id do pedido, sem o JOIN com cliente do joinedload
+    assert 'cliente' not in sql
+    assert 'DISTINCT' in sql
+
+
+def test_count_key_ignora_filtros_vazios():
+    assert count_key('pedidos', {'pedido_status': None, 'secao_produtos': ''}) == (
+        'pedidos',
+        (),
+    )
+    assert count_key(
+        'pedidos',
+        {'pedido_status': PedidoStatus.entregue, 'cliente_id': 1},
+    ) == ('pedidos', (('cliente_id', 1), ('pedido_status', PedidoStatus.entregue.value)))
+
+
+def test_explain_envia_os_filtros_de_enum_como_gravados(session: Session):
+    parametros = []
+
+    def captura(*args: object) -> None:
+        # o quarto argumento do evento são os parâmetros enviados ao driver
+        parametros.append(args[3])
+
+    stmt = _pedidos_stmt(0, 10, None, None, None, None, PedidoStatus.entregue, None)
+    listagem = stmt.with_only_columns(Pedido.id).order_by(None).limit(None).offset(None)
+    event.listen(session.get_bind(), 'before_cursor_execute', captura)
+    try:
+        session.execute(Explain(listagem)).all()
+    finally:
+        event.remove(session.get_bind(), 'before_cursor_execute', captura)
+
+    assert [type(valor) for valor in parametros[0]] == [str]
+    assert parametros[0][0] == 'entregue'
+    sql = str(Explain(listagem).compile(dialect=postgresql.dialect()))
+    assert sql.startswith('EXPLAIN (FORMAT JSON) SELECT pedido.id')
@@ -0,0 +1,106 @@
+from sqlalchemy import Engine, inspect, text
+from sqlmodel import SQLModel, create_engine
+
+from app.database.migrations import HEAD, current_version, upgrade, upgrade_engine
+
+
+def test_upgrade_banco_novo():
+    engine = create_engine('sqlite://')
+
+    assert upgrade_engine(engine) == list(range(1, HEAD + 1))
+    assert upgrade_engine(engine) == []
+
+    with engine.connect() as connection:
+        assert current_version(connection) == HEAD
+
+    indexes = {index['name'] for index in inspect(engine).get_indexes('pedido')}
+    assert 'ix_pedido_status_data_inicio' in indexes
+    assert 'ix_pedido_data_inicio_id' in indexes
+    assert 'ix_usuario_email' in {index['name'] for index in inspect(engine).get_indexes('usuario')}
+
+
+def test_upgrade_banco_criado_sem_migracoes():
+    """Bancos criados com create_all, antes das migrações, são atualizados sem erro."""
+    engine = create_engine('sqlite://')
+    SQLModel.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        assert current_version(connection) == 0
+        assert upgrade(connection, target=1) == [1]
+        assert upgrade(connection) == list(range(2, HEAD + 1))
+        assert current_version(connection) == HEAD
+
+
+def _schema(engine: Engine) -> dict:
+    inspector = inspect(engine)
+    return {
+        table: {
+            'columns': {
+                column['name']: (str(column['type']), column['nullable'])
+                for column in inspector.get_columns(table)
+            },
+            'pk': inspector.get_pk_constraint(table)['constrained_columns'],
+            'fks': sorted(
+                (fk['referred_table'], tuple(fk['constrained_columns']))
+                for fk in inspector.get_foreign_keys(table)
+            ),
+            'unique': sorted(
+                tuple(unique['column_names']) for unique in inspector.get_unique_constraints(table)
+            ),
+            'indexes': sorted(
+                (index['name'], tuple(index['column_names']))
+                for index in inspector.get_indexes(table)
+            ),
+        }
+        for table in SQLModel.metadata.tables
+    }
+
+
+def test_migracoes_criam_o_schema_dos_models():
+    """As tabelas congeladas nas migrações precisam continuar iguais às dos models."""
+    migrado = create_engine('sqlite://')
+    upgrade_engine(migrado)
+    models = create_engine('sqlite://')
+    SQLModel.metadata.create_all(models)
+
+    assert _schema(migrado) == _schema(models)
+
+
+def _triggers(engine: Engine) -> set[str]:
+    with engine.connect() as connection:
+        return set(
+            connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'trigger'"),
+            ).scalars(),
+        )
+
+
+def test_migracoes_de_vendas_e_busca_preenchem_os_dados_existentes():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        upgrade(connection, target=2)
+        for statement in (
+            "INSERT INTO usuario VALUES (1, 'maria', 'maria@email.com', 'x', 'user')",
+            "INSERT INTO cliente VALUES (1, '12345678901', NULL, NULL, '2025-01-01', NULL, 1)",
+            "INSERT INTO produto VALUES (1, 'camisa', 'masculino', 10.0, 1)",
+            "INSERT INTO pedido VALUES (1, 1, 'entregue', '2025-01-02', NULL)",
+            'INSERT INTO pedido_produto VALUES (1, 1)',
+        ):
+            connection.execute(text(statement))
+        upgrade(connection)
+
+        vendas = connection.execute(text('SELECT * FROM venda_diaria')).all()
+        clientes = connection.execute(
+            text("SELECT rowid FROM cliente_busca WHERE cliente_busca MATCH 'mar'"),
+        ).scalars()
+        produtos = connection.execute(
+            text("SELECT rowid FROM produto_busca WHERE produto_busca MATCH 'cam'"),
+        ).scalars()
+
+        assert vendas == [('2025-01-02', 'masculino', 'camisa', 'entregue', 1, 1, 10.0)]
+        assert list(clientes) == [1]
+        assert list(produtos) == [1]
+
+    models = create_engine('sqlite://')
+    SQLModel.metadata.create_all(models)
+    assert _triggers(engine) == _triggers(models)